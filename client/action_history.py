@@ -0,0 +1,169 @@
+"""
+Action History - Fixed-size record of executed actions with cheap repetition detection
+Replaces the unbounded list of formatted strings; context text is rendered on demand
+"""
+import hashlib
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+
+REPEAT_GRID = 10  # model pixels; clicks closer than this count as the same spot
+STUCK_WINDOW = 8  # recent records in which clicks at the same spot are counted
+KEY_REPEAT_ALLOWANCE = 8  # back-to-back key presses that are normal (tabbing through a form)
+TEXT_PREVIEW_LENGTH = 40
+RESULT_LENGTH = 80
+
+POINTER_ACTIONS = ("left_click", "right_click", "double_click", "middle_click", "mouse_move")
+
+DESCRIPTIONS = {
+    "left_click": "Clicked at",
+    "right_click": "Right-clicked at",
+    "double_click": "Double-clicked at",
+    "middle_click": "Middle-clicked at",
+    "mouse_move": "Moved mouse to",
+}
+
+
+class ActionRecord:
+    """One executed action"""
+
+    __slots__ = (
+        "kind",
+        "model_x",
+        "model_y",
+        "real_x",
+        "real_y",
+        "text_hash",
+        "text_preview",
+        "result",
+        "started",
+        "duration",
+    )
+
+    def __init__(self, kind: str, model_xy: Optional[Tuple[int, int]] = None,
+                 real_xy: Optional[Tuple[int, int]] = None, text: Optional[str] = None,
+                 result: str = "", started: float = 0.0, duration: float = 0.0):
+        self.kind = kind
+        self.model_x, self.model_y = model_xy if model_xy else (None, None)
+        self.real_x, self.real_y = real_xy if real_xy else (None, None)
+        if text is None:
+            self.text_hash = None
+            self.text_preview = None
+        else:
+            self.text_hash = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+            self.text_preview = text[:TEXT_PREVIEW_LENGTH]
+        self.result = result[:RESULT_LENGTH]
+        self.started = started
+        self.duration = duration
+
+    @property
+    def repeat_key(self) -> tuple:
+        """Actions with the same key are considered repetitions of each other"""
+        if self.model_x is not None:
+            return (
+                self.kind,
+                round(self.model_x / REPEAT_GRID) * REPEAT_GRID,
+                round(self.model_y / REPEAT_GRID) * REPEAT_GRID,
+            )
+        return (self.kind, self.text_hash)
+
+    def describe(self) -> str:
+        """Human-readable line for the context message"""
+        if self.kind in DESCRIPTIONS and self.model_x is not None:
+            return f"{DESCRIPTIONS[self.kind]} ({self.model_x}, {self.model_y})"
+        if self.kind == "type":
+            return f"Typed: '{self.text_preview}'"
+        if self.kind == "key":
+            return f"Pressed key: {self.text_preview}"
+        if self.kind == "navigate":
+            return f"Navigated to: {self.text_preview}"
+        if self.kind == "fill_form":
+            return f"Filled form fields: {self.text_preview}"
+        if self.text_preview:
+            return f"{self.kind}: {self.text_preview}"
+        return self.kind
+
+
+class ActionHistory:
+    """Ring buffer of ActionRecords, indexing repetitions by repeat key as records come and go"""
+
+    def __init__(self, capacity: int = 50):
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self._records: List[Optional[ActionRecord]] = [None] * self.capacity
+        self._next = 0  # slot the next record is written to
+        self._size = 0
+        self.total = 0  # records ever appended, used to number them
+        self._occurrences: Dict[tuple, Deque[int]] = {}  # repeat key -> numbers of its buffered records
+        self._last_key: Optional[tuple] = None
+        self.repeat_streak = 0  # consecutive records sharing the last record's key
+        self._progress_at = 0  # value of total when the page last visibly changed
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, record: ActionRecord):
+        evicted = self._records[self._next]
+        if evicted is not None:
+            # The evicted record is the oldest buffered one, so also the oldest of its key
+            key = evicted.repeat_key
+            numbers = self._occurrences[key]
+            numbers.popleft()
+            if not numbers:
+                del self._occurrences[key]
+
+        self._records[self._next] = record
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.total += 1
+
+        key = record.repeat_key
+        self._occurrences.setdefault(key, deque()).append(self.total)
+        self.repeat_streak = self.repeat_streak + 1 if key == self._last_key else 1
+        self._last_key = key
+
+    def recent(self, count: int) -> Iterator[ActionRecord]:
+        """Up to `count` most recent records, oldest first"""
+        count = min(count, self._size)
+        for offset in range(count, 0, -1):
+            yield self._records[(self._next - offset) % self.capacity]
+
+    def occurrences(self, record: ActionRecord) -> int:
+        """How many buffered records share this record's repeat key"""
+        return len(self._occurrences.get(record.repeat_key, ()))
+
+    def mark_progress(self):
+        """The page visibly changed: repetitions before this point are not a sign of being stuck"""
+        self._progress_at = self.total
+
+    def stuck_level(self) -> int:
+        """
+        0 when making progress, grows as the latest action keeps being repeated without the
+        page changing: back to back, or (for pointer actions) at the same spot among the last
+        STUCK_WINDOW records. Key presses get KEY_REPEAT_ALLOWANCE free repeats
+        """
+        since_progress = self.total - self._progress_at
+        if self._last_key is None or not since_progress:
+            return 0
+        last = self._records[(self._next - 1) % self.capacity]
+        level = min(self.repeat_streak, since_progress) - 1
+        if last.kind == "key":
+            level -= KEY_REPEAT_ALLOWANCE
+        if len(self._last_key) == 3:
+            window = min(since_progress, STUCK_WINDOW)
+            same_spot = 0
+            for number in reversed(self._occurrences[self._last_key]):
+                if number <= self.total - window:
+                    break
+                same_spot += 1
+            level = max(level, same_spot - 2)
+        return max(level, 0)
+
+    def render(self, count: int = 5) -> str:
+        """Numbered list of the most recent actions"""
+        first = self.total - min(count, self._size) + 1
+        return "\n".join(
+            f"{first + i}. {record.describe()}" for i, record in enumerate(self.recent(count))
+        )
@@ -0,0 +1,293 @@
+"""
+API Scheduler - Process-wide token buckets for the Claude API rate limits
+All orchestrators share one scheduler: calls queue by priority and are released when the
+requests/min, input tokens/min and output tokens/min buckets have room. Bucket state is
+synced from the anthropic-ratelimit-* response headers.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import config
+
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0  # a task the user is waiting on
+PRIORITY_PARALLEL = 1  # sub-tasks of a parallel task
+PRIORITY_BACKGROUND = 2  # work nobody is waiting on yet
+
+# Image tokens are about width * height / 750
+IMAGE_TOKENS = config.TARGET_SCREENSHOT_WIDTH * config.TARGET_SCREENSHOT_HEIGHT // 750
+CHARS_PER_TOKEN = 4
+TOOL_OVERHEAD_TOKENS = 800  # computer tool definition and its system prompt
+
+# Header prefix for each bucket
+BUCKET_HEADERS = {
+    "requests": "anthropic-ratelimit-requests",
+    "input_tokens": "anthropic-ratelimit-input-tokens",
+    "output_tokens": "anthropic-ratelimit-output-tokens",
+}
+
+
+def estimate_input_tokens(messages: List[Dict]) -> int:
+    """Rough input token count of a request: text by length, images by size"""
+    def count(content) -> int:
+        if isinstance(content, str):
+            return len(content) // CHARS_PER_TOKEN
+        if isinstance(content, list):
+            return sum(count(block) for block in content)
+        block_type = content.get("type") if isinstance(content, dict) else getattr(content, "type", None)
+        if block_type == "image":
+            return IMAGE_TOKENS
+        if block_type == "tool_result":
+            return count(content.get("content", ""))
+        if block_type == "tool_use":
+            tool_input = content.get("input") if isinstance(content, dict) else content.input
+            return len(json.dumps(tool_input)) // CHARS_PER_TOKEN
+        text = content.get("text") if isinstance(content, dict) else getattr(content, "text", None)
+        return len(text or "") // CHARS_PER_TOKEN
+
+    return TOOL_OVERHEAD_TOKENS + sum(count(message["content"]) for message in messages)
+
+
+class TokenBucket:
+    """Continuously refilling bucket; an unknown limit (None) never makes anyone wait"""
+
+    def __init__(self, per_minute: Optional[int] = None):
+        self.capacity = per_minute
+        self.level = float(per_minute or 0)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        """Refill per second"""
+        return self.capacity / 60 if self.capacity else 0.0
+
+    def refill(self, now: float):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (capped at capacity, so big requests still run)"""
+        if not self.capacity:
+            return 0.0
+        self.refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(missing / self.rate, 0.0)
+
+    def take(self, amount: float, now: float):
+        if self.capacity:
+            self.refill(now)
+            self.level -= amount
+
+    def sync(self, limit: int, remaining: int, now: float):
+        """Server-side state from the rate-limit headers"""
+        self.capacity = limit
+        self.level = float(remaining)
+        self.updated = now
+
+
+class Ticket:
+    """A granted (or queued) API call and the capacity reserved for it"""
+
+    __slots__ = ("priority", "amounts", "future")
+
+    def __init__(self, priority: int, amounts: Dict[str, float], future: asyncio.Future):
+        self.priority = priority
+        self.amounts = amounts  # bucket name -> reserved amount
+        self.future = future
+
+
+class APIScheduler:
+    """Priority queue in front of the requests / input tokens / output tokens buckets"""
+
+    def __init__(self, requests_per_minute: Optional[int] = None,
+                 input_tokens_per_minute: Optional[int] = None,
+                 output_tokens_per_minute: Optional[int] = None):
+        self.buckets = {
+            "requests": TokenBucket(requests_per_minute),
+            "input_tokens": TokenBucket(input_tokens_per_minute),
+            "output_tokens": TokenBucket(output_tokens_per_minute),
+        }
+        self.paused_until = 0.0  # set by a 429, holds every caller
+        self._queue: List[tuple] = []  # (priority, sequence, ticket)
+        self._sequence = itertools.count()
+        self._in_flight: List[Ticket] = []
+        self._changed: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+
+    def _amounts(self, input_tokens: int, output_tokens: int) -> Dict[str, float]:
+        return {"requests": 1, "input_tokens": input_tokens, "output_tokens": output_tokens}
+
+    def _delay(self, amounts: Dict[str, float], now: float) -> float:
+        delays = [bucket.wait_for(amounts[name], now) for name, bucket in self.buckets.items()]
+        return max([self.paused_until - now] + delays)
+
+    def estimate_wait(self, input_tokens: int, output_tokens: int,
+                      priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Seconds a call queued now would wait, counting the calls queued ahead of it"""
+        now = time.monotonic()
+        amounts = self._amounts(input_tokens, output_tokens)
+        for queued_priority, _, ticket in self._queue:
+            if queued_priority <= priority and not ticket.future.done():
+                for name, amount in ticket.amounts.items():
+                    amounts[name] += amount
+        return self._delay(amounts, now)
+
+    async def acquire(self, input_tokens: int, output_tokens: int,
+                      priority: int = PRIORITY_INTERACTIVE) -> Ticket:
+        """Wait for capacity; pass the ticket to complete() once the call returns"""
+        loop = asyncio.get_running_loop()
+        ticket = Ticket(priority, self._amounts(input_tokens, output_tokens), loop.create_future())
+        heapq.heappush(self._queue, (priority, next(self._sequence), ticket))
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        self._changed.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            # A queued ticket is cancelled with its caller and dropped by the pump;
+            # one granted in the meantime gives its capacity back
+            if ticket in self._in_flight:
+                self.complete(ticket)
+            raise
+        return ticket
+
+    async def _pump(self):
+        """Release queued calls in priority order as the buckets refill"""
+        while self._queue:
+            _, _, ticket = self._queue[0]
+            if ticket.future.done():
+                heapq.heappop(self._queue)
+                continue
+
+            now = time.monotonic()
+            delay = self._delay(ticket.amounts, now)
+            if delay <= 0:
+                heapq.heappop(self._queue)
+                for name, bucket in self.buckets.items():
+                    bucket.take(ticket.amounts[name], now)
+                self._in_flight.append(ticket)
+                ticket.future.set_result(None)
+                continue
+
+            # Sleep until the head fits, or until a higher-priority call or new headers arrive
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def complete(self, ticket: Ticket, headers=None, usage=None):
+        """
+        Settle a finished call: sync the buckets from its rate-limit headers when present,
+        otherwise correct the reservation with the actual usage (or refund it if there is none)
+        """
+        if ticket in self._in_flight:
+            self._in_flight.remove(ticket)
+        now = time.monotonic()
+
+        synced = headers is not None and self._sync(headers, now)
+        if synced:
+            pass  # the server's numbers already include this call
+        elif usage is not None:
+            actual = {
+                "input_tokens": (getattr(usage, "input_tokens", 0) or 0)
+                + (getattr(usage, "cache_creation_input_tokens", 0) or 0)
+                + (getattr(usage, "cache_read_input_tokens", 0) or 0),
+                "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+            }
+            for name, amount in actual.items():
+                self.buckets[name].take(amount - ticket.amounts[name], now)
+        else:
+            for name, bucket in self.buckets.items():
+                bucket.take(-ticket.amounts[name], now)
+
+        if self._changed is not None:
+            self._changed.set()
+
+    def _sync(self, headers, now: float) -> bool:
+        """Buckets from anthropic-ratelimit-* headers, minus what other in-flight calls reserved"""
+        synced = False
+        for name, prefix in BUCKET_HEADERS.items():
+            limit = headers.get(f"{prefix}-limit")
+            remaining = headers.get(f"{prefix}-remaining")
+            if limit is None or remaining is None:
+                continue
+            reserved = sum(ticket.amounts[name] for ticket in self._in_flight)
+            self.buckets[name].sync(int(limit), int(remaining) - reserved, now)
+            synced = True
+        return synced
+
+    def backoff(self, headers=None) -> float:
+        """After a 429: hold every caller until the server says to retry, returns the pause in seconds"""
+        now = time.monotonic()
+        pause = None
+        if headers is not None:
+            self._sync(headers, now)
+            retry_after = headers.get("retry-after")
+            if retry_after is not None:
+                try:
+                    pause = float(retry_after)
+                except ValueError:
+                    pass
+            if pause is None:
+                pause = self._seconds_until_reset(headers)
+        if pause is None:
+            pause = config.API_DEFAULT_BACKOFF
+        self.paused_until = max(self.paused_until, now + pause)
+        if self._changed is not None:
+            self._changed.set()
+        return pause
+
+    def _seconds_until_reset(self, headers) -> Optional[float]:
+        """Soonest anthropic-ratelimit-*-reset (RFC 3339) among exhausted buckets"""
+        resets = []
+        for prefix in BUCKET_HEADERS.values():
+            if headers.get(f"{prefix}-remaining") not in ("0", 0):
+                continue
+            reset = headers.get(f"{prefix}-reset")
+            if reset:
+                try:
+                    reset_at = datetime.fromisoformat(reset.replace("Z", "+00:00"))
+                except ValueError:
+                    continue
+                resets.append(max(reset_at.timestamp() - time.time(), 0.0))
+        return min(resets) if resets else None
+
+    def stats(self) -> Dict:
+        """Current bucket levels and queue depth"""
+        now = time.monotonic()
+        for bucket in self.buckets.values():
+            bucket.refill(now)
+        return {
+            "queued": sum(1 for _, _, ticket in self._queue if not ticket.future.done()),
+            "in_flight": len(self._in_flight),
+            "paused_for": round(max(self.paused_until - now, 0.0), 2),
+            **{
+                name: {"limit": bucket.capacity, "available": round(bucket.level)}
+                for name, bucket in self.buckets.items()
+            },
+        }
+
+
+_scheduler: Optional[APIScheduler] = None
+
+
+def get_scheduler() -> APIScheduler:
+    """Process-wide scheduler, shared by every orchestrator and worker"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = APIScheduler(
+            config.API_REQUESTS_PER_MINUTE,
+            config.API_INPUT_TOKENS_PER_MINUTE,
+            config.API_OUTPUT_TOKENS_PER_MINUTE,
+        )
+    return _scheduler
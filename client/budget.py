@@ -0,0 +1,268 @@
+"""
+Budget - Per-task limits on wall time, tokens, screenshots and API cost
+Usage comes from the API responses' `usage` fields; totals are aggregated per task type
+"""
+import asyncio
+import time
+from typing import Awaitable, Dict, Optional, TypeVar
+
+import config
+import intent
+
+
+# USD per million tokens (input, output), matched by model name prefix
+PRICING = {
+    "claude-haiku-4-5": (1.00, 5.00),
+    "claude-sonnet-4": (3.00, 15.00),
+    "claude-opus-4-5": (5.00, 25.00),
+    "claude-opus-4": (15.00, 75.00),
+}
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+
+
+T = TypeVar("T")
+
+
+class BudgetExhausted(Exception):
+    """A budget limit ran out while waiting on something the budget bounds"""
+
+    def __init__(self, limit: str):
+        super().__init__(limit)
+        self.limit = limit
+
+
+def price_for(model: str) -> tuple:
+    """(input, output) USD per million tokens; unknown models are priced like the most expensive one"""
+    for prefix in sorted(PRICING, key=len, reverse=True):
+        if model.startswith(prefix):
+            return PRICING[prefix]
+    return max(PRICING.values())
+
+
+class TaskBudget:
+    """Limits for one task; None disables a limit"""
+
+    FIELDS = ("max_seconds", "max_iterations", "max_input_tokens", "max_output_tokens",
+              "max_screenshots", "max_cost")
+    FLOAT_FIELDS = ("max_seconds", "max_cost")
+
+    def __init__(self, max_seconds: Optional[float] = None, max_iterations: Optional[int] = None,
+                 max_input_tokens: Optional[int] = None, max_output_tokens: Optional[int] = None,
+                 max_screenshots: Optional[int] = None, max_cost: Optional[float] = None):
+        self.max_seconds = max_seconds
+        self.max_iterations = max_iterations
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+        self.max_screenshots = max_screenshots
+        self.max_cost = max_cost
+
+    @classmethod
+    def from_config(cls, overrides: Optional[Dict] = None) -> "TaskBudget":
+        """Defaults from config, with per-task overrides (e.g. the "budget" field of a task message)"""
+        budget = cls(
+            max_seconds=config.TASK_MAX_SECONDS,
+            max_iterations=config.TASK_MAX_ITERATIONS,
+            max_input_tokens=config.TASK_MAX_INPUT_TOKENS,
+            max_output_tokens=config.TASK_MAX_OUTPUT_TOKENS,
+            max_screenshots=config.TASK_MAX_SCREENSHOTS,
+            max_cost=config.TASK_MAX_COST,
+        )
+        for name, value in (overrides or {}).items():
+            if name not in cls.FIELDS:
+                continue
+            try:
+                setattr(budget, name, cls.coerce(name, value))
+            except (TypeError, ValueError):
+                print(f"⚠️ Ignoring invalid budget {name}={value!r}, keeping {getattr(budget, name)}")
+        return budget
+
+    @classmethod
+    def coerce(cls, name: str, value) -> Optional[float]:
+        """A limit from a task message ("0.2", 5.0, None) as a number; raises ValueError if it is not one"""
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            raise ValueError(name)
+        number = float(value)
+        if not number >= 0:  # also rejects NaN
+            raise ValueError(name)
+        return number if name in cls.FLOAT_FIELDS else int(number)
+
+
+class BudgetTracker:
+    """Spending of one task against its TaskBudget"""
+
+    def __init__(self, budget: TaskBudget):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.iterations = 0
+        self.api_calls = 0
+        self.input_tokens = 0  # uncached input
+        self.cache_write_tokens = 0
+        self.cache_read_tokens = 0
+        self.output_tokens = 0
+        self.screenshots = 0
+        self.cost = 0.0
+        # Spend of the latest call; the next one resends the whole conversation, so it costs at least as much
+        self.last_call_input_tokens = 0
+        self.last_call_cost = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def total_input_tokens(self) -> int:
+        return self.input_tokens + self.cache_write_tokens + self.cache_read_tokens
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.budget.max_seconds is None:
+            return None
+        return max(self.budget.max_seconds - self.elapsed, 0.0)
+
+    async def run_within(self, awaitable: Awaitable[T]) -> T:
+        """
+        Await with what is left of the seconds budget as timeout. Raises BudgetExhausted when
+        the budget runs out; a timeout from inside the awaitable is re-raised as it is
+        """
+        remaining = self.remaining_seconds()
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            if remaining is not None and self.remaining_seconds() <= 0:
+                raise BudgetExhausted("seconds") from None
+            raise
+
+    def share(self, parts: int) -> TaskBudget:
+        """
+        What is left of the budget, divided between `parts` tasks running at the same time.
+        Wall time and iterations are not divided: the tasks spend them side by side.
+        """
+        budget = self.budget
+        spent = {
+            "max_input_tokens": self.total_input_tokens,
+            "max_output_tokens": self.output_tokens,
+            "max_screenshots": self.screenshots,
+            "max_cost": self.cost,
+        }
+        shared = TaskBudget(max_seconds=self.remaining_seconds(), max_iterations=budget.max_iterations)
+        for name, used in spent.items():
+            limit = getattr(budget, name)
+            if limit is not None:
+                share = max(limit - used, 0) / max(parts, 1)
+                setattr(shared, name, share if name in TaskBudget.FLOAT_FIELDS else int(share))
+        return shared
+
+    def record_usage(self, usage, model: str):
+        """Add one API response's usage and its cost"""
+        input_tokens = getattr(usage, "input_tokens", 0) or 0
+        output_tokens = getattr(usage, "output_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+
+        self.api_calls += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.cache_write_tokens += cache_write
+        self.cache_read_tokens += cache_read
+
+        input_price, output_price = price_for(model)
+        self.last_call_input_tokens = input_tokens + cache_write + cache_read
+        self.last_call_cost = (
+            input_tokens * input_price
+            + cache_write * input_price * CACHE_WRITE_MULTIPLIER
+            + cache_read * input_price * CACHE_READ_MULTIPLIER
+            + output_tokens * output_price
+        ) / 1_000_000
+        self.cost += self.last_call_cost
+
+    def record_screenshot(self):
+        self.screenshots += 1
+
+    def exceeded(self) -> Optional[str]:
+        """
+        Name of the limit that has been reached, None while the task is within budget.
+        Token and cost limits count as reached when the next call would go over them.
+        """
+        budget = self.budget
+        checks = (
+            (budget.max_seconds, self.elapsed, "seconds"),
+            (budget.max_iterations, self.iterations, "iterations"),
+            (budget.max_input_tokens, self.total_input_tokens + self.last_call_input_tokens, "input_tokens"),
+            (budget.max_output_tokens, self.output_tokens, "output_tokens"),
+            (budget.max_screenshots, self.screenshots, "screenshots"),
+            (budget.max_cost, self.cost + self.last_call_cost, "cost"),
+        )
+        for limit, spent, name in checks:
+            if limit is not None and spent >= limit:
+                return name
+        return None
+
+    def summary(self) -> Dict:
+        return {
+            "seconds": round(self.elapsed, 2),
+            "iterations": self.iterations,
+            "api_calls": self.api_calls,
+            "input_tokens": self.total_input_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "output_tokens": self.output_tokens,
+            "screenshots": self.screenshots,
+            "cost": round(self.cost, 6),
+        }
+
+
+def task_type(task: str) -> str:
+    """Coarse task category the metrics are grouped by"""
+    if intent.search_url(task):
+        return "search"
+    if intent.parse_field_values(task):
+        return "form"
+    if intent.find_url(task):
+        return "navigate"
+    return "general"
+
+
+class BudgetMetrics:
+    """Budget spending aggregated per task type"""
+
+    TOTALS = ("seconds", "iterations", "api_calls", "input_tokens", "cache_read_tokens",
+              "output_tokens", "screenshots", "cost")
+
+    def __init__(self):
+        self._by_type: Dict[str, Dict] = {}
+
+    def record(self, kind: str, tracker: BudgetTracker, outcome: str):
+        """Add a finished task; outcome is "completed" or why it stopped"""
+        entry = self._by_type.setdefault(kind, {
+            "tasks": 0,
+            "outcomes": {},
+            "totals": dict.fromkeys(self.TOTALS, 0),
+        })
+        entry["tasks"] += 1
+        entry["outcomes"][outcome] = entry["outcomes"].get(outcome, 0) + 1
+        for name, value in tracker.summary().items():
+            entry["totals"][name] += value
+
+    def snapshot(self) -> Dict:
+        """Per task type: task count, outcomes, totals and per-task averages"""
+        return {
+            kind: {
+                "tasks": entry["tasks"],
+                "outcomes": dict(entry["outcomes"]),
+                "totals": {name: round(value, 6) for name, value in entry["totals"].items()},
+                "average": {name: round(value / entry["tasks"], 6) for name, value in entry["totals"].items()},
+            }
+            for kind, entry in self._by_type.items()
+        }
+
+
+_metrics: Optional[BudgetMetrics] = None
+
+
+def get_metrics() -> BudgetMetrics:
+    """Process-wide budget metrics"""
+    global _metrics
+    if _metrics is None:
+        _metrics = BudgetMetrics()
+    return _metrics
@@ -4,68 +4,55 @@ This is the bridge between Claude's abstract actions and browser-specific comman
 """
 import asyncio
 import json
-from typing import Optional, Dict, Any
+import secrets
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Callable, List, Tuple
 import websockets
 
+import config
+from frame_buffer import FrameBuffer
 
-class ChromeAdapter:
-    """Adapter that translates Claude actions to Chrome Extension commands"""
+
+class BrowserCommands:
+    """Browser commands shared by ChromeAdapter and its per-tab views"""
     
-    def __init__(self):
-        self.websocket: Optional[websockets.WebSocketServerProtocol] = None
-        self.last_screenshot: Optional[str] = None
-        self.last_action_result: Optional[Dict] = None
-        self._waiting_for_response = False
-        
-    def set_websocket(self, websocket):
-        """Set the WebSocket connection to Chrome Extension"""
-        self.websocket = websocket
-        
-    def set_last_screenshot(self, screenshot_data: str):
-        """Store screenshot received from extension"""
-        self.last_screenshot = screenshot_data
-        self._waiting_for_response = False
-        
-    def set_last_action_result(self, success: bool, data: Any):
-        """Store result of last action"""
-        self.last_action_result = {
-            "success": success,
-            "data": data
-        }
-        self._waiting_for_response = False
-        
-    async def send_command(self, command: Dict) -> Dict:
-        """Send command to Chrome Extension and wait for response"""
-        if not self.websocket:
-            raise Exception("Chrome Extension not connected")
-            
-        print(f"📤 Sending to Extension: {command.get('action')}")
-        
-        # Send command
-        await self.websocket.send(json.dumps(command))
-        
-        # Wait for response
-        self._waiting_for_response = True
-        timeout = 10  # seconds
+    last_screenshot: Optional[str] = None
+    
+    async def send_command(self, command: Dict, stream: Optional[Callable[[Dict], None]] = None,
+                           timeout: Optional[float] = None) -> Dict:
+        raise NotImplementedError
         
-        for _ in range(timeout * 10):
-            if not self._waiting_for_response:
-                break
-            await asyncio.sleep(0.1)
-            
-        '''if self._waiting_for_response:
-            raise TimeoutError("Extension did not respond in time")'''
-            
-        return self.last_action_result or {}
+    def frame_buffer(self) -> Optional[FrameBuffer]:
+        """Last frame of the tab commands target, None when delta screenshots are off"""
+        return None
         
     async def get_screenshot(self) -> str:
-        """Request screenshot from Chrome Extension"""
+        """Request screenshot from Chrome Extension, as a delta against the last frame when possible"""
         self.last_screenshot = None
+        frames = self.frame_buffer()
         
-        await self.send_command({
-            "action": "screenshot"
-        })
+        if frames is None:
+            result = await self.send_command({
+                "action": "screenshot"
+            })
+            self.last_screenshot = result.get("screenshot")
+            return self.last_screenshot
         
+        for _ in range(2):
+            result = await self.send_command({
+                "action": "screenshot",
+                "delta": frames.frame_id
+            }, stream=frames.receive)
+            if result.get("screenshot"):
+                # Extension without delta support answered with a plain screenshot
+                frames.set_keyframe(result["screenshot"], None)
+            if not result.get("success"):
+                break
+            self.last_screenshot = frames.screenshot()
+            if self.last_screenshot:
+                break
+            # The delta did not apply to our frame, ask again for a keyframe
         return self.last_screenshot
         
     async def mouse_move(self, x: int, y: int) -> Dict:
@@ -107,6 +94,14 @@ class ChromeAdapter:
             "amount": amount
         })
         
+    async def capture_full_page(self, capture) -> Dict:
+        """Scroll through the page, streaming viewport tiles into a page_capture.FullPageCapture"""
+        return await self.send_command({
+            "action": "capture_full_page",
+            "cached": capture.cache.keys(),
+            "maxTiles": config.FULL_PAGE_MAX_TILES
+        }, stream=capture.add_tile, timeout=config.FULL_PAGE_TIMEOUT)
+        
     async def navigate(self, url: str) -> Dict:
         """Navigate to URL"""
         return await self.send_command({
@@ -114,6 +109,26 @@ class ChromeAdapter:
             "url": url
         })
         
+    async def dom_snapshot(self) -> Dict:
+        """Visible form fields of the page, each with a unique CSS selector"""
+        return await self.send_command({
+            "action": "dom_snapshot"
+        })
+        
+    async def current_url(self) -> Optional[str]:
+        """URL of the tab commands target, None when the extension cannot tell"""
+        result = await self.send_command({
+            "action": "get_url"
+        })
+        return (result.get("data") or {}).get("url") if result.get("success") else None
+        
+    async def batch(self, steps: List[Dict]) -> Dict:
+        """Run DOM steps ({"op": "fill", "selector", "value"}) in one round trip"""
+        return await self.send_command({
+            "action": "batch",
+            "steps": steps
+        })
+        
     # Bonus tools
     async def switch_tab(self, index: int) -> Dict:
         """Switch to tab by index"""
@@ -152,4 +167,283 @@ class ChromeAdapter:
             "cursor_position": "get_cursor_position"
         }
         
-        return action_map.get(action, action)
\ No newline at end of file
+        return action_map.get(action, action)
+
+
+class ChromeAdapter(BrowserCommands):
+    """Adapter that translates Claude actions to Chrome Extension commands"""
+    
+    def __init__(self):
+        self.websocket: Optional[websockets.WebSocketServerProtocol] = None
+        self.session_token: Optional[str] = None
+        self.last_screenshot: Optional[str] = None
+        self.last_action_result: Optional[Dict] = None
+        
+        # Connection health
+        self.latency_ms: Optional[float] = None
+        self.latency_samples = deque(maxlen=20)
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self._generation = 0  # bumped on every (re)attach
+        
+        # Outbound buffer: commands stay here until the extension acknowledges them
+        self._command_seq = 0
+        self._pending: Dict[int, Dict] = {}
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._screenshots: Dict[int, str] = {}  # screenshots waiting for their action_result
+        self._streams: Dict[int, Callable[[Dict], None]] = {}  # command id -> handler for streamed messages
+        self._frames: Dict[Optional[int], FrameBuffer] = {}  # tab id (None: focused tab) -> last frame
+        
+    def set_websocket(self, websocket):
+        """Set the WebSocket connection to Chrome Extension"""
+        self.websocket = websocket
+        if websocket is None:
+            self._connected.clear()
+        else:
+            self._generation += 1
+            self._connected.set()
+            
+    async def attach(self, websocket, session_token: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Attach a (re)connected extension socket.
+        
+        If the extension presents the current session token, the running task keeps
+        going and every unacknowledged command is replayed on the new socket.
+        Otherwise a new session is started and in-flight commands are failed.
+        """
+        resumed = session_token is not None and session_token == self.session_token
+        if not resumed:
+            self._fail_pending(ConnectionError("Chrome Extension session was replaced"))
+            self.session_token = secrets.token_urlsafe(16)
+            
+        self.set_websocket(websocket)
+        await websocket.send(json.dumps({
+            "type": "session",
+            "session": self.session_token,
+            "resumed": resumed
+        }))
+        
+        if resumed and self._pending:
+            print(f"🔁 Replaying {len(self._pending)} unacknowledged command(s)")
+            for command in list(self._pending.values()):
+                await self._transmit(command)
+                
+        self._start_heartbeat(websocket)
+        return self.session_token, resumed
+        
+    def detach(self, websocket):
+        """Forget a socket that has closed, unless it was already replaced"""
+        if self.websocket is not websocket:
+            return
+        self.set_websocket(None)
+        if self._heartbeat_task:
+            # The heartbeat detaches its own socket on timeout and still has to close it
+            if self._heartbeat_task is not asyncio.current_task():
+                self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+            
+    def _start_heartbeat(self, websocket):
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat(websocket))
+        
+    async def _heartbeat(self, websocket):
+        """Protocol-level ping/pong; drops the socket when pongs stop arriving"""
+        while self.websocket is websocket:
+            await asyncio.sleep(config.HEARTBEAT_INTERVAL)
+            started = time.perf_counter()
+            try:
+                pong_waiter = await websocket.ping()
+                await asyncio.wait_for(pong_waiter, config.HEARTBEAT_TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"💔 No pong within {config.HEARTBEAT_TIMEOUT}s, dropping extension socket")
+                self.detach(websocket)
+                await websocket.close()
+                return
+            except websockets.exceptions.ConnectionClosed:
+                self.detach(websocket)
+                return
+            self.latency_ms = (time.perf_counter() - started) * 1000
+            self.latency_samples.append(self.latency_ms)
+            
+    @property
+    def average_latency_ms(self) -> Optional[float]:
+        """Mean round-trip time over the recent heartbeats"""
+        if not self.latency_samples:
+            return None
+        return sum(self.latency_samples) / len(self.latency_samples)
+        
+    def set_last_screenshot(self, screenshot_data: str, command_id: Optional[int] = None):
+        """Store screenshot received from extension"""
+        self.last_screenshot = screenshot_data
+        if command_id is None:
+            command_id = next(iter(self._futures), None)
+        if command_id in self._futures:
+            self._screenshots[command_id] = screenshot_data
+        
+    def set_last_action_result(self, success: bool, data: Any, command_id: Optional[int] = None,
+                               error: Optional[str] = None):
+        """Store result of last action and acknowledge the matching command"""
+        self.last_action_result = {
+            "success": success,
+            "data": data
+        }
+        if error:
+            self.last_action_result["error"] = error
+            
+        if command_id is None:
+            # Extension did not echo an id, assume it answered the oldest command
+            command_id = next(iter(self._futures), None)
+        screenshot = self._screenshots.pop(command_id, None)
+        if screenshot is not None:
+            self.last_action_result["screenshot"] = screenshot
+        future = self._futures.get(command_id)
+        if future and not future.done():
+            future.set_result(self.last_action_result)
+            
+    def handle_stream_message(self, message: Dict):
+        """Hand a message streamed during a command (e.g. page tiles) to that command's handler"""
+        handler = self._streams.get(message.get("id"))
+        if handler is None:
+            print(f"⚠️ Dropping streamed {message.get('type')} for unknown command #{message.get('id')}")
+            return
+        handler(message)
+        
+    def _fail_pending(self, error: Exception):
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(error)
+                
+    async def _wait_for_connection(self):
+        if self.websocket is not None:
+            return
+        print("⏳ Waiting for Chrome Extension to reconnect...")
+        try:
+            await asyncio.wait_for(self._connected.wait(), config.SESSION_RESUME_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ConnectionError("Chrome Extension not connected")
+            
+    async def _transmit(self, command: Dict):
+        websocket = self.websocket
+        if websocket is None:
+            return  # Stays buffered, replayed on reattach
+        try:
+            await websocket.send(json.dumps(command))
+        except websockets.exceptions.ConnectionClosed:
+            self.detach(websocket)
+        
+    async def send_command(self, command: Dict, stream: Optional[Callable[[Dict], None]] = None,
+                           timeout: Optional[float] = None) -> Dict:
+        """
+        Send command to Chrome Extension and wait for response
+        
+        Messages the extension streams for this command before its result
+        (e.g. page tiles) are passed to `stream`.
+        """
+        timeout = timeout or config.COMMAND_TIMEOUT
+        self._command_seq += 1
+        command_id = self._command_seq
+        command = {**command, "id": command_id}
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = command
+        self._futures[command_id] = future
+        if stream:
+            self._streams[command_id] = stream
+        
+        print(f"📤 Sending to Extension: {command.get('action')} (#{command_id})")
+        
+        try:
+            await self._wait_for_connection()
+            await self._transmit(command)
+            
+            while True:
+                generation = self._generation
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), timeout)
+                except asyncio.TimeoutError:
+                    if self.websocket is not None and generation == self._generation:
+                        print(f"⚠️ Extension did not answer {command.get('action')} in time")
+                        return {}
+                    # The socket dropped mid-command; attach() replays it on resume
+                    await self._wait_for_connection()
+        finally:
+            self._pending.pop(command_id, None)
+            self._futures.pop(command_id, None)
+            self._screenshots.pop(command_id, None)
+            self._streams.pop(command_id, None)
+            
+    def frame_buffer(self, tab_id: Optional[int] = None) -> Optional[FrameBuffer]:
+        if not config.DELTA_SCREENSHOTS:
+            return None
+        return self._frames.setdefault(tab_id, FrameBuffer())
+        
+    # Tabs
+    async def open_tab(self, url: str = "about:blank") -> "TabAdapter":
+        """Open a background tab and return an adapter whose commands target it"""
+        result = await self.send_command({
+            "action": "open_tab",
+            "url": url
+        })
+        if not result.get("success"):
+            raise RuntimeError(f"Could not open tab: {result.get('error', 'no response')}")
+        return TabAdapter(self, result["data"]["tabId"])
+        
+    async def duplicate_tab(self, tab_id: Optional[int] = None) -> "TabAdapter":
+        """Background copy of a tab (the focused one by default), for trying actions out"""
+        result = await self.send_command({
+            "action": "duplicate_tab",
+            "tabId": tab_id
+        })
+        if not result.get("success"):
+            raise RuntimeError(f"Could not duplicate tab: {result.get('error', 'no response')}")
+        return TabAdapter(self, result["data"]["tabId"])
+        
+    async def close_tab(self, tab_id: int) -> Dict:
+        """Close a tab by id"""
+        self._frames.pop(tab_id, None)
+        return await self.send_command({
+            "action": "close_tab",
+            "tabId": tab_id
+        })
+        
+    async def list_tabs(self) -> List[Dict]:
+        """Tabs of the current window: tabId, index, url, title, active"""
+        result = await self.send_command({
+            "action": "list_tabs"
+        })
+        return result.get("data") or []
+        
+    def for_tab(self, tab_id: int) -> "TabAdapter":
+        """Adapter for an existing tab"""
+        return TabAdapter(self, tab_id)
+
+
+class TabAdapter(BrowserCommands):
+    """
+    View of a ChromeAdapter whose commands all target one tab by id, so several
+    tabs can be driven concurrently over the same extension connection
+    """
+    
+    def __init__(self, adapter: ChromeAdapter, tab_id: int):
+        self.adapter = adapter
+        self.tab_id = tab_id
+        self.last_screenshot: Optional[str] = None
+        self.last_action_result: Optional[Dict] = None
+        
+    async def send_command(self, command: Dict, stream: Optional[Callable[[Dict], None]] = None,
+                           timeout: Optional[float] = None) -> Dict:
+        self.last_action_result = await self.adapter.send_command(
+            {**command, "tabId": self.tab_id}, stream=stream, timeout=timeout
+        )
+        return self.last_action_result
+        
+    def frame_buffer(self) -> Optional[FrameBuffer]:
+        return self.adapter.frame_buffer(self.tab_id)
+        
+    async def duplicate_tab(self) -> "TabAdapter":
+        """Background copy of this tab"""
+        return await self.adapter.duplicate_tab(self.tab_id)
+        
+    async def close(self) -> Dict:
+        """Close this tab"""
+        return await self.adapter.close_tab(self.tab_id)
@@ -1,29 +1,79 @@
 
 # Add this at the top of claude_orchestrator.py where the other imports are
 import base64
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, TYPE_CHECKING
 import asyncio  # Make sure asyncio is imported
 import time
 import os
 import json
 import traceback
 
-# Fix PIL imports - make sure to import ImageDraw specifically
-from PIL import Image, ImageDraw, ImageFont
-from io import BytesIO
-import anthropic
 import config
 from chrome_adapter import ChromeAdapter
+from action_history import ActionHistory, ActionRecord, POINTER_ACTIONS
+from coordinates import CoordinateTransform
+from element_index import ElementIndex, describe_click, describe_element
+import intent
+import speculation
+from budget import BudgetExhausted, BudgetTracker, TaskBudget, get_metrics, task_type
+from api_scheduler import (
+    IMAGE_TOKENS, PRIORITY_INTERACTIVE, PRIORITY_PARALLEL, estimate_input_tokens, get_scheduler
+)
+from profiling import get_profiling
+
+# anthropic and the image stack (overlay -> numpy, PIL) are imported on first use,
+# which keeps backend startup fast
+if TYPE_CHECKING:
+    import anthropic
+
+
+AGENT_MODEL = "claude-haiku-4-5"
+AGENT_MAX_TOKENS = 1026
 
     
 
 
+READ_PAGE_TOOL = {
+    "name": "read_page",
+    "description": (
+        "Capture the whole scrollable page at once instead of scrolling through it. "
+        "Without arguments, returns a downscaled overview of the entire page with numbered viewport tiles. "
+        "With `tile`, returns that viewport tile at full resolution. "
+        "Use it to find something on a long page in one step."
+    ),
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "tile": {
+                "type": "integer",
+                "description": "Index of a tile from the last overview"
+            }
+        }
+    }
+}
+
+
+def image_block(data: str) -> Dict:
+    """Base64 JPEG as an API image content block"""
+    return {
+        "type": "image",
+        "source": {
+            "type": "base64",
+            "media_type": "image/jpeg",
+            "data": data
+        }
+    }
+
+
 class ClaudeOrchestrator:
     """Orchestrates Computer Use loop with Claude API"""
     
-    def __init__(self, chrome_adapter: ChromeAdapter):
+    def __init__(self, chrome_adapter: ChromeAdapter, client: Optional["anthropic.AsyncAnthropic"] = None,
+                 debug_prefix: str = "", priority: int = PRIORITY_INTERACTIVE):
         self.chrome_adapter = chrome_adapter
-        self.client = anthropic.Anthropic(api_key=config.ANTHROPIC_API_KEY)
+        self._client = client
+        self.debug_prefix = debug_prefix  # keeps debug images of parallel workers apart
+        self.priority = priority  # place of this orchestrator's API calls in the shared queue
         self.messages: List[Dict] = []
         self.real_width = config.REAL_SCREENSHOT_WIDTH
         self.real_height = config.REAL_SCREENSHOT_HEIGHT
@@ -31,24 +81,78 @@ class ClaudeOrchestrator:
         self.target_height = config.TARGET_SCREENSHOT_HEIGHT
         
         # State tracking
-        self.action_history = []
-        self.last_action_type = None
-        self.repeated_action_count = 0
-        self.visited_urls = set()
-        self.typed_text = []
-        
-    async def execute_task(self, task: str):
-        """Execute a task using Claude Computer Use"""
+        self.history = ActionHistory(config.ACTION_HISTORY_SIZE)
+        self.page_capture = None  # last read_page capture, serves tiles on demand
+        self.elements = ElementIndex()  # descriptors reported by clicks, kept across tasks
+        self.page_position: Optional[tuple] = None  # (url, scroll x, scroll y) of the last click
+        self.last_frame: Optional[str] = None  # previous iteration's screenshot, to notice progress
+        self.last_click_missed = False  # the last click hit nothing interactive
+        
+        # Speculative candidate clicks (speculation.py), opt-in per task
+        self.speculative = False
+        self.speculated_at: Optional[int] = None  # iteration of the last speculative round
+        self.speculation_note: Optional[str] = None  # shown to Claude in the next context message
+        
+        # Deterministic fast paths (intent.py)
+        self.pending_fields: Dict[str, str] = {}  # form values from the task not filled yet
+        self.fill_url: Optional[str] = None  # URL named by the task, pending_fields are only filled on its host
+        self.fill_misses = 0  # snapshots in a row that filled nothing
+        self.fast_paths: Dict[str, int] = {}  # fast path -> times taken
+        self.iterations_saved = 0
+        
+        # Budget accounting of the current task, and a summary of the last one
+        self.tracker: Optional[BudgetTracker] = None
+        self.last_report: Optional[Dict] = None
+        
+    @property
+    def client(self) -> "anthropic.AsyncAnthropic":
+        """API client, created on the first task rather than at startup"""
+        if self._client is None:
+            import anthropic
+            # Async client so API calls don't block extension heartbeats
+            self._client = anthropic.AsyncAnthropic(api_key=config.ANTHROPIC_API_KEY)
+        return self._client
+    
+    async def warmup(self):
+        """Create the API client, open its connection pool and build the image stack ahead of the first task"""
+        started = time.perf_counter()
+        try:
+            await self.client.models.list(limit=1)
+        except Exception as e:
+            print(f"⚠️ API warmup request failed: {e}")
+        from overlay import get_renderer
+        get_renderer()
+        print(f"🔥 Warmup finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+        
+    async def execute_task(self, task: str, budget: Optional[Union[Dict, TaskBudget]] = None,
+                           speculative: Optional[bool] = None) -> Optional[str]:
+        """
+        Execute a task using Claude Computer Use, returns Claude's final message,
+        or a partial result if the task stopped early (budget, stuck, error).
+        `budget` is a dict of overrides of the config limits, or a TaskBudget.
+        With `speculative`, uncertain clicks are tried in background copies of the tab first.
+        """
         print(f"\n{'='*60}")
         print(f"🎯 EXECUTING TASK: {task}")
         print(f"{'='*60}\n")
         
         # Reset state tracking
-        self.action_history = []
-        self.last_action_type = None
-        self.repeated_action_count = 0
-        self.visited_urls = set()
-        self.typed_text = []
+        self.history.clear()
+        self.page_capture = None
+        self.page_position = None
+        self.last_frame = None
+        self.last_click_missed = False
+        self.speculative = config.SPECULATIVE_ACTIONS if speculative is None else bool(speculative)
+        self.speculated_at = None
+        self.speculation_note = None
+        # Values from the task are only filled on the site it names, never on one the agent lands on
+        self.fill_url = intent.find_url(task)
+        self.pending_fields = intent.parse_field_values(task) if self.fill_url else {}
+        self.fill_misses = 0
+        self.fast_paths = {}
+        self.iterations_saved = 0
+        self.tracker = BudgetTracker(budget if isinstance(budget, TaskBudget) else TaskBudget.from_config(budget))
+        profile = get_profiling().profiler.begin()  # None unless the sampling profiler is running
         
         # Initialize conversation with the task
         self.messages = [
@@ -58,28 +162,84 @@ class ClaudeOrchestrator:
             }
         ]
         
-        # Computer Use loop
-        max_iterations = 20
+        # Computer Use loop, until Claude is done or a budget runs out
         iteration = 0
         stuck_counter = 0
+        final_message = None
+        outcome = None  # "completed", or why the task stopped
+        ticket = None  # API capacity reserved ahead of the screenshot
         
-        while iteration < max_iterations:
+        # Open the page the task names directly instead of through the address bar.
+        # A web search only replaces a blank tab, never a page the user has open
+        target = intent.task_navigation_target(task)
+        if target:
+            try:
+                if intent.search_url(task) and not intent.is_blank_page(await self.current_url()):
+                    print("ℹ️ Tab is not blank, leaving the search to Claude")
+                else:
+                    await self.navigate_directly(target, intent.NAVIGATE_ITERATIONS)
+            except ConnectionError as e:
+                print(f"⚠️ Direct navigation failed: {e}")
+        
+        while True:
+            exhausted = self.tracker.exceeded()
+            if exhausted:
+                print(f"⚠️ Task {exhausted} budget exhausted, stopping")
+                outcome = f"budget: {exhausted}"
+                break
+            
             iteration += 1
+            self.tracker.iterations = iteration
             print(f"\n--- Iteration {iteration} ---")
             current_coordinates = []  # Track coordinates for current iteration
             
             try:
+                # A long wait for API capacity happens before the screenshot,
+                # so Claude sees the page as it is when the call goes out
+                ticket = await self.tracker.run_within(self.reserve_api_call())
+                
+                # Fill form fields the task gave values for, once they appear on the page
+                if self.pending_fields:
+                    await self.fill_known_fields()
+                
                 # Get current screenshot
                 print("📸 Taking screenshot...")
                 screenshot = await self.chrome_adapter.get_screenshot()
+                self.tracker.record_screenshot()
                 
                 if not screenshot:
                     print("❌ Failed to get screenshot")
+                    outcome = "error"
+                    break
+                
+                # Repeating an action is only a sign of being stuck while the page stays the same
+                if speculation.frame_change(self.last_frame, screenshot) >= config.PROGRESS_CHANGE:
+                    self.history.mark_progress()
+                self.last_frame = screenshot
+                stuck_counter = self.history.stuck_level()
+                if stuck_counter >= 4:
+                    print("⚠️ Too many stuck cycles, giving up")
+                    outcome = "stuck"
                     break
                 
                 # Save initial screenshot (without coordinates)
                 self.save_debug_image(screenshot, None, iteration)
                 
+                # When unsure, try candidate clicks in background copies of the tab and keep the best
+                if self.should_speculate(iteration):
+                    self.speculated_at = iteration
+                    reserved, ticket = ticket, None
+                    committed = await self.tracker.run_within(self.speculate(task, screenshot, reserved))
+                    if committed:
+                        continue
+                
+                # Optional coordinate grid to help the model place clicks
+                if config.GRID_OVERLAY:
+                    from overlay import get_renderer
+                    screenshot = get_renderer().add_grid(
+                        screenshot, (self.target_width, self.target_height), config.GRID_SPACING
+                    )
+                
                 # Create context-aware message for Claude
                 context_message = self.create_context_message(task, iteration, stuck_counter)
                 
@@ -90,14 +250,7 @@ class ClaudeOrchestrator:
                 screenshot_message = {
                     "role": "user",
                     "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/jpeg",
-                                "data": screenshot
-                            }
-                        },
+                        image_block(screenshot),
                         {
                             "type": "text",
                             "text": context_message
@@ -107,11 +260,15 @@ class ClaudeOrchestrator:
                 
                 # Call Claude API with messages and screenshot
                 current_messages = self.messages.copy() + [screenshot_message]
-                response = await self.call_claude_api(current_messages)
+                # The wall clock budget also bounds a slow API call
+                reserved, ticket = ticket, None  # call_claude_api settles it
+                response = await self.tracker.run_within(self.call_claude_api(current_messages, reserved))
+                self.tracker.record_usage(response.usage, getattr(response, "model", AGENT_MODEL))
                 
                 # Check if task is complete
                 if response.stop_reason == "end_turn":
                     print("\n✅ Task completed!")
+                    outcome = "completed"
                     final_message = self.extract_final_message(response)
                     if final_message:
                         print(f"💬 Claude says: {final_message}")
@@ -124,6 +281,7 @@ class ClaudeOrchestrator:
                 
                 if not tool_uses:
                     print("⚠️ No tool use found in response")
+                    outcome = "no_action"
                     # Still add Claude's response to conversation history
                     self.messages.append({"role": "assistant", "content": response.content})
                     break
@@ -131,7 +289,26 @@ class ClaudeOrchestrator:
                 # Add Claude's response (with tool uses) to conversation history
                 self.messages.append({"role": "assistant", "content": response.content})
                 
-               
+                # Going through the address bar takes several iterations and page scripts
+                # cannot type into it: navigate directly and skip this turn's actions
+                # If the direct navigation fails, the model's own actions run as usual
+                target = self.address_bar_target(response, tool_uses)
+                if target and await self.navigate_directly(
+                    target, max(intent.NAVIGATE_ITERATIONS - len(tool_uses), 0)
+                ):
+                    self.messages.append({
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "tool_result",
+                                "tool_use_id": tool_use.id,
+                                "content": f"Not executed: navigated directly to {target} instead, "
+                                           "the address bar is not needed. Continue from the new screenshot."
+                            }
+                            for tool_use in tool_uses
+                        ]
+                    })
+                    continue
                 
                 # Process and execute each tool use
                 coordinates_used = []
@@ -139,12 +316,19 @@ class ClaudeOrchestrator:
                 
                 for tool_use in tool_uses:
                     # Execute the action
-                    action_result = await self.execute_computer_action(
-                        tool_use.name, tool_use.input, coordinates_used
-                    )
+                    started = time.perf_counter()
+                    if tool_use.name == "read_page":
+                        action_result = await self.read_page(tool_use.input)
+                    else:
+                        action_result = await self.execute_computer_action(
+                            tool_use.name, tool_use.input, coordinates_used
+                        )
                     
                     # Record action in history
-                    self.record_action(tool_use.name, tool_use.input, action_result)
+                    self.record_action(
+                        tool_use.name, tool_use.input, action_result,
+                        started, time.perf_counter() - started
+                    )
                     
                     # Create tool result
                     tool_result = {
@@ -166,33 +350,151 @@ class ClaudeOrchestrator:
                     print(f"🎯 Coordinates used in iteration {iteration}: {coordinates_used}")
                     # Get a fresh screenshot to show the result of actions
                     updated_screenshot = await self.chrome_adapter.get_screenshot()
+                    self.tracker.record_screenshot()
                     if updated_screenshot:
                         self.save_debug_image(updated_screenshot, coordinates_used, iteration)
                 
-                # If we've been stuck for too many iterations, break
-                if stuck_counter >= 4:
-                    print("⚠️ Too many stuck cycles, giving up")
-                    break
+            except BudgetExhausted as e:
+                print(f"⚠️ Task {e.limit} budget exhausted while waiting, stopping")
+                outcome = f"budget: {e.limit}"
+                break
                 
             except Exception as e:
+                outcome = "error"
                 print(f"❌ Error in iteration {iteration}: {e}")
                 import traceback
                 print(traceback.format_exc())
                 
-                # Try to recover from certain errors
-                if "ERR_CONNECTION_REFUSED" in str(e) or "WebSocket" in str(e):
-                    print("⚠️ Connection error, waiting to recover...")
-                    await asyncio.sleep(3)  # Wait for potential reconnection
-                    continue
+                # ChromeAdapter already waited for the extension to resume its session,
+                # a ConnectionError means it did not come back in time
+                if isinstance(e, ConnectionError):
+                    print("⚠️ Chrome Extension did not reconnect, stopping task")
                 
                 break
         
-        if iteration >= max_iterations:
-            print(f"\n⚠️ Reached maximum iterations ({max_iterations})")
+        if ticket is not None:
+            get_scheduler().complete(ticket)  # reserved, but the call never went out
+        
+        if outcome != "completed" and not final_message:
+            final_message = self.partial_result(outcome)
+            
+        summary = self.tracker.summary()
+        get_metrics().record(task_type(task), self.tracker, outcome)
+        self.last_report = {"task_type": task_type(task), "outcome": outcome, **summary}
+        print(
+            f"\n💰 Spent {summary['seconds']:.1f} s, {summary['iterations']} iterations, "
+            f"{summary['input_tokens']} input / {summary['output_tokens']} output tokens, "
+            f"{summary['screenshots']} screenshots, ${summary['cost']:.4f} ({outcome})"
+        )
+            
+        if self.fast_paths:
+            taken = ", ".join(f"{name} x{count}" for name, count in self.fast_paths.items())
+            print(f"\n⚡ Fast paths: {taken}, saved ~{self.iterations_saved} model iterations")
+            
+        profile_path = get_profiling().profiler.end(profile, task)
+        if profile_path:
+            print(f"\n🔬 Profile written to {profile_path}")
             
         print(f"\n{'='*60}")
         print("Task execution finished")
         print(f"{'='*60}\n")
+        return final_message
+    
+    async def execute_parallel_task(self, task: str, budget: Optional[Dict] = None,
+                                    speculative: Optional[bool] = None) -> List[Optional[str]]:
+        """
+        Split a task into independent sub-tasks and run each one in its own
+        background tab, with the Computer Use loops running concurrently.
+        The sub-tasks share the task's budget, less what splitting it cost.
+        """
+        if not hasattr(self.chrome_adapter, "for_tab"):
+            return [await self.execute_task(task, budget, speculative)]
+        
+        tracker = BudgetTracker(TaskBudget.from_config(budget))
+        subtasks = await self.split_task(task, tracker)
+        if len(subtasks) < 2:
+            print("ℹ️ Task has no independent parts, running it in the current tab")
+            return [await self.execute_task(task, tracker.share(1), speculative)]
+        shared = tracker.share(len(subtasks))
+        
+        print(f"\n🔀 Running {len(subtasks)} sub-tasks in parallel tabs:")
+        for i, subtask in enumerate(subtasks, 1):
+            print(f"   {i}. {subtask}")
+        
+        tabs = []
+        try:
+            for _ in subtasks:
+                tabs.append(await self.chrome_adapter.open_tab())
+            workers = [
+                ClaudeOrchestrator(tab, client=self.client, debug_prefix=f"tab{tab.tab_id}_", priority=PRIORITY_PARALLEL)
+                for tab in tabs
+            ]
+            results = await asyncio.gather(
+                *(worker.execute_task(subtask, shared, speculative) for worker, subtask in zip(workers, subtasks)),
+                return_exceptions=True
+            )
+        finally:
+            # Closing a tab also detaches the debugger used to capture it in the background
+            await asyncio.gather(*(tab.close() for tab in tabs), return_exceptions=True)
+        
+        print(f"\n{'='*60}")
+        print("🔀 Parallel results")
+        final_messages = []
+        for subtask, result in zip(subtasks, results):
+            if isinstance(result, Exception):
+                print(f"❌ {subtask}: {result}")
+                final_messages.append(None)
+            else:
+                print(f"✅ {subtask}: {result or 'no final message'}")
+                final_messages.append(result)
+        print(f"{'='*60}\n")
+        return final_messages
+    
+    async def split_task(self, task: str, tracker: Optional[BudgetTracker] = None) -> List[str]:
+        """Ask Claude to split a task into independent sub-tasks (JSON list of strings), charged to `tracker`"""
+        prompt = (
+            "Split the following browser task into independent sub-tasks that can run at the same time "
+            "in separate browser tabs, without depending on each other's results. "
+            f"Use at most {config.MAX_PARALLEL_TABS} sub-tasks, each one a complete instruction. "
+            "If the task cannot be split, return a single sub-task. "
+            "Reply with a JSON array of strings only.\n\n"
+            f"Task: {task}"
+        )
+        try:
+            response = await self.create_message(
+                self.client.messages,
+                model=AGENT_MODEL,
+                max_tokens=1024,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            if tracker is not None:
+                tracker.record_usage(response.usage, getattr(response, "model", AGENT_MODEL))
+            text = self.extract_final_message(response)
+            subtasks = json.loads(text[text.index("["):text.rindex("]") + 1])
+            subtasks = [str(subtask) for subtask in subtasks if str(subtask).strip()]
+            return subtasks[:config.MAX_PARALLEL_TABS] or [task]
+        except Exception as e:
+            print(f"⚠️ Could not split task, running it as one: {e}")
+            return [task]
+    
+    def partial_result(self, outcome: str) -> str:
+        """What a task that stopped early got done: Claude's last note and the last actions"""
+        note = ""
+        for message in reversed(self.messages):
+            if message["role"] == "assistant":
+                note = " ".join(
+                    block.text for block in message["content"]
+                    if getattr(block, "type", None) == "text"
+                ).strip()
+                if note:
+                    break
+        
+        result = f"Task stopped before completion ({outcome})."
+        if note:
+            result += f"\nLast note from Claude: {note}"
+        if len(self.history):
+            result += f"\nLast actions:\n{self.history.render(5)}"
+        return result
     
     def create_context_message(self, task, iteration, stuck_counter):
         """Create a context-rich message for Claude"""
@@ -207,13 +509,13 @@ class ClaudeOrchestrator:
         message += f"This is iteration {iteration}. "
         
         # Add history summary if we have some
-        if self.action_history:
-            message += f"\n\nSo far, you have performed these actions:"
-            
+        if len(self.history):
             # Only include the last 5 actions to avoid making the message too long
-            recent_actions = self.action_history[-5:]
-            for i, action in enumerate(recent_actions):
-                message += f"\n{len(self.action_history) - len(recent_actions) + i + 1}. {action}"
+            message += f"\n\nSo far, you have performed these actions:\n{self.history.render(5)}"
+        
+        if self.speculation_note:
+            message += f"\n\n{self.speculation_note}"
+            self.speculation_note = None
         
         # Add more context if stuck
         if stuck_counter > 0:
@@ -221,13 +523,13 @@ class ClaudeOrchestrator:
             
             if stuck_counter == 1:
                 message += "Try a different approach such as:"
-                message += "\n- Directly navigate to a URL using left_click on the address bar and typing"
+                message += "\n- To open a site directly, type its URL (e.g. 'facebook.com') followed by Enter"
                 message += "\n- If trying to search, make sure to type in the search box and press Enter"
                 message += "\n- Look for alternative UI elements to interact with"
             
             elif stuck_counter >= 2:
                 message += "IMPORTANT: You're still stuck. Try a completely different approach:"
-                message += f"\n- Direct URL navigation: Type 'facebook.com' in the address bar"
+                message += f"\n- Direct URL navigation: type 'facebook.com' followed by Enter"
                 message += f"\n- Use key presses like 'Tab' to move between elements"
                 message += f"\n- Check if you can use browser shortcuts"
                 
@@ -237,61 +539,167 @@ class ClaudeOrchestrator:
         
         return message
     
-    def summarize_actions(self, tool_uses):
-        """Create a summary key of the actions to detect repetition"""
-        if not tool_uses:
-            return "no_action"
-        
-        summary = []
-        for tool_use in tool_uses:
-            if tool_use.name == "computer":
-                action = tool_use.input.get("action", "unknown")
-                
-                if action in ["left_click", "right_click", "mouse_move"]:
-                    coords = tool_use.input.get("coordinate", [0, 0])
-                    # Use approximate coordinates (rounded to nearest 10) to detect similar actions
-                    rounded_x = round(coords[0] / 10) * 10
-                    rounded_y = round(coords[1] / 10) * 10
-                    summary.append(f"{action}_{rounded_x}_{rounded_y}")
-                elif action == "type":
-                    text = tool_use.input.get("text", "")
-                    summary.append(f"type_{len(text)}")
-                else:
-                    summary.append(action)
-        
-        return "_".join(summary)
+    @property
+    def repeated_action_count(self) -> int:
+        """How many times in a row the latest action has been repeated"""
+        return max(self.history.repeat_streak - 1, 0)
     
-    def record_action(self, tool_name, tool_input, result):
+    def record_action(self, tool_name, tool_input, result, started=0.0, duration=0.0):
         """Record action in history for context tracking"""
         if tool_name != "computer":
             return
             
         action = tool_input.get("action", "unknown")
+        model_xy = real_xy = None
+        text = None
         
-        if action == "left_click":
-            coords = tool_input.get("coordinate", [0, 0])
-            self.action_history.append(f"Clicked at ({coords[0]}, {coords[1]})")
-            
-        elif action == "right_click":
-            coords = tool_input.get("coordinate", [0, 0])
-            self.action_history.append(f"Right-clicked at ({coords[0]}, {coords[1]})")
-            
-        elif action == "type":
+        if action in POINTER_ACTIONS and "coordinate" in tool_input:
+            model_xy = tuple(tool_input["coordinate"][:2])
+            real_xy = self._scale(*model_xy)
+        elif action in ("type", "key"):
             text = tool_input.get("text", "")
-            self.action_history.append(f"Typed: '{text}'")
-            self.typed_text.append(text)
-            
-        elif action == "key":
-            key = tool_input.get("text", "")
-            self.action_history.append(f"Pressed key: {key}")
-            
         elif action == "navigate":
-            url = tool_input.get("url", "")
-            self.action_history.append(f"Navigated to: {url}")
-            self.visited_urls.add(url)
+            text = tool_input.get("url", "")
+            
+        self.history.append(ActionRecord(
+            action, model_xy, real_xy, text, str(result), started, duration
+        ))
+    
+    def take_fast_path(self, name: str, saved: int):
+        """Count a fast path and the model iterations it replaced"""
+        self.fast_paths[name] = self.fast_paths.get(name, 0) + 1
+        self.iterations_saved += saved
     
-    async def call_claude_api(self, messages):
+    def address_bar_target(self, response, tool_uses) -> Optional[str]:
+        """URL the model is trying to open through the address bar in this turn"""
+        if any(tool_use.name != "computer" for tool_use in tool_uses):
+            return None
+        text = " ".join(block.text for block in response.content if block.type == "text")
+        return intent.address_bar_target(text, [tool_use.input for tool_use in tool_uses])
+    
+    async def current_url(self) -> Optional[str]:
+        """URL of the tab the task runs in, None if the adapter cannot tell"""
+        if not hasattr(self.chrome_adapter, "current_url"):
+            return None
+        return await self.chrome_adapter.current_url()
+    
+    async def navigate_directly(self, url: str, saved: int) -> bool:
+        """Load a URL without the model driving the address bar, returns whether it worked"""
+        started = time.perf_counter()
+        self.page_position = None
+        result = await self.chrome_adapter.navigate(url)
+        if not result.get("success"):
+            print(f"⚠️ Direct navigation to {url} failed: {result.get('error', 'no response from extension')}")
+            return False
+        print(f"⚡ Navigated directly to {url}")
+        self.history.append(ActionRecord(
+            "navigate", text=url, result="fast path",
+            started=started, duration=time.perf_counter() - started
+        ))
+        self.take_fast_path("navigate", saved)
+        return True
+        
+    async def fill_known_fields(self):
+        """
+        Fill the page's form fields that match values from the task, in one batch command.
+        After FILL_MAX_MISSES snapshots in a row that fill nothing, Claude fills them instead.
+        """
+        if not hasattr(self.chrome_adapter, "dom_snapshot"):
+            self.pending_fields = {}
+            return
+        if await self.fill_matching_fields():
+            self.fill_misses = 0
+            return
+        self.fill_misses += 1
+        if self.fill_misses >= intent.FILL_MAX_MISSES:
+            print(f"ℹ️ No form fields for {', '.join(self.pending_fields)} found, leaving them to Claude")
+            self.pending_fields = {}
+    
+    async def fill_matching_fields(self) -> bool:
+        """One snapshot and batch fill; whether any field was filled"""
+        started = time.perf_counter()
+        snapshot = await self.chrome_adapter.dom_snapshot()
+        page = snapshot.get("data") or {}
+        if not intent.same_host(page.get("url", ""), self.fill_url):
+            return False
+        fields = [field for field in page.get("fields") or [] if not field.get("filled")]
+        # Steps carry the page's host: the page script refuses them if the tab navigated away meanwhile
+        steps = intent.match_form_fields(fields, self.pending_fields, page["url"])
+        if not steps:
+            return False
+        
+        result = await self.chrome_adapter.batch(steps)
+        step_results = (result.get("data") or {}).get("results") or []
+        filled = [step["field"] for step, step_result in zip(steps, step_results) if step_result.get("success")]
+        if not filled:
+            print(f"⚠️ Form fill batch failed: {result.get('error', step_results)}")
+            return False
+        for field in filled:
+            del self.pending_fields[field]
+        print(f"⚡ Filled form fields: {', '.join(filled)}")
+        self.history.append(ActionRecord(
+            "fill_form", text=", ".join(filled), result="fast path",
+            started=started, duration=time.perf_counter() - started
+        ))
+        self.take_fast_path("fill_form", intent.FILL_ITERATIONS_PER_FIELD * len(filled))
+        return True
+    
+    def get_tools(self) -> List[Dict]:
+        """Computer tool, plus read_page when the adapter can capture full pages"""
+        tools = [
+            {
+                "type": "computer_20250124",
+                "name": "computer",
+                "display_width_px": self.target_width,
+                "display_height_px": self.target_height,
+                "display_number": 1,
+            }
+        ]
+        if hasattr(self.chrome_adapter, "capture_full_page"):
+            tools.append(READ_PAGE_TOOL)
+        return tools
+    
+    async def reserve_api_call(self):
+        """
+        Ticket for the next agent call if capacity is more than API_SETTLE_WAIT away
+        (waiting for it), None when the call can simply queue once it is made
+        """
+        scheduler = get_scheduler()
+        estimated_input = estimate_input_tokens(self.messages) + IMAGE_TOKENS
+        wait = scheduler.estimate_wait(estimated_input, AGENT_MAX_TOKENS, self.priority)
+        if wait < config.API_SETTLE_WAIT:
+            return None
+        print(f"⏳ API capacity in ~{wait:.1f} s, letting the page settle before the screenshot")
+        return await scheduler.acquire(estimated_input, AGENT_MAX_TOKENS, self.priority)
+    
+    async def create_message(self, api, ticket=None, **kwargs):
+        """
+        api.create(**kwargs) through the process-wide scheduler, which queues the call
+        by priority and syncs its rate-limit buckets from the response headers
+        """
+        import anthropic
+        
+        scheduler = get_scheduler()
+        if ticket is None:
+            ticket = await scheduler.acquire(
+                estimate_input_tokens(kwargs["messages"]), kwargs["max_tokens"], self.priority
+            )
+        headers = response = None
+        try:
+            raw = await api.with_raw_response.create(**kwargs)
+            headers = raw.headers
+            response = raw.parse()
+            return response
+        except anthropic.APIStatusError as api_error:
+            headers = api_error.response.headers
+            raise
+        finally:
+            scheduler.complete(ticket, headers, getattr(response, "usage", None))
+    
+    async def call_claude_api(self, messages, ticket=None):
         """Call Claude API with proper error handling and retries"""
+        import anthropic
+        
         try:
             # Add exponential backoff for API calls
             max_retries = 3
@@ -301,18 +709,12 @@ class ClaudeOrchestrator:
                 try:
                     # Call Claude API
                     thinking = {"type": "enabled", "budget_tokens": 1025}
-                    response = self.client.beta.messages.create(
-                        model="claude-haiku-4-5",
-                        max_tokens=1026,
-                        tools=[
-                            {
-                                "type": "computer_20250124",
-                                "name": "computer",
-                                "display_width_px": self.target_width,
-                                "display_height_px": self.target_height,
-                                "display_number": 1,
-                            }
-                        ],
+                    response = await self.create_message(
+                        self.client.beta.messages,
+                        ticket,
+                        model=AGENT_MODEL,
+                        max_tokens=AGENT_MAX_TOKENS,
+                        tools=self.get_tools(),
                         messages=messages,
                         betas=["computer-use-2025-01-24"],
                         thinking=thinking
@@ -321,14 +723,16 @@ class ClaudeOrchestrator:
                     return response
                     
                 except anthropic.APIError as api_error:
+                    ticket = None  # spent, a retry queues again
                     # Only retry on certain error types
-                    if retry < max_retries - 1 and (
-                        isinstance(api_error, anthropic.RateLimitError) or
-                        "500" in str(api_error) or "503" in str(api_error)
-                    ):
+                    if retry < max_retries - 1 and isinstance(api_error, anthropic.RateLimitError):
+                        # Pauses every caller in the process, the retry queues behind the pause
+                        pause = get_scheduler().backoff(api_error.response.headers)
+                        print(f"⚠️ Rate limited, API calls paused for {pause:.1f} seconds: {api_error}")
+                    elif retry < max_retries - 1 and ("500" in str(api_error) or "503" in str(api_error)):
                         wait_time = retry_delay * (2 ** retry)
                         print(f"⚠️ API error, retrying in {wait_time} seconds: {api_error}")
-                        time.sleep(wait_time)
+                        await asyncio.sleep(wait_time)
                     else:
                         # Don't retry for client errors like 400
                         print(f"❌ API error: {api_error}")
@@ -340,6 +744,47 @@ class ClaudeOrchestrator:
             print(traceback.format_exc())
             raise
     
+    async def read_page(self, tool_input) -> Any:
+        """
+        read_page tool: a downscaled overview of the whole page, or one
+        full-resolution viewport tile from the last capture
+        """
+        from page_capture import FullPageCapture, get_tile_cache
+        
+        tile = tool_input.get("tile")
+        if tile is None or self.page_capture is None:
+            capture = FullPageCapture(get_tile_cache())
+            result = await self.chrome_adapter.capture_full_page(capture)
+            if not result.get("success"):
+                return f"Full-page capture failed: {result.get('error', 'no response from extension')}"
+            self.page_capture = capture
+            
+        capture = self.page_capture
+        if tile is None:
+            overview = capture.overview_base64()
+            if overview is None:
+                return "Full-page capture returned no tiles"
+            return [
+                {
+                    "type": "text",
+                    "text": f"{capture.describe()} This is a downscaled overview; "
+                            "call read_page with tile=N to see a tile at full resolution."
+                },
+                image_block(overview)
+            ]
+            
+        data = capture.tile_base64(int(tile))
+        if data is None:
+            return f"Tile {tile} is not available, call read_page without a tile to capture the page again"
+        return [
+            {
+                "type": "text",
+                "text": f"Tile {tile} of {capture.tile_count}, page offset {capture.tile_offsets[int(tile)]}px. "
+                        "Coordinates in this tile are not screen coordinates; scroll before clicking."
+            },
+            image_block(data)
+        ]
+    
     async def execute_computer_action(self, tool_name, tool_input, coordinates_list=None):
         """Execute a computer action and track coordinates"""
         
@@ -378,6 +823,9 @@ class ClaudeOrchestrator:
                 model_x, model_y = tool_input.get("coordinate", [0, 0])
                 real_x, real_y = self.scale_coordinates(model_x, model_y)
                 await self.chrome_adapter.mouse_move(real_x, real_y)
+                hovered = self.element_at(real_x, real_y)
+                if hovered:
+                    return f"Moved mouse to ({real_x}, {real_y}), over {describe_element(hovered)}"
                 return f"Moved mouse to ({real_x}, {real_y})"
                 
             elif action == "left_click":
@@ -409,14 +857,14 @@ class ClaudeOrchestrator:
                 
             elif action == "key":
                 key = tool_input.get("text", "")
+                self.page_position = None  # keys may scroll or navigate
                 await self.chrome_adapter.key_press(key)
                 return f"Pressed key: {key}"
             
             elif action == "navigate":
-                url = tool_input.get("url", "")
                 # Ensure URL has protocol
-                if not url.startswith(("http://", "https://")):
-                    url = "https://" + url
+                url = intent.normalize_url(tool_input.get("url", ""))
+                self.page_position = None
                 await self.chrome_adapter.navigate(url)
                 return f"Navigated to: {url}"
                 
@@ -448,34 +896,183 @@ class ClaudeOrchestrator:
                         x + offset[0], y + offset[1], button
                     )
                     if retry_result.get("success", False):
-                        return f"Clicked at ({x + offset[0]}, {y + offset[1]}) after retry with offset"
+                        data = self.remember_click(retry_result)
+                        return f"{describe_click(x + offset[0], y + offset[1], data)} (after retry with offset)"
                 
                 return f"Click attempt failed at ({x}, {y})"
             
             # Check if clicked element was actually interactable
-            element_info = result.get("data", {}).get("elementInfo", {})
-            element_tag = element_info.get("clicked", {}).get("tag", "").lower()
-            is_clickable = element_info.get("clicked", {}).get("isClickable", False)
+            data = self.remember_click(result)
+            element = (data or {}).get("element") or {}
+            is_clickable = element.get("clickable", False)
+            self.last_click_missed = not is_clickable
             
             # If we clicked on a non-interactable element, log warning
             if not is_clickable:
-                print(f"⚠️ Clicked on non-interactable element: {element_tag}")
+                print(f"⚠️ Clicked on non-interactable element: {element.get('tag', '')}")
                 if self.repeated_action_count >= 1:
                     # After repeated non-interactable clicks, try pressing Tab
                     print("🔄 Pressing Tab to focus on next interactive element")
                     await self.chrome_adapter.key_press("Tab")
-                    return f"Clicked at ({x}, {y}) on non-interactable element, followed by Tab key"
+                    self.page_position = None
+                    return f"{describe_click(x, y, data)} Pressed Tab to move to the next interactive element."
             
-            return f"Clicked at ({x}, {y})"
+            return describe_click(x, y, data)
             
         except Exception as e:
             print(f"❌ Enhanced click error: {e}")
             return f"Error during click operation: {str(e)}"
     
+    def should_speculate(self, iteration: int) -> bool:
+        """Speculate when opted in and unsure: repeating actions, or the last click hit nothing interactive"""
+        return (
+            self.speculative
+            and hasattr(self.chrome_adapter, "duplicate_tab")
+            and self.speculated_at != iteration - 1
+            and (self.history.stuck_level() >= 1 or self.last_click_missed)
+        )
+    
+    async def speculate(self, task: str, screenshot: str, ticket=None) -> bool:
+        """
+        Ask Claude for several candidate clicks in one call, try them concurrently in background
+        copies of the tab, and repeat the best one here. False when no candidate did anything.
+        """
+        try:
+            response = await self.create_message(
+                self.client.messages,
+                ticket,
+                model=AGENT_MODEL,
+                max_tokens=1024,
+                tools=[speculation.PROPOSE_TOOL],
+                tool_choice={"type": "tool", "name": speculation.PROPOSE_TOOL["name"]},
+                messages=[{"role": "user", "content": [
+                    image_block(screenshot),
+                    {"type": "text", "text": speculation.proposal_prompt(
+                        task, self.history.render(5), config.SPECULATIVE_CANDIDATES
+                    )}
+                ]}]
+            )
+            self.tracker.record_usage(response.usage, AGENT_MODEL)
+            goal, candidates = speculation.parse_proposal(
+                response, config.SPECULATIVE_CANDIDATES, (self.target_width, self.target_height)
+            )
+            if not candidates:
+                return False
+            
+            print(f"🔮 Trying {len(candidates)} candidate clicks in background tabs for: {goal}")
+            trials = await asyncio.gather(*(self.try_candidate(c) for c in candidates), return_exceptions=True)
+            for trial in trials:
+                if isinstance(trial, Exception):
+                    print(f"⚠️ Candidate click failed: {trial}")
+            trials = [trial for trial in trials if not isinstance(trial, Exception)]
+            for trial in trials:
+                trial["score"] = speculation.score(trial, goal)
+                print(f"   {trial['candidate']['coordinate']}: score {trial['score']:.2f}")
+            viable = sorted(
+                (trial for trial in trials if trial["score"] >= speculation.MIN_SCORE),
+                key=lambda trial: trial["score"], reverse=True
+            )
+            if not viable:
+                print("🔮 No candidate click did anything, asking Claude as usual")
+                return False
+            best = viable[0]
+            if config.SPECULATIVE_VERIFY and len(viable) > 1:
+                best = await self.verify_candidates(goal, viable)
+        except Exception as e:
+            print(f"⚠️ Speculation failed, asking Claude as usual: {e}")
+            return False
+        
+        # Commit the winner in the real tab
+        started = time.perf_counter()
+        tool_input = {"action": "left_click", "coordinate": list(best["candidate"]["coordinate"])}
+        result = await self.enhanced_click(*self._scale(*best["candidate"]["coordinate"]))
+        self.record_action("computer", tool_input, result, started, time.perf_counter() - started)
+        self.speculation_note = (
+            f"Speculative mode tried {len(trials)} candidate clicks in background copies of this tab "
+            f"for \"{goal}\" and kept the best one: {result}"
+        )
+        print(f"🔮 Committed {best['candidate']['coordinate']}: {result}")
+        return True
+    
+    async def try_candidate(self, candidate: Dict) -> Dict:
+        """Click a candidate in a background copy of the tab, with the frames before and after"""
+        clone = await self.chrome_adapter.duplicate_tab()
+        try:
+            before = await clone.get_screenshot()
+            self.tracker.record_screenshot()
+            result = await clone.click(*self._scale(*candidate["coordinate"]))
+            await asyncio.sleep(config.SPECULATIVE_SETTLE)
+            after = await clone.get_screenshot()
+            self.tracker.record_screenshot()
+        finally:
+            await clone.close()
+        
+        data = result.get("data") or {}
+        if data.get("url") and data.get("element"):
+            self.elements.add(data["url"], data["element"])
+        return {
+            "candidate": candidate,
+            "result": result,
+            "frame": after,
+            "change": speculation.frame_change(before, after)
+        }
+    
+    async def verify_candidates(self, goal: str, trials: List[Dict]) -> Dict:
+        """Let Claude pick the resulting frame that best achieves the goal, trials are best first"""
+        content = [{"type": "text", "text": f"Goal: {goal}\nEach image shows the page after one candidate click."}]
+        for index, trial in enumerate(trials):
+            x, y = trial["candidate"]["coordinate"]
+            content.append({"type": "text", "text": f"Result {index}: {describe_click(x, y, trial['result'].get('data'))}"})
+            if trial["frame"]:
+                content.append(image_block(trial["frame"]))
+        content.append({"type": "text", "text": "Which result best achieves the goal?"})
+        
+        response = await self.create_message(
+            self.client.messages,
+            model=AGENT_MODEL,
+            max_tokens=256,
+            tools=[speculation.CHOOSE_TOOL],
+            tool_choice={"type": "tool", "name": speculation.CHOOSE_TOOL["name"]},
+            messages=[{"role": "user", "content": content}]
+        )
+        self.tracker.record_usage(response.usage, AGENT_MODEL)
+        choice = speculation.parse_choice(response, len(trials))
+        return trials[0] if choice is None else trials[choice]
+    
+    def remember_click(self, result: Dict) -> Optional[Dict]:
+        """Cache the descriptors a click reported and where the page was, returns the click data"""
+        data = result.get("data")
+        if not isinstance(data, dict) or not data.get("url"):
+            return None
+        for element in (data.get("element"), data.get("focus")):
+            if element:
+                self.elements.add(data["url"], element)
+        scroll = data.get("scroll") or {}
+        if data.get("navigatedTo"):
+            self.page_position = None
+        else:
+            self.page_position = (data["url"], scroll.get("x", 0), scroll.get("y", 0))
+        return data
+    
+    def element_at(self, x: int, y: int) -> Optional[Dict]:
+        """Cached element under a viewport point, when we know which page is showing"""
+        if self.page_position is None:
+            return None
+        url, scroll_x, scroll_y = self.page_position
+        return self.elements.at(url, x + scroll_x, y + scroll_y)
+    
+    @property
+    def transform(self) -> CoordinateTransform:
+        """Model screenshot space to the viewport (CSS pixels)"""
+        return CoordinateTransform((self.target_width, self.target_height), (self.real_width, self.real_height))
+    
+    def _scale(self, x: int, y: int) -> tuple:
+        """Model resolution to real screen resolution, without logging"""
+        return self.transform.model_to_viewport(x, y)
+    
     def scale_coordinates(self, x: int, y: int) -> tuple:
         """Scale coordinates from model resolution to real screen resolution"""
-        real_x = int(x * (self.real_width / self.target_width))
-        real_y = int(y * (self.real_height / self.target_height))
+        real_x, real_y = self._scale(x, y)
         
         print(f"🔍 Scaling coordinates: ({x},{y}) → ({real_x},{real_y})")
         return (real_x, real_y)
@@ -501,52 +1098,41 @@ class ClaudeOrchestrator:
             debug_dir = os.path.join(os.path.dirname(__file__), "debug")
             os.makedirs(debug_dir, exist_ok=True)
             
-            # Decode base64 image
-            image_data = base64.b64decode(screenshot_base64)
-            image = Image.open(BytesIO(image_data))
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            filename = os.path.join(debug_dir, f"{self.debug_prefix}iter_{iteration:02d}_{timestamp}.jpg")
             
-            # Draw coordinates on image if provided
-            if coordinates and len(coordinates) > 0:
-                draw = ImageDraw.Draw(image)
-                
-                # Try to load a font, use default if not available
-                try:
-                    font = ImageFont.truetype("arial.ttf", 20)
-                except IOError:
-                    font = ImageFont.load_default()
-                
-                # Draw each coordinate
-                for i, (x, y) in enumerate(coordinates):
-                    # Draw a red circle at the coordinate
-                    draw.ellipse((x-10, y-10, x+10, y+10), outline=(255, 0, 0), width=3)
-                    
-                    # Draw a cross at the coordinate
-                    draw.line((x-15, y, x+15, y), fill=(255, 0, 0), width=3)
-                    draw.line((x, y-15, x, y+15), fill=(255, 0, 0), width=3)
-                    
-                    # Calculate scaled coordinates
-                    real_x, real_y = self.scale_coordinates(x, y)
-                    
-                    # Add text label with both original and scaled coordinates
-                    draw.text((x+15, y+15), f"Claude: ({x}, {y})\nScaled: ({real_x}, {real_y})", 
-                            fill=(255, 0, 0), font=font)
+            if not coordinates:
+                # Nothing to draw, write the JPEG we received as-is
+                with open(filename, "wb") as f:
+                    f.write(base64.b64decode(screenshot_base64))
+                print(f"✅ Debug image saved: {filename}")
+                return
             
-            # Save the image
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join(debug_dir, f"iter_{iteration:02d}_{timestamp}.jpg")
-            image.save(filename, "JPEG", quality=95)
+            # Scale each coordinate once for both the labels and the text file
+            scaled = [self._scale(x, y) for x, y in coordinates]
+            labels = [
+                f"Claude: ({x}, {y})\nScaled: ({real_x}, {real_y})"
+                for (x, y), (real_x, real_y) in zip(coordinates, scaled)
+            ]
+            
+            from overlay import get_renderer
+            renderer = get_renderer()
+            frame = renderer.decode(screenshot_base64)
+            # The frame is in device pixels, markers go where the clicks landed
+            transform = self.transform.with_frame_width(frame.shape[1])
+            renderer.draw_markers(frame, [transform.model_to_frame(x, y) for x, y in coordinates], labels)
+            with open(filename, "wb") as f:
+                f.write(renderer.encode_jpeg(frame, quality=95))
             print(f"✅ Debug image saved: {filename}")
             
             # Save coordinates to text file
-            if coordinates and len(coordinates) > 0:
-                coords_file = os.path.join(debug_dir, f"iter_{iteration:02d}_{timestamp}_coords.txt")
-                with open(coords_file, "w") as f:
-                    for i, (x, y) in enumerate(coordinates):
-                        real_x, real_y = self.scale_coordinates(x, y)
-                        f.write(f"Coordinate {i+1}: Claude: ({x}, {y}) → Scaled: ({real_x}, {real_y})\n")
-                print(f"✅ Coordinates saved: {coords_file}")
+            coords_file = os.path.join(debug_dir, f"{self.debug_prefix}iter_{iteration:02d}_{timestamp}_coords.txt")
+            with open(coords_file, "w") as f:
+                for i, ((x, y), (real_x, real_y)) in enumerate(zip(coordinates, scaled)):
+                    f.write(f"Coordinate {i+1}: Claude: ({x}, {y}) → Scaled: ({real_x}, {real_y})\n")
+            print(f"✅ Coordinates saved: {coords_file}")
                 
         except Exception as e:
             print(f"❌ Error saving debug image: {e}")
             import traceback
-            print(traceback.format_exc())
\ No newline at end of file
+            print(traceback.format_exc())
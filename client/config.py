@@ -17,6 +17,16 @@ CLAUDE_MODEL = "claude-sonnet-4.5-20250929"
 WEBSOCKET_HOST = "localhost"
 WEBSOCKET_PORT = 8765
 
+# Connection resilience
+HEARTBEAT_INTERVAL = 10  # seconds between protocol-level pings
+HEARTBEAT_TIMEOUT = 5  # seconds to wait for a pong before dropping the socket
+SESSION_RESUME_TIMEOUT = 30  # seconds a task waits for the extension to reattach
+COMMAND_TIMEOUT = 10  # seconds to wait for an action result
+
+# Headless backend (python main.py --headless "task")
+CHROMIUM_PATH = os.environ.get("CHROMIUM_PATH")  # auto-detected from PATH when unset
+CHROMIUM_LAUNCH_TIMEOUT = 15  # seconds
+
 # Computer Use Configuration
 MAX_TOKENS = 4096
 # Screenshot dimensions
@@ -25,6 +35,63 @@ REAL_SCREENSHOT_HEIGHT = 797  # Actual browser height
 TARGET_SCREENSHOT_WIDTH = 1024  # What Claude expects
 TARGET_SCREENSHOT_HEIGHT = 768  # What Claude expects
 
+# Full-page capture (read_page tool)
+FULL_PAGE_MAX_TILES = 20  # viewport tiles per capture
+FULL_PAGE_TIMEOUT = 60  # seconds, visible tabs can only be captured twice per second
+FULL_PAGE_OVERVIEW_WIDTH = 512
+FULL_PAGE_MAX_OVERVIEW_HEIGHT = 1568  # the API downscales images with a longer edge anyway
+FULL_PAGE_CACHE_BYTES = 32 * 1024 * 1024
+
+# Delta screenshots: the extension only sends the blocks that changed since the last frame
+DELTA_SCREENSHOTS = True
+DELTA_JPEG_QUALITY = 75  # re-encoding quality of a patched frame
+
+# Per-task budget (a task message may override these with a "budget" object); None disables a limit
+TASK_MAX_SECONDS = 300
+TASK_MAX_ITERATIONS = 20
+TASK_MAX_INPUT_TOKENS = 500_000
+TASK_MAX_OUTPUT_TOKENS = 50_000
+TASK_MAX_SCREENSHOTS = 60
+TASK_MAX_COST = 1.00  # USD
+
+# API rate limits, shared by every task in the process. None until learned from the
+# anthropic-ratelimit-* response headers; set them to throttle from the first call
+API_REQUESTS_PER_MINUTE = None
+API_INPUT_TOKENS_PER_MINUTE = None
+API_OUTPUT_TOKENS_PER_MINUTE = None
+API_DEFAULT_BACKOFF = 5  # seconds to pause after a 429 without retry-after
+API_SETTLE_WAIT = 1.0  # seconds; on longer waits for capacity, take the screenshot after waiting
+
+# Actions kept for context and loop detection (older ones are dropped)
+ACTION_HISTORY_SIZE = 50
+PROGRESS_CHANGE = 0.5  # mean pixel change between iterations that counts as progress (a blinking caret does not)
+
+# Element descriptors reported by clicks, cached per URL for point lookups
+ELEMENT_INDEX_CELL = 200  # CSS pixels per grid cell
+ELEMENT_INDEX_PAGES = 20  # URLs kept
+
+# Parallel mode: independent sub-tasks run concurrently, one background tab each
+MAX_PARALLEL_TABS = 4
+
+# Speculative mode: when unsure, candidate clicks are tried in background copies of the tab and
+# only the best one is repeated. Only for tasks where clicking around is harmless (no purchases, posts)
+SPECULATIVE_ACTIONS = False  # default for task messages without "speculative"
+SPECULATIVE_CANDIDATES = 3
+SPECULATIVE_SETTLE = 1.0  # seconds a copy gets to react before its result is captured
+SPECULATIVE_VERIFY = True  # let Claude pick among several candidates that did something
+
+# Faint coordinate grid drawn onto frames sent to Claude, to help it place clicks
+GRID_OVERLAY = False
+GRID_SPACING = 100  # in model (target) pixels
+
+# Profiling: the lag monitor stays on; the sampling profiler is started with a "profile" message
+LOOP_MONITOR = True  # event-loop lag monitor
+SLOW_CALLBACK_LOG = False  # opt-in: times every callback by patching asyncio internals process-wide
+LOOP_LAG_INTERVAL = 0.25  # seconds between lag probes
+LOOP_LAG_WARN_MS = 100
+SLOW_CALLBACK_MS = 50  # callbacks blocking the loop longer than this are logged
+PROFILE_SAMPLE_INTERVAL = 0.01  # seconds between stack samples (100 Hz)
+
 
 # Logging
 DEBUG = True
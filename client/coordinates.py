@@ -0,0 +1,84 @@
+"""
+Coordinates - Mapping between the model's screenshot space, the viewport and captured frames
+Model space is what Claude sees (TARGET_SCREENSHOT_*), the viewport is CSS pixels (where clicks land),
+frames are device pixels (CSS * devicePixelRatio, what captureVisibleTab returns)
+"""
+from typing import Optional, Tuple
+
+
+class CoordinateTransform:
+    """
+    Maps model coordinates onto a region of the viewport. The region defaults to the whole
+    viewport; a smaller one is a crop/zoom of it (or, for full-page capture, a window of the page).
+    """
+
+    def __init__(self, model_size: Tuple[int, int], viewport_size: Tuple[int, int], dpr: float = 1.0,
+                 region: Optional[Tuple[float, float, float, float]] = None):
+        self.model_width, self.model_height = model_size
+        self.viewport_width, self.viewport_height = viewport_size
+        self.dpr = dpr
+        # left, top, width, height in viewport CSS pixels
+        self.region = region or (0, 0, self.viewport_width, self.viewport_height)
+
+    @property
+    def scale_x(self) -> float:
+        """Viewport pixels per model pixel"""
+        return self.region[2] / self.model_width
+
+    @property
+    def scale_y(self) -> float:
+        return self.region[3] / self.model_height
+
+    def model_to_viewport(self, x: float, y: float) -> Tuple[int, int]:
+        """Model point to the nearest viewport pixel, clamped to the viewport"""
+        left, top = self.region[:2]
+        real_x = round(left + x * self.scale_x)
+        real_y = round(top + y * self.scale_y)
+        return (
+            min(max(real_x, 0), self.viewport_width - 1),
+            min(max(real_y, 0), self.viewport_height - 1),
+        )
+
+    def viewport_to_model(self, x: float, y: float) -> Tuple[int, int]:
+        """Viewport point to the nearest model pixel (may fall outside a cropped region)"""
+        left, top = self.region[:2]
+        return round((x - left) / self.scale_x), round((y - top) / self.scale_y)
+
+    def viewport_to_frame(self, x: float, y: float) -> Tuple[int, int]:
+        """Viewport CSS pixel to the device pixel of a captured frame"""
+        return round(x * self.dpr), round(y * self.dpr)
+
+    def frame_to_viewport(self, x: float, y: float) -> Tuple[int, int]:
+        return round(x / self.dpr), round(y / self.dpr)
+
+    def model_to_frame(self, x: float, y: float) -> Tuple[int, int]:
+        """Where a model point lands on a captured frame, e.g. for debug markers (clamped like clicks)"""
+        left, top = self.region[:2]
+        real_x = min(max(left + x * self.scale_x, 0), self.viewport_width - 1)
+        real_y = min(max(top + y * self.scale_y, 0), self.viewport_height - 1)
+        return round(real_x * self.dpr), round(real_y * self.dpr)
+
+    def crop(self, region: Tuple[float, float, float, float],
+             model_size: Optional[Tuple[int, int]] = None) -> "CoordinateTransform":
+        """
+        Transform for a zoomed view of `region` (left, top, width, height in this transform's
+        model pixels), shown to the model at `model_size` (defaults to the same model size)
+        """
+        left, top, width, height = region
+        base_left, base_top = self.region[:2]
+        return CoordinateTransform(
+            model_size or (self.model_width, self.model_height),
+            (self.viewport_width, self.viewport_height),
+            self.dpr,
+            (base_left + left * self.scale_x, base_top + top * self.scale_y,
+             width * self.scale_x, height * self.scale_y),
+        )
+
+    def with_frame_width(self, frame_width: int) -> "CoordinateTransform":
+        """Same mapping, with the device pixel ratio taken from a captured frame's width"""
+        return CoordinateTransform(
+            (self.model_width, self.model_height),
+            (self.viewport_width, self.viewport_height),
+            frame_width / self.viewport_width,
+            self.region,
+        )
@@ -0,0 +1,94 @@
+"""
+Element Index - Element descriptors reported by clicks, cached per URL in a spatial grid
+Lets the orchestrator tell the model what is under a point without another screenshot or DOM call
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+
+def describe_element(element: Dict) -> str:
+    """Short text for the model, e.g. link "Sign in" -> https://example.com/login"""
+    text = f"{element.get('role') or element.get('tag', 'element')}"
+    if element.get("text"):
+        text += f' "{element["text"]}"'
+    if element.get("href"):
+        text += f" -> {element['href']}"
+    return text
+
+
+def describe_click(x: int, y: int, data: Optional[Dict]) -> str:
+    """Tool result for a click: what was hit, where focus went, whether a navigation started"""
+    if not data or not data.get("element"):
+        return f"Clicked at ({x}, {y})"
+    element = data["element"]
+    result = f"Clicked at ({x}, {y}) on {describe_element(element)}"
+    if not element.get("clickable", True):
+        result += " (not interactive)"
+    result += "."
+    if data.get("navigatedTo"):
+        result += f" Navigating to {data['navigatedTo']}."
+    focus = data.get("focus")
+    if focus and focus.get("rect") != element.get("rect"):
+        result += f" Focus: {describe_element(focus)}."
+    elif focus:
+        result += " It has focus."
+    return result
+
+
+class ElementIndex:
+    """
+    Descriptors per URL (LRU of pages), bucketed by the grid cells their page-coordinate
+    rect overlaps, so a point lookup only checks the elements of one cell
+    """
+
+    def __init__(self, cell_size: int = config.ELEMENT_INDEX_CELL, max_pages: int = config.ELEMENT_INDEX_PAGES):
+        self.cell_size = cell_size
+        self.max_pages = max_pages
+        self._pages: "OrderedDict[str, Dict[Tuple[int, int], List[Dict]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def clear(self):
+        self._pages.clear()
+
+    def _cells(self, rect: Dict):
+        size = self.cell_size
+        for cell_x in range(rect["x"] // size, (rect["x"] + max(rect["width"], 1) - 1) // size + 1):
+            for cell_y in range(rect["y"] // size, (rect["y"] + max(rect["height"], 1) - 1) // size + 1):
+                yield cell_x, cell_y
+
+    def add(self, url: str, element: Dict):
+        """Cache a descriptor (rect in page CSS pixels), replacing one with the same rect"""
+        rect = element.get("rect")
+        if not url or not rect:
+            return
+        page = self._pages.get(url)
+        if page is None:
+            page = self._pages[url] = {}
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        self._pages.move_to_end(url)
+
+        for cell in self._cells(rect):
+            bucket = page.setdefault(cell, [])
+            bucket[:] = [cached for cached in bucket if cached["rect"] != rect]
+            bucket.append(element)
+
+    def at(self, url: str, x: float, y: float) -> Optional[Dict]:
+        """Smallest cached element containing the page point, if any"""
+        page = self._pages.get(url)
+        if page is None:
+            return None
+        bucket = page.get((int(x) // self.cell_size, int(y) // self.cell_size), ())
+        hits = [
+            element for element in bucket
+            if element["rect"]["x"] <= x < element["rect"]["x"] + element["rect"]["width"]
+            and element["rect"]["y"] <= y < element["rect"]["y"] + element["rect"]["height"]
+        ]
+        if not hits:
+            return None
+        self._pages.move_to_end(url)
+        return min(hits, key=lambda element: element["rect"]["width"] * element["rect"]["height"])
@@ -0,0 +1,72 @@
+"""
+Frame Buffer - The last screenshot of a tab, patched in place from delta frames
+The extension hashes blocks of every capture and, when the backend still holds its previous
+frame, only sends the regions that changed (see sendFrame in background.js)
+"""
+from typing import Dict, Optional
+
+import config
+
+
+class FrameBuffer:
+    """
+    Keyframes are kept as the JPEG the extension sent and only decoded when the first delta
+    arrives; from then on the (H, W, 3) pixel buffer is patched in place and re-encoded once
+    per screenshot
+    """
+
+    def __init__(self):
+        self.frame_id: Optional[str] = None  # the extension's id of the frame we hold
+        self.pixels = None  # np.ndarray, decoded lazily
+        self._encoded: Optional[str] = None  # base64 JPEG of the current pixels
+        self.keyframes = 0
+        self.deltas = 0
+        self.bytes_received = 0
+
+    def reset(self):
+        self.frame_id = None
+        self.pixels = None
+        self._encoded = None
+
+    def receive(self, message: Dict):
+        """Stream handler for the extension's "frame" messages (a keyframe or a delta)"""
+        if message.get("data") is not None:
+            self.set_keyframe(message["data"], message.get("frame"))
+        elif self.frame_id is not None and message.get("base") == self.frame_id:
+            self.apply_delta(message)
+        else:
+            # Patching any other frame than the delta's base would corrupt the buffer
+            print(f"⚠️ Delta frame against {message.get('base')}, we hold {self.frame_id}; dropping it")
+            self.reset()
+
+    def set_keyframe(self, data: str, frame_id: Optional[str]):
+        self.frame_id = frame_id
+        self.pixels = None
+        self._encoded = data
+        self.keyframes += 1
+        self.bytes_received += len(data)
+
+    def apply_delta(self, message: Dict):
+        from overlay import get_renderer  # numpy/PIL, only once deltas arrive
+        renderer = get_renderer()
+        if self.pixels is None:
+            self.pixels = renderer.decode(self._encoded)
+        for tile in message.get("tiles", []):
+            patch = renderer.decode(tile["data"])
+            region = self.pixels[tile["y"]:tile["y"] + patch.shape[0], tile["x"]:tile["x"] + patch.shape[1]]
+            region[:] = patch[:region.shape[0], :region.shape[1]]
+            self.bytes_received += len(tile["data"])
+        self.frame_id = message.get("frame")
+        self._encoded = None
+        self.deltas += 1
+        print(f"🧩 Delta frame: {len(message.get('tiles', []))} region(s) patched")
+
+    def screenshot(self) -> Optional[str]:
+        """Current frame as base64 JPEG, None when we hold no frame"""
+        if self._encoded is None and self.pixels is not None:
+            from overlay import get_renderer
+            self._encoded = get_renderer().encode_base64(self.pixels, config.DELTA_JPEG_QUALITY)
+        return self._encoded
+
+    def stats(self) -> Dict:
+        return {"keyframes": self.keyframes, "deltas": self.deltas, "bytes_received": self.bytes_received}
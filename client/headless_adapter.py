@@ -0,0 +1,525 @@
+"""
+Headless Adapter - Drives a local headless Chromium over the Chrome DevTools Protocol
+Exposes the same methods as ChromeAdapter, so the orchestrator can run without the extension
+"""
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Optional, Dict, Any, List
+import websockets
+
+import config
+
+
+CHROMIUM_EXECUTABLES = (
+    "chromium",
+    "chromium-browser",
+    "google-chrome",
+    "google-chrome-stable",
+    "chrome",
+    "headless_shell",
+)
+
+# DOM key definitions for Input.dispatchKeyEvent
+KEY_DEFINITIONS = {
+    "Enter": {"code": "Enter", "windowsVirtualKeyCode": 13, "text": "\r"},
+    "Tab": {"code": "Tab", "windowsVirtualKeyCode": 9},
+    "Backspace": {"code": "Backspace", "windowsVirtualKeyCode": 8},
+    "Escape": {"code": "Escape", "windowsVirtualKeyCode": 27},
+    "Delete": {"code": "Delete", "windowsVirtualKeyCode": 46},
+    "ArrowUp": {"code": "ArrowUp", "windowsVirtualKeyCode": 38},
+    "ArrowDown": {"code": "ArrowDown", "windowsVirtualKeyCode": 40},
+    "ArrowLeft": {"code": "ArrowLeft", "windowsVirtualKeyCode": 37},
+    "ArrowRight": {"code": "ArrowRight", "windowsVirtualKeyCode": 39},
+    "Home": {"code": "Home", "windowsVirtualKeyCode": 36},
+    "End": {"code": "End", "windowsVirtualKeyCode": 35},
+    "PageUp": {"code": "PageUp", "windowsVirtualKeyCode": 33},
+    "PageDown": {"code": "PageDown", "windowsVirtualKeyCode": 34},
+    " ": {"code": "Space", "windowsVirtualKeyCode": 32, "text": " "},
+}
+
+# xdotool-style names emitted by the computer tool
+KEY_ALIASES = {
+    "Return": "Enter",
+    "KP_Enter": "Enter",
+    "BackSpace": "Backspace",
+    "Esc": "Escape",
+    "Up": "ArrowUp",
+    "Down": "ArrowDown",
+    "Left": "ArrowLeft",
+    "Right": "ArrowRight",
+    "Page_Up": "PageUp",
+    "Page_Down": "PageDown",
+    "space": " ",
+}
+
+MODIFIER_BITS = {"alt": 1, "ctrl": 2, "control": 2, "meta": 4, "cmd": 4, "super": 4, "shift": 8}
+
+# Same element descriptor as clickAt() in the extension, rect in page coordinates
+DESCRIBE_ELEMENT = """
+  const implicitRoles = { A: 'link', BUTTON: 'button', SELECT: 'combobox', TEXTAREA: 'textbox', IMG: 'img' };
+  const inputRoles = { checkbox: 'checkbox', radio: 'radio', submit: 'button', button: 'button', range: 'slider' };
+  const describe = (el) => {
+    const rect = el.getBoundingClientRect();
+    const role = el.getAttribute('role') ||
+      (el.tagName === 'INPUT' ? inputRoles[el.type] || 'textbox' : implicitRoles[el.tagName]) ||
+      (/^H[1-6]$/.test(el.tagName) ? 'heading' : null);
+    const label = el.labels && el.labels.length ? el.labels[0].innerText : '';
+    const text = el.getAttribute('aria-label') || label || el.innerText ||
+      el.getAttribute('placeholder') || (el.type === 'password' ? '' : el.value) ||
+      el.title || el.alt || '';
+    return {
+      tag: el.tagName.toLowerCase(),
+      role: role,
+      text: text.replace(/\\s+/g, ' ').trim().substring(0, 80),
+      href: el.tagName === 'A' && el.href ? el.href : null,
+      rect: {
+        x: Math.round(rect.left + window.scrollX),
+        y: Math.round(rect.top + window.scrollY),
+        width: Math.round(rect.width),
+        height: Math.round(rect.height)
+      }
+    };
+  };
+"""
+
+# Same element inspection as clickAt() in the extension
+ELEMENT_INFO_SCRIPT = """
+(() => {
+  const element = document.elementFromPoint(%d, %d);
+  if (!element) return null;
+  const isClickable = (el) => ['INPUT', 'TEXTAREA', 'SELECT', 'BUTTON', 'A'].includes(el.tagName) ||
+    el.getAttribute('role') === 'button' || el.onclick !== null || el.hasAttribute('onclick') ||
+    getComputedStyle(el).cursor === 'pointer';
+""" + DESCRIBE_ELEMENT + """
+  let clicked = element;
+  let depth = 0;
+  while (!isClickable(clicked) && depth < 3 && clicked.parentElement) {
+    clicked = clicked.parentElement;
+    depth++;
+  }
+  return {
+    element: Object.assign(describe(clicked), { clickable: isClickable(clicked) }),
+    url: location.href,
+    scroll: { x: Math.round(window.scrollX), y: Math.round(window.scrollY) }
+  };
+})()
+"""
+
+# Where focus went and the URL after a click
+CLICK_OUTCOME_SCRIPT = """
+(() => {
+""" + DESCRIBE_ELEMENT + """
+  const focused = document.activeElement;
+  return { focus: focused && focused !== document.body ? describe(focused) : null, url: location.href };
+})()
+"""
+CLICK_SETTLE = 0.15  # seconds, CLICK_SETTLE in the extension
+
+# Same as domSnapshot() and runBatch() in the extension
+DOM_SNAPSHOT_SCRIPT = """
+(() => {
+  const skippedTypes = ['hidden', 'submit', 'button', 'image', 'file', 'reset', 'checkbox', 'radio'];
+  const selectorFor = (el) => {
+    if (el.id && document.querySelectorAll(`#${CSS.escape(el.id)}`).length === 1) return `#${CSS.escape(el.id)}`;
+    const name = el.getAttribute('name');
+    if (name) {
+      const byName = `${el.tagName.toLowerCase()}[name="${CSS.escape(name)}"]`;
+      if (document.querySelectorAll(byName).length === 1) return byName;
+    }
+    const path = [];
+    for (let node = el; node && node !== document.body; node = node.parentElement) {
+      const siblings = Array.from(node.parentElement.children).filter(s => s.tagName === node.tagName);
+      path.unshift(`${node.tagName.toLowerCase()}:nth-of-type(${siblings.indexOf(node) + 1})`);
+    }
+    return `body > ${path.join(' > ')}`;
+  };
+  const fields = Array.from(document.querySelectorAll('input, textarea, select'))
+    .filter(el => !skippedTypes.includes((el.type || '').toLowerCase()))
+    .filter(el => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden')
+    .slice(0, 50)
+    .map(el => ({
+      selector: selectorFor(el),
+      tag: el.tagName.toLowerCase(),
+      type: (el.type || '').toLowerCase(),
+      name: el.getAttribute('name') || '',
+      id: el.id || '',
+      label: el.labels && el.labels.length ? el.labels[0].innerText.trim().substring(0, 60) : '',
+      placeholder: el.getAttribute('placeholder') || '',
+      ariaLabel: el.getAttribute('aria-label') || '',
+      autocomplete: (el.getAttribute('autocomplete') || '').toLowerCase(),
+      disabled: el.disabled || el.readOnly || false,
+      filled: Boolean(el.value)
+    }));
+  return { url: location.href, title: document.title, fields: fields };
+})()
+"""
+
+BATCH_SCRIPT = """
+((steps) => steps.map((step) => {
+  if (step.host && location.hostname !== step.host) {
+    return { selector: step.selector, success: false, error: `Page is on ${location.hostname}, not ${step.host}` };
+  }
+  const el = document.querySelector(step.selector);
+  if (!el) return { selector: step.selector, success: false, error: 'Element not found' };
+  if (step.op === 'fill') {
+    el.focus();
+    const prototype = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype :
+      el.tagName === 'SELECT' ? HTMLSelectElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(prototype, 'value').set.call(el, step.value);
+    el.dispatchEvent(new Event('input', { bubbles: true }));
+    el.dispatchEvent(new Event('change', { bubbles: true }));
+    return { selector: step.selector, success: el.value === step.value };
+  }
+  return { selector: step.selector, success: false, error: `Unknown op: ${step.op}` };
+}))(%s)
+"""
+
+
+def find_chromium() -> Optional[str]:
+    """Locate a Chromium build, preferring config.CHROMIUM_PATH"""
+    if config.CHROMIUM_PATH:
+        return config.CHROMIUM_PATH
+    for name in CHROMIUM_EXECUTABLES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+class CDPConnection:
+    """Single DevTools WebSocket shared by every target, using flattened sessions"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.websocket = None
+        self._ids = itertools.count(1)
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._event_waiters: Dict[tuple, List[asyncio.Future]] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        self.websocket = await websockets.connect(self.url, max_size=None)
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def close(self):
+        if self._reader:
+            self._reader.cancel()
+        if self.websocket:
+            await self.websocket.close()
+
+    async def send(self, method: str, params: Optional[Dict] = None, session_id: Optional[str] = None) -> Dict:
+        """Send a CDP command and return its result"""
+        command_id = next(self._ids)
+        message = {"id": command_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+
+        future = asyncio.get_running_loop().create_future()
+        self._futures[command_id] = future
+        try:
+            await self.websocket.send(json.dumps(message))
+            response = await asyncio.wait_for(future, config.COMMAND_TIMEOUT)
+        finally:
+            self._futures.pop(command_id, None)
+
+        if "error" in response:
+            raise RuntimeError(f"{method} failed: {response['error'].get('message')}")
+        return response.get("result", {})
+
+    def wait_for_event(self, method: str, session_id: Optional[str] = None) -> asyncio.Future:
+        """Future resolved with the params of the next matching event"""
+        future = asyncio.get_running_loop().create_future()
+        self._event_waiters.setdefault((session_id, method), []).append(future)
+        return future
+
+    async def _read_loop(self):
+        try:
+            async for message in self.websocket:
+                data = json.loads(message)
+                if "id" in data:
+                    future = self._futures.get(data["id"])
+                    if future and not future.done():
+                        future.set_result(data)
+                elif "method" in data:
+                    waiters = self._event_waiters.pop((data.get("sessionId"), data["method"]), [])
+                    for future in waiters:
+                        if not future.done():
+                            future.set_result(data.get("params", {}))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            for future in self._futures.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Chromium DevTools connection closed"))
+
+
+class HeadlessBrowser:
+    """A local headless Chromium process hosting many isolated browser contexts"""
+
+    def __init__(self, executable: Optional[str] = None, extra_args: Optional[List[str]] = None):
+        self.executable = executable or find_chromium()
+        self.extra_args = extra_args or []
+        self.process: Optional[subprocess.Popen] = None
+        self.connection: Optional[CDPConnection] = None
+        self.user_data_dir: Optional[str] = None
+
+    async def launch(self):
+        """Start Chromium and connect to its DevTools endpoint"""
+        if not self.executable:
+            raise FileNotFoundError("Chromium not found, set CHROMIUM_PATH")
+
+        self.user_data_dir = tempfile.mkdtemp(prefix="claude-browser-agent-")
+        args = [
+            self.executable,
+            "--headless=new",
+            "--remote-debugging-port=0",
+            f"--user-data-dir={self.user_data_dir}",
+            f"--window-size={config.REAL_SCREENSHOT_WIDTH},{config.REAL_SCREENSHOT_HEIGHT}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--disable-gpu",
+            *self.extra_args,
+            "about:blank",
+        ]
+        print(f"🚀 Launching headless Chromium: {self.executable}")
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        ws_url = await self._read_devtools_url()
+        self.connection = CDPConnection(ws_url)
+        await self.connection.connect()
+        print(f"✅ Connected to Chromium DevTools: {ws_url}")
+
+    async def _read_devtools_url(self) -> str:
+        # Chromium writes the chosen port and browser path once it is listening
+        port_file = os.path.join(self.user_data_dir, "DevToolsActivePort")
+        for _ in range(config.CHROMIUM_LAUNCH_TIMEOUT * 10):
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Chromium exited with code {self.process.returncode}")
+            if os.path.exists(port_file):
+                with open(port_file) as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    return f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+            await asyncio.sleep(0.1)
+        raise TimeoutError("Chromium did not open a DevTools port in time")
+
+    async def new_adapter(self, url: str = "about:blank") -> "HeadlessChromeAdapter":
+        """Create an adapter backed by a fresh, isolated browser context"""
+        result = await self.connection.send("Target.createBrowserContext", {"disposeOnDetach": True})
+        adapter = HeadlessChromeAdapter(self.connection, result["browserContextId"])
+        await adapter.open_tab(url)
+        return adapter
+
+    async def close(self):
+        """Shut down Chromium and remove its profile"""
+        if self.connection:
+            try:
+                await self.connection.send("Browser.close")
+            except Exception:
+                pass
+            await self.connection.close()
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+class HeadlessChromeAdapter:
+    """ChromeAdapter replacement that drives one browser context of a HeadlessBrowser"""
+
+    def __init__(self, connection: CDPConnection, context_id: str):
+        self.connection = connection
+        self.context_id = context_id
+        self.tabs: List[Dict[str, str]] = []  # {"target_id", "session_id"}
+        self.active_tab = 0
+        self.last_screenshot: Optional[str] = None
+        self.last_action_result: Optional[Dict] = None
+
+    @property
+    def session_id(self) -> str:
+        return self.tabs[self.active_tab]["session_id"]
+
+    async def _send(self, method: str, params: Optional[Dict] = None) -> Dict:
+        return await self.connection.send(method, params, self.session_id)
+
+    def _result(self, success: bool, data: Any = None, error: Optional[str] = None) -> Dict:
+        """Build an action result shaped like the extension's"""
+        self.last_action_result = {"success": success, "data": data}
+        if error:
+            self.last_action_result["error"] = error
+        return self.last_action_result
+
+    async def open_tab(self, url: str = "about:blank") -> Dict:
+        """Open a tab in this context and make it the active one"""
+        target = await self.connection.send("Target.createTarget", {
+            "url": url,
+            "browserContextId": self.context_id
+        })
+        attached = await self.connection.send("Target.attachToTarget", {
+            "targetId": target["targetId"],
+            "flatten": True
+        })
+        self.tabs.append({"target_id": target["targetId"], "session_id": attached["sessionId"]})
+        self.active_tab = len(self.tabs) - 1
+
+        await self._send("Page.enable")
+        await self._send("Emulation.setDeviceMetricsOverride", {
+            "width": config.REAL_SCREENSHOT_WIDTH,
+            "height": config.REAL_SCREENSHOT_HEIGHT,
+            "deviceScaleFactor": 1,
+            "mobile": False
+        })
+        return self._result(True, {"index": self.active_tab})
+
+    async def close(self):
+        """Dispose of this adapter's browser context"""
+        await self.connection.send("Target.disposeBrowserContext", {"browserContextId": self.context_id})
+        self.tabs = []
+
+    async def get_screenshot(self) -> str:
+        """Capture the active tab as base64 JPEG"""
+        result = await self._send("Page.captureScreenshot", {"format": "jpeg", "quality": 75})
+        self.last_screenshot = result.get("data")
+        return self.last_screenshot
+
+    async def _mouse_event(self, event_type: str, x: int, y: int, **params):
+        await self._send("Input.dispatchMouseEvent", {"type": event_type, "x": x, "y": y, **params})
+
+    async def mouse_move(self, x: int, y: int) -> Dict:
+        """Move mouse to coordinates"""
+        await self._mouse_event("mouseMoved", x, y)
+        return self._result(True, {"x": x, "y": y})
+
+    async def click(self, x: int, y: int, button: str = "left") -> Dict:
+        """Click at coordinates"""
+        evaluated = await self._send("Runtime.evaluate", {
+            "expression": ELEMENT_INFO_SCRIPT % (x, y),
+            "returnByValue": True
+        })
+        element_info = evaluated.get("result", {}).get("value")
+        if not element_info:
+            return self._result(False, error="No element found at coordinates")
+
+        await self._mouse_event("mouseMoved", x, y)
+        await self._mouse_event("mousePressed", x, y, button=button, clickCount=1)
+        await self._mouse_event("mouseReleased", x, y, button=button, clickCount=1)
+
+        await asyncio.sleep(CLICK_SETTLE)
+        try:
+            evaluated = await self._send("Runtime.evaluate", {
+                "expression": CLICK_OUTCOME_SCRIPT,
+                "returnByValue": True
+            })
+            outcome = evaluated.get("result", {}).get("value") or {}
+        except RuntimeError:
+            outcome = {}  # the page is navigating
+        element_info["focus"] = outcome.get("focus")
+        if outcome.get("url") and outcome["url"] != element_info["url"]:
+            element_info["navigatedTo"] = outcome["url"]
+        return self._result(True, element_info)
+
+    async def type_text(self, text: str) -> Dict:
+        """Type text"""
+        await self._send("Input.insertText", {"text": text})
+        return self._result(True)
+
+    async def key_press(self, key: str) -> Dict:
+        """Press a key (Enter, Tab, Backspace, etc.), optionally with modifiers like ctrl+a"""
+        *modifiers, key = key.split("+") if len(key) > 1 else [key]
+        key = KEY_ALIASES.get(key, key)
+        modifier_bits = sum(MODIFIER_BITS.get(m.lower(), 0) for m in modifiers)
+
+        definition = KEY_DEFINITIONS.get(key)
+        if definition is None and len(key) == 1:
+            code = f"Key{key.upper()}" if key.isalpha() else f"Digit{key}" if key.isdigit() else ""
+            definition = {"code": code, "text": key}
+        elif definition is None:
+            definition = {"code": key, "text": ""}
+        event = {"key": key, "modifiers": modifier_bits, **definition}
+        if modifier_bits & ~MODIFIER_BITS["shift"]:
+            # Shortcuts like ctrl+a must not insert text
+            event.pop("text", None)
+
+        await self._send("Input.dispatchKeyEvent", {"type": "keyDown" if event.get("text") else "rawKeyDown", **event})
+        await self._send("Input.dispatchKeyEvent", {"type": "keyUp", **event})
+        return self._result(True)
+
+    async def scroll(self, direction: str, amount: int = 100) -> Dict:
+        """Scroll page"""
+        delta_x = {"left": -amount, "right": amount}.get(direction, 0)
+        delta_y = {"up": -amount, "down": amount}.get(direction, 0)
+        await self._mouse_event(
+            "mouseWheel",
+            config.REAL_SCREENSHOT_WIDTH // 2,
+            config.REAL_SCREENSHOT_HEIGHT // 2,
+            deltaX=delta_x,
+            deltaY=delta_y
+        )
+        return self._result(True)
+
+    async def navigate(self, url: str) -> Dict:
+        """Navigate to URL and wait for the load event"""
+        loaded = self.connection.wait_for_event("Page.loadEventFired", self.session_id)
+        result = await self._send("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            loaded.cancel()
+            return self._result(False, error=result["errorText"])
+        try:
+            await asyncio.wait_for(loaded, config.COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Page did not finish loading: {url}")
+        return self._result(True)
+
+    async def dom_snapshot(self) -> Dict:
+        """Visible form fields of the page, each with a unique CSS selector"""
+        evaluated = await self._send("Runtime.evaluate", {
+            "expression": DOM_SNAPSHOT_SCRIPT,
+            "returnByValue": True
+        })
+        return self._result(True, evaluated.get("result", {}).get("value"))
+
+    async def current_url(self) -> Optional[str]:
+        """URL of the active tab"""
+        evaluated = await self._send("Runtime.evaluate", {"expression": "location.href", "returnByValue": True})
+        return evaluated.get("result", {}).get("value")
+
+    async def batch(self, steps: List[Dict]) -> Dict:
+        """Run DOM steps ({"op": "fill", "selector", "value"}) in one evaluation"""
+        evaluated = await self._send("Runtime.evaluate", {
+            "expression": BATCH_SCRIPT % json.dumps(steps),
+            "returnByValue": True
+        })
+        results = evaluated.get("result", {}).get("value") or []
+        return self._result(bool(results) and all(r["success"] for r in results), {"results": results})
+
+    async def switch_tab(self, index: int) -> Dict:
+        """Switch to tab by index"""
+        if not 0 <= index < len(self.tabs):
+            return self._result(False, error="Invalid tab index")
+        self.active_tab = index
+        await self.connection.send("Target.activateTarget", {"targetId": self.tabs[index]["target_id"]})
+        return self._result(True)
+
+    async def download_file(self, url: str) -> Dict:
+        """Download file from URL into client/downloads"""
+        download_dir = os.path.join(os.path.dirname(__file__), "downloads")
+        os.makedirs(download_dir, exist_ok=True)
+        await self.connection.send("Browser.setDownloadBehavior", {
+            "behavior": "allow",
+            "browserContextId": self.context_id,
+            "downloadPath": download_dir
+        })
+        await self._send("Runtime.evaluate", {
+            "expression": "(() => { const a = document.createElement('a'); a.href = %s; a.download = '';"
+                          " document.body.appendChild(a); a.click(); a.remove(); })()" % json.dumps(url)
+        })
+        return self._result(True)
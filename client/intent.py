@@ -0,0 +1,268 @@
+"""
+Intent - Deterministic fast paths that skip pixel-level steps
+Detects navigation targets and form values in text, and maps them onto the page's form fields
+"""
+import re
+from typing import Dict, List, Optional
+from urllib.parse import quote_plus, urlsplit
+
+
+# Model iterations each fast path replaces: click the address bar, type, press Enter
+NAVIGATE_ITERATIONS = 3
+# Per filled field: click into it, type
+FILL_ITERATIONS_PER_FIELD = 2
+# DOM snapshots in a row that fill nothing before the form values are left to Claude
+FILL_MAX_MISSES = 3
+
+SCHEME_URL = re.compile(r"\bhttps?://[^\s<>\"'`]+", re.IGNORECASE)
+# Bare domains need a known TLD so file names ("report.pdf") and versions don't match
+BARE_DOMAIN = re.compile(
+    r"(?<![@\w.-])((?:www\.)?(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+"
+    r"(?:com|org|net|edu|gov|io|ai|dev|app|co|uk|de|fr|es|it|nl|ma|ca|au|in|jp|info|me|tv|us)"
+    r"(?::\d+)?(?:/[^\s<>\"'`]*)?)(?![\w@-])",
+    re.IGNORECASE
+)
+TRAILING_PUNCTUATION = ".,;:!?)]}'\""
+# Pages with nothing the user could be working on, which a fast path may replace
+BLANK_PAGES = ("about:blank", "chrome://newtab", "chrome://new-tab-page", "chrome-search://local-ntp", "edge://newtab")
+
+SEARCH_ENGINES = {
+    "google": "https://www.google.com/search?q=",
+    "bing": "https://www.bing.com/search?q=",
+    "duckduckgo": "https://duckduckgo.com/?q=",
+    "youtube": "https://www.youtube.com/results?search_query=",
+    "amazon": "https://www.amazon.com/s?k=",
+    "wikipedia": "https://en.wikipedia.org/w/index.php?search=",
+}
+# Only tasks that name the engine ("search Bing for X", "google X"): "search my inbox for X"
+# or "search Hugging Face for X" mean a site or app, not a web search
+SEARCH_TASK = re.compile(
+    r"^\s*(?:please\s+)?(?P<verb>search|look\s+up|google)\s+"
+    r"(?:(?:on\s+)?(?P<engine>" + "|".join(SEARCH_ENGINES) + r")\s+)?"
+    r"(?:for\s+)?(?P<query>.+?)"
+    r"(?:\s+on\s+(?P<engine_after>" + "|".join(SEARCH_ENGINES) + r"))?\s*[.!]?\s*$",
+    re.IGNORECASE
+)
+# "I'll navigate to example.com", "Let me go to https://..."
+NAVIGATION_PHRASE = re.compile(
+    r"\b(?:navigate|go|browse|head)\s+(?:directly\s+|straight\s+)?to\s+(?:the\s+)?(?:url\s+|website\s+|site\s+|page\s+)?(\S+)"
+    r"|\b(?:open|visit|load)\s+(?:the\s+)?(?:url\s+|website\s+|site\s+|page\s+)?(\S+)",
+    re.IGNORECASE
+)
+# Shortcuts that focus the address bar, which page scripts cannot type into
+ADDRESS_BAR_KEYS = ("ctrl+l", "alt+d", "f6", "cmd+l", "super+l")
+ADDRESS_BAR_PHRASE = re.compile(r"\b(?:address|url|location|search)\s+bar\b|\bomnibox\b", re.IGNORECASE)
+
+# Canonical field name -> words that identify it in a task and in a form field's attributes
+FIELD_ALIASES = {
+    "email": ("email address", "email", "e-mail"),
+    "username": ("username", "user name", "login", "user id"),
+    "password": ("password", "passwd"),
+    "first_name": ("first name", "firstname", "given name"),
+    "last_name": ("last name", "lastname", "surname", "family name"),
+    "name": ("full name", "name"),
+    "phone": ("phone number", "phone", "telephone", "mobile"),
+    "company": ("company name", "company", "organization", "organisation"),
+    "address": ("address", "street"),
+    "city": ("city", "town"),
+    "zip": ("zip", "postal code", "postcode"),
+    "search": ("search", "query"),
+}
+# Attribute values (type / autocomplete) that identify a field without matching its label
+FIELD_HINTS = {
+    "email": ("email",),
+    "username": ("username",),
+    "password": ("password", "current-password", "new-password"),
+    "first_name": ("given-name",),
+    "last_name": ("family-name",),
+    "name": ("name",),
+    "phone": ("tel",),
+    "company": ("organization",),
+    "address": ("street-address", "address-line1"),
+    "city": ("address-level2",),
+    "zip": ("postal-code",),
+    "search": ("search",),
+}
+_ALIAS_TO_FIELD = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+_FIELD_VALUE = re.compile(
+    r"\b(?P<alias>" + "|".join(sorted(map(re.escape, _ALIAS_TO_FIELD), key=len, reverse=True)) + r")\b"
+    r"\s*(?P<separator>[:=]|\bis\b|\bas\b)?\s*"
+    r"(?P<value>\"[^\"]*\"|'[^']*'|[^\s,;]+)",
+    re.IGNORECASE
+)
+EMAIL_ADDRESS = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# Credentials are often given without a separator ("log in with username alice");
+# other fields need one, or "search Google for X" would fill a search box with "Google"
+BARE_VALUE_FIELDS = ("email", "username", "password")
+# Aliases that are also common words ("the login page") always need a separator
+SEPARATOR_ALIASES = ("login",)
+# Fields whose values may contain spaces; after ":" or "=" they run to the next comma
+MULTI_WORD_FIELDS = ("first_name", "last_name", "name", "company", "address", "city")
+MULTI_WORD_END = re.compile(r"[,;\n]|\s+and\s+|$")
+# Words that follow an alias without being its value ("password and email", "username field")
+NOT_A_VALUE = {"and", "or", "field", "box", "to", "the", "a", "an", "with", "in", "into", "for", "then"}
+
+
+def normalize_url(url: str) -> str:
+    """Add a scheme to bare domains"""
+    if not re.match(r"^[a-z][a-z0-9+.-]*://", url, re.IGNORECASE) and not url.startswith(("about:", "data:")):
+        url = "https://" + url
+    return url
+
+
+def find_url(text: str) -> Optional[str]:
+    """First URL or bare domain in the text, with a scheme"""
+    match = SCHEME_URL.search(text) or BARE_DOMAIN.search(text)
+    if not match:
+        return None
+    return normalize_url(match.group(0).rstrip(TRAILING_PUNCTUATION))
+
+
+def search_url(text: str) -> Optional[str]:
+    """Results URL for tasks of the form "search [engine] for X" """
+    match = SEARCH_TASK.match(text)
+    if not match:
+        return None
+    query = match.group("query").strip().strip("\"'")
+    engine = match.group("engine") or match.group("engine_after")
+    if match.group("verb").lower() == "google":
+        engine = engine or "google"
+    if not query or not engine:
+        return None
+    return SEARCH_ENGINES[engine.lower()] + quote_plus(query)
+
+
+def is_blank_page(url: Optional[str]) -> bool:
+    """Whether a tab shows nothing worth keeping (an unknown URL is not blank)"""
+    return url is not None and (url == "" or url.startswith(BLANK_PAGES))
+
+
+def task_navigation_target(task: str) -> Optional[str]:
+    """Where a task should start: a search results page, or the first URL it mentions"""
+    return search_url(task) or find_url(task)
+
+
+def model_navigation_target(text: str) -> Optional[str]:
+    """URL the model says it is about to navigate to"""
+    for match in NAVIGATION_PHRASE.finditer(text):
+        url = find_url(match.group(1) or match.group(2))
+        if url:
+            return url
+    return None
+
+
+def is_url_text(text: str) -> bool:
+    """Typed text that is nothing but a URL (what the model types into the address bar)"""
+    text = text.strip()
+    return bool(text) and " " not in text and find_url(text) == normalize_url(text.rstrip(TRAILING_PUNCTUATION))
+
+
+def address_bar_target(text: str, actions: List[Dict]) -> Optional[str]:
+    """
+    URL the model is trying to reach through the address bar in this turn, or None.
+    `text` is the model's reasoning, `actions` the computer tool inputs it is about to run.
+    """
+    announced = model_navigation_target(text)
+    mentions_bar = ADDRESS_BAR_PHRASE.search(text) is not None
+    for action in actions:
+        kind = action.get("action")
+        typed = action.get("text", "")
+        if kind == "type" and is_url_text(typed) and (announced or mentions_bar or typed.endswith("\n")):
+            return find_url(typed)
+        if announced and (
+            (kind == "key" and typed.lower() in ADDRESS_BAR_KEYS) or
+            (kind == "left_click" and mentions_bar)
+        ):
+            return announced
+    return None
+
+
+def _field_value(task: str, match) -> Optional[str]:
+    """The value of one alias match, or None when the words after the alias are not a value"""
+    value = match.group("value")
+    quoted = value[0] in "\"'"
+    value = value[1:-1] if quoted else value.rstrip(TRAILING_PUNCTUATION)
+    if not value or value.lower() in NOT_A_VALUE or value.lower() in _ALIAS_TO_FIELD:
+        return None
+    alias = match.group("alias").lower()
+    field = _ALIAS_TO_FIELD[alias]
+    separator = match.group("separator")
+    if not separator and not quoted and (field not in BARE_VALUE_FIELDS or alias in SEPARATOR_ALIASES):
+        return None
+    if field == "email" and not EMAIL_ADDRESS.fullmatch(value):
+        return None
+    if field in MULTI_WORD_FIELDS and separator in (":", "=") and not quoted:
+        start = match.start("value")
+        value = task[start:MULTI_WORD_END.search(task, start).start()].strip().rstrip(TRAILING_PUNCTUATION)
+    return value
+
+
+def parse_field_values(task: str) -> Dict[str, str]:
+    """Form values spelled out in a task: "email: a@b.com", "password is 'x y'", "username alice" """
+    values = {}
+    position = 0
+    while True:
+        match = _FIELD_VALUE.search(task, position)
+        if match is None:
+            break
+        value = _field_value(task, match)
+        if value is None:
+            # Skip only the alias, the next word may start another field ("username password: x")
+            position = match.end("alias")
+            continue
+        position = match.end()
+        values.setdefault(_ALIAS_TO_FIELD[match.group("alias").lower()], value)
+
+    if "email" not in values:
+        email = EMAIL_ADDRESS.search(task)
+        if email:
+            values["email"] = email.group(0)
+    return values
+
+
+def same_host(url: str, target: str) -> bool:
+    """Whether a page is on the host a task named (www. or not); form values are only filled there"""
+    def host(address):
+        name = (urlsplit(address).hostname or "").lower()
+        return name[4:] if name.startswith("www.") else name
+    return bool(host(target)) and host(url) == host(target)
+
+
+def _field_text(field: Dict) -> str:
+    """Everything that names a form field, lowercased"""
+    parts = (field.get(key) for key in ("name", "id", "label", "placeholder", "ariaLabel"))
+    return " ".join(part for part in parts if part).lower().replace("_", " ").replace("-", " ")
+
+
+def match_form_fields(fields: List[Dict], values: Dict[str, str], url: Optional[str] = None) -> List[Dict]:
+    """
+    Fill steps for the batch command: each value goes to the first visible field that names it,
+    by type/autocomplete first, then by name, id, label or placeholder. With the page's `url`,
+    each step also carries its host, and the batch refuses to fill on any other host
+    """
+    host = urlsplit(url).hostname if url else None
+    steps = []
+    used = set()
+    for field_name, value in values.items():
+        hints = FIELD_HINTS.get(field_name, ())
+        aliases = FIELD_ALIASES[field_name]
+        candidates = [field for field in fields if field["selector"] not in used and not field.get("disabled")]
+        target = next(
+            (field for field in candidates
+             if field.get("autocomplete") in hints or field.get("type") in hints),
+            None
+        )
+        if target is None:
+            target = next(
+                (field for field in candidates
+                 if any(re.search(r"\b" + re.escape(alias) + r"\b", _field_text(field)) for alias in aliases)),
+                None
+            )
+        if target is None:
+            continue
+        used.add(target["selector"])
+        step = {"op": "fill", "selector": target["selector"], "value": value, "field": field_name}
+        if host:
+            step["host"] = host
+        steps.append(step)
+    return steps
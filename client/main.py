@@ -2,6 +2,7 @@
 Main entry point for Claude Browser Agent
 Runs WebSocket server and handles communication with Chrome Extension
 """
+import argparse
 import asyncio
 import json
 import websockets
@@ -10,6 +11,9 @@ from typing import Optional
 import config
 from claude_orchestrator import ClaudeOrchestrator
 from chrome_adapter import ChromeAdapter
+from budget import get_metrics
+from api_scheduler import get_scheduler
+from profiling import get_profiling
 
 
 class BrowserAgentServer:
@@ -22,28 +26,32 @@ class BrowserAgentServer:
         
     async def handle_client(self, websocket):
         """Handle incoming WebSocket connection from Chrome Extension"""
-        self.websocket = websocket
-        self.chrome_adapter.set_websocket(websocket)
-        
         print("✅ Chrome Extension connected!")
         
         try:
             async for message in websocket:
-                await self.handle_message(message)
+                await self.handle_message(message, websocket)
                 
         except websockets.exceptions.ConnectionClosed:
             print("❌ Chrome Extension disconnected")
         except Exception as e:
             print(f"❌ Error handling client: {e}")
         finally:
-            self.websocket = None
+            # Keep the running task alive; commands are buffered until the extension resumes
+            self.chrome_adapter.detach(websocket)
+            if self.websocket is websocket:
+                self.websocket = None
             
-    async def handle_message(self, message: str):
+    async def handle_message(self, message: str, websocket=None):
         """Process incoming message from Chrome Extension"""
         try:
             data = json.loads(message)
             message_type = data.get("type")
             
+            if message_type == "keepalive":
+                # Service worker keepalive, nothing to do
+                return
+            
             print(f"\n📥 Received from Extension: {message_type}")
             '''if message_type == "task":
                 print("🔗 Connection test successful")
@@ -52,30 +60,77 @@ class BrowserAgentServer:
                     "type": "response",
                     "message": "Connection OK!"
                 }))'''
-            
-            if message_type == "task":
+
+            if message_type == "hello":
+                # (Re)connection handshake, resumes the session if the token matches
+                session, resumed = await self.chrome_adapter.attach(websocket, data.get("session"))
+                self.websocket = websocket
+                if resumed:
+                    print("🔁 Extension session resumed")
+                else:
+                    print("🆕 New extension session started")
+                
+            elif message_type == "task":
                 # New task from user
                 task = data.get("task")
                 print(f"📋 Task: {task}")
-                asyncio.create_task(self.orchestrator.execute_task(task)) 
+                # Optional per-task limits, e.g. {"max_cost": 0.2, "max_seconds": 120}
+                budget = data.get("budget")
+                # Opt-in: try uncertain clicks in background copies of the tab first
+                speculative = data.get("speculative")
+                if data.get("parallel"):
+                    asyncio.create_task(self.orchestrator.execute_parallel_task(task, budget, speculative))
+                else:
+                    asyncio.create_task(self.orchestrator.execute_task(task, budget, speculative)) 
                 
+            elif message_type == "get_metrics":
+                # Budget spending aggregated per task type, and the shared API queue
+                await websocket.send(json.dumps({
+                    "type": "metrics",
+                    "data": get_metrics().snapshot(),
+                    "scheduler": get_scheduler().stats()
+                }))
+                
+            elif message_type == "profile":
+                # Sampling profiler control: {"command": "start" | "stop" | "status"}
+                status = get_profiling().handle_command(data.get("command", "status"))
+                await websocket.send(json.dumps({"type": "profile_status", "data": status}))
+                
+
             elif message_type == "screenshot":
                 # Screenshot response from extension
                 screenshot_data = data.get("data")
                 print(f"📸 Screenshot received ({len(screenshot_data)} bytes)")
-                self.chrome_adapter.set_last_screenshot(screenshot_data)
+                self.chrome_adapter.set_last_screenshot(screenshot_data, data.get("id"))
+                
+            elif message_type == "frame":
+                # Screenshot of the delta protocol: a keyframe, or the regions that changed
+                if data.get("data") is not None:
+                    print(f"📸 Keyframe received ({len(data['data'])} bytes)")
+                else:
+                    size = sum(len(tile.get("data", "")) for tile in data.get("tiles", []))
+                    print(f"📸 Delta frame received ({len(data.get('tiles', []))} regions, {size} bytes)")
+                self.chrome_adapter.handle_stream_message(data)
+                
+            elif message_type == "page_tile":
+                # One viewport tile of a capture_full_page command
+                print(f"🧩 Page tile {data.get('index')} received{' (cached)' if data.get('cached') else ''}")
+                self.chrome_adapter.handle_stream_message(data)
                 
             elif message_type == "action_result":
                 # Result of action execution
                 success = data.get("success")
                 result_data = data.get("data")
-                print(f"✅ Action result: success={success}")
-                self.chrome_adapter.set_last_action_result(success, result_data)
+                error = data.get("error")
+                print(f"✅ Action result: success={success}" + (f", error: {error}" if error else ""))
+                self.chrome_adapter.set_last_action_result(success, result_data, data.get("id"), error)
                 
             elif message_type == "error":
                 # Error from extension
                 error_msg = data.get("message")
                 print(f"❌ Extension error: {error_msg}")
+                if data.get("id") is not None:
+                    self.chrome_adapter.set_last_action_result(False, None, data.get("id"), error_msg)
                 
             else:
                 print(f"⚠️ Unknown message type: {message_type}")
@@ -85,7 +140,7 @@ class BrowserAgentServer:
         except Exception as e:
             print(f"❌ Error processing message: {e}")
             
-    async def start(self):
+    async def start(self, warmup: bool = False):
         """Start the WebSocket server"""
         print(f"\n🚀 Starting WebSocket server on ws://{config.WEBSOCKET_HOST}:{config.WEBSOCKET_PORT}")
         print("⏳ Waiting for Chrome Extension to connect...")
@@ -95,20 +150,61 @@ class BrowserAgentServer:
             self.handle_client,
             config.WEBSOCKET_HOST,
             config.WEBSOCKET_PORT,
-            max_size=10 * 1024 * 1024  # i specify max message size because large screenshots crash the server  
+            max_size=10 * 1024 * 1024,  # i specify max message size because large screenshots crash the server  
+            ping_interval=None  # heartbeats are driven by ChromeAdapter so latency can be tracked
         ):
+            if warmup:
+                # Runs while we wait for the extension, so the first task starts hot
+                asyncio.create_task(self.orchestrator.warmup())
             await asyncio.Future()  # Run forever
 
 
+async def run_headless(task: str, url: str):
+    """Run a single task against a local headless Chromium, no extension needed"""
+    from headless_adapter import HeadlessBrowser
+    
+    browser = HeadlessBrowser()
+    try:
+        await browser.launch()
+        adapter = await browser.new_adapter(url)
+        orchestrator = ClaudeOrchestrator(adapter)
+        await orchestrator.execute_task(task)
+    finally:
+        await browser.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Claude Browser Agent backend")
+    parser.add_argument("--headless", metavar="TASK",
+                        help="run TASK in a local headless Chromium instead of serving the extension")
+    parser.add_argument("--url", default="about:blank",
+                        help="start page for --headless (default: about:blank)")
+    parser.add_argument("--profile", action="store_true",
+                        help="start the sampling profiler right away (one folded-stack file per task)")
+    parser.add_argument("--warmup", action="store_true",
+                        help="open the API connection pool and load the image stack before the first task")
+    return parser.parse_args()
+
+
 async def main():
     """Main entry point"""
+    args = parse_args()
     try:
         # Validate configuration
         config.validate_config()
         
+        profiling = get_profiling()
+        profiling.start_monitors()
+        if args.profile:
+            profiling.handle_command("start")
+        
+        if args.headless:
+            await run_headless(args.headless, args.url)
+            return
+        
         # Start server
         server = BrowserAgentServer()
-        await server.start()
+        await server.start(warmup=args.warmup)
         
     except ValueError as e:
         print(f"\n❌ Configuration Error: {e}")
@@ -0,0 +1,211 @@
+"""
+Overlay Renderer - Cached, vectorized drawing of debug markers and coordinate grid hints
+Fonts, glyphs, marker stamps and grid layers are rendered once and composited with NumPy
+"""
+import base64
+import math
+from io import BytesIO
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from coordinates import CoordinateTransform
+
+
+MARKER_COLOR = (255, 0, 0)
+GRID_COLOR = (255, 0, 255)
+GRID_ALPHA = 0.25  # faint enough not to hide page content
+GRID_LABEL_ALPHA = 0.6
+FONT_CANDIDATES = ("arial.ttf", "Arial.ttf", "DejaVuSans.ttf")
+
+
+def load_font(size: int):
+    """Load the first available TrueType font, falling back to Pillow's default"""
+    for name in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(name, size)
+        except IOError:
+            continue
+    return ImageFont.load_default()
+
+
+class GlyphAtlas:
+    """Per-character alpha masks, so labels are assembled without rasterizing text"""
+
+    def __init__(self, size: int):
+        self.font = load_font(size)
+        left, top, right, bottom = self.font.getbbox("Ag(),:")
+        self.line_height = bottom + 2
+        self.glyphs: Dict[str, np.ndarray] = {}
+        self._labels: Dict[str, np.ndarray] = {}
+
+    def glyph(self, char: str) -> np.ndarray:
+        mask = self.glyphs.get(char)
+        if mask is None:
+            width = max(1, math.ceil(self.font.getlength(char)))
+            image = Image.new("L", (width, self.line_height), 0)
+            ImageDraw.Draw(image).text((0, 0), char, fill=255, font=self.font)
+            mask = np.asarray(image, dtype=np.float32) / 255.0
+            self.glyphs[char] = mask
+        return mask
+
+    def render(self, text: str) -> np.ndarray:
+        """Alpha mask (0..1) for a possibly multi-line label"""
+        mask = self._labels.get(text)
+        if mask is not None:
+            return mask
+
+        lines = [
+            np.hstack([self.glyph(c) for c in line]) if line else np.zeros((self.line_height, 1), np.float32)
+            for line in text.split("\n")
+        ]
+        width = max(line.shape[1] for line in lines)
+        mask = np.zeros((self.line_height * len(lines), width), np.float32)
+        for i, line in enumerate(lines):
+            mask[i * self.line_height:(i + 1) * self.line_height, :line.shape[1]] = line
+
+        if len(self._labels) > 512:
+            self._labels.clear()
+        self._labels[text] = mask
+        return mask
+
+
+def _marker_stamp() -> np.ndarray:
+    """Circle with a cross through it, the same shape save_debug_image used to draw"""
+    image = Image.new("L", (31, 31), 0)
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((5, 5, 25, 25), outline=255, width=3)
+    draw.line((0, 15, 30, 15), fill=255, width=3)
+    draw.line((15, 0, 15, 30), fill=255, width=3)
+    return np.asarray(image, dtype=np.float32) / 255.0
+
+
+def _paste_max(layer: np.ndarray, mask: np.ndarray, x: int, y: int):
+    """Merge mask into layer with its top-left corner at (x, y), clipped to the layer"""
+    height, width = layer.shape
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + mask.shape[1], width), min(y + mask.shape[0], height)
+    if x0 >= x1 or y0 >= y1:
+        return
+    region = layer[y0:y1, x0:x1]
+    np.maximum(region, mask[y0 - y:y1 - y, x0 - x:x1 - x], out=region)
+
+
+class OverlayRenderer:
+    """Draws markers and grid hints onto frames and re-encodes them with one reusable buffer"""
+
+    def __init__(self, font_size: int = 20, grid_font_size: int = 11):
+        self.atlas = GlyphAtlas(font_size)
+        self.grid_atlas = GlyphAtlas(grid_font_size)
+        self.marker = _marker_stamp()
+        self._alpha: Optional[np.ndarray] = None
+        self._grid_layers: Dict[tuple, Tuple[np.ndarray, np.ndarray]] = {}
+        self._buffer = BytesIO()
+
+    def decode(self, screenshot_base64: str) -> np.ndarray:
+        """Base64 JPEG/PNG to an (H, W, 3) uint8 array"""
+        image = Image.open(BytesIO(base64.b64decode(screenshot_base64)))
+        return np.array(image.convert("RGB"))
+
+    def _alpha_layer(self, shape: Tuple[int, int]) -> np.ndarray:
+        if self._alpha is None or self._alpha.shape != shape:
+            self._alpha = np.zeros(shape, np.float32)
+        return self._alpha
+
+    @staticmethod
+    def _composite(frame: np.ndarray, alpha: np.ndarray, color: Sequence[int]):
+        """frame = frame * (1 - alpha) + color * alpha"""
+        region = frame.astype(np.float32)
+        region += (np.asarray(color, np.float32) - region) * alpha[..., None]
+        frame[:] = region.astype(np.uint8)
+
+    def draw_markers(self, frame: np.ndarray, points: Sequence[Tuple[int, int]],
+                     labels: Optional[Sequence[str]] = None, color=MARKER_COLOR) -> np.ndarray:
+        """Stamp a marker (and optional label) at every point, composited in one pass"""
+        if not len(points):
+            return frame
+        alpha = self._alpha_layer(frame.shape[:2])
+        half = self.marker.shape[0] // 2
+        masks = []
+        for i, (x, y) in enumerate(points):
+            masks.append((self.marker, int(x) - half, int(y) - half))
+            if labels:
+                masks.append((self.atlas.render(labels[i]), int(x) + 15, int(y) + 15))
+
+        # Only blend the bounding box that the stamps touch
+        height, width = alpha.shape
+        x0 = max(min(x for _, x, _ in masks), 0)
+        y0 = max(min(y for _, _, y in masks), 0)
+        x1 = min(max(x + m.shape[1] for m, x, _ in masks), width)
+        y1 = min(max(y + m.shape[0] for m, _, y in masks), height)
+        if x0 >= x1 or y0 >= y1:
+            return frame
+
+        window = alpha[y0:y1, x0:x1]
+        window.fill(0)
+        for mask, x, y in masks:
+            _paste_max(window, mask, x - x0, y - y0)
+        self._composite(frame[y0:y1, x0:x1], window, color)
+        return frame
+
+    def _grid_layer(self, frame_size: Tuple[int, int], model_size: Tuple[int, int],
+                    spacing: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Cached (1 - alpha, color * alpha) layers for a grid labelled in model coordinates"""
+        key = (frame_size, model_size, spacing)
+        cached = self._grid_layers.get(key)
+        if cached is not None:
+            return cached
+
+        height, width = frame_size
+        transform = CoordinateTransform(model_size, (width, height))
+        alpha = np.zeros((height, width), np.float32)
+
+        xs = [transform.model_to_viewport(mx, 0)[0] for mx in range(spacing, model_size[0], spacing)]
+        ys = [transform.model_to_viewport(0, my)[1] for my in range(spacing, model_size[1], spacing)]
+        alpha[:, xs] = GRID_ALPHA
+        alpha[ys, :] = GRID_ALPHA
+
+        for mx, x in zip(range(spacing, model_size[0], spacing), xs):
+            _paste_max(alpha, self.grid_atlas.render(str(mx)) * GRID_LABEL_ALPHA, x + 2, 2)
+        for my, y in zip(range(spacing, model_size[1], spacing), ys):
+            _paste_max(alpha, self.grid_atlas.render(str(my)) * GRID_LABEL_ALPHA, 2, y + 2)
+
+        weighted = alpha[..., None] * np.asarray(GRID_COLOR, np.float32)
+        layer = (1.0 - alpha[..., None], weighted)
+        self._grid_layers[key] = layer
+        return layer
+
+    def draw_grid(self, frame: np.ndarray, model_size: Tuple[int, int], spacing: int = 100) -> np.ndarray:
+        """Faint grid every `spacing` model pixels, labelled with model coordinates"""
+        keep, weighted = self._grid_layer(frame.shape[:2], model_size, spacing)
+        frame[:] = (frame * keep + weighted).astype(np.uint8)
+        return frame
+
+    def encode_jpeg(self, frame: np.ndarray, quality: int = 75) -> bytes:
+        buffer = self._buffer
+        buffer.seek(0)
+        buffer.truncate()
+        Image.fromarray(frame).save(buffer, "JPEG", quality=quality)
+        return buffer.getvalue()
+
+    def encode_base64(self, frame: np.ndarray, quality: int = 75) -> str:
+        return base64.b64encode(self.encode_jpeg(frame, quality)).decode("ascii")
+
+    def add_grid(self, screenshot_base64: str, model_size: Tuple[int, int], spacing: int = 100,
+                 quality: int = 75) -> str:
+        """Grid hint for a model-bound frame, base64 in and out"""
+        frame = self.decode(screenshot_base64)
+        self.draw_grid(frame, model_size, spacing)
+        return self.encode_base64(frame, quality)
+
+
+_renderer: Optional[OverlayRenderer] = None
+
+
+def get_renderer() -> OverlayRenderer:
+    """Process-wide renderer, so fonts and layers are only built once"""
+    global _renderer
+    if _renderer is None:
+        _renderer = OverlayRenderer()
+    return _renderer
@@ -0,0 +1,164 @@
+"""
+Page Capture - Stitches streamed viewport tiles into a full-page overview
+Tiles are kept as JPEG bytes in a byte-bounded LRU cache; only one tile is decoded at a time
+"""
+import base64
+import math
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageDraw
+
+import config
+from coordinates import CoordinateTransform
+
+
+class TileCache:
+    """LRU of viewport tiles keyed by URL + scroll offset + DOM mutation counter"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._tiles: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._tiles
+
+    def keys(self) -> List[str]:
+        return list(self._tiles)
+
+    def get(self, key: str) -> Optional[bytes]:
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+        return tile
+
+    def put(self, key: str, tile: bytes):
+        if key in self._tiles:
+            self.size -= len(self._tiles.pop(key))
+        self._tiles[key] = tile
+        self.size += len(tile)
+        while self.size > self.max_bytes and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class FullPageCapture:
+    """
+    Streaming stitcher: each tile is decoded, downscaled into the overview canvas
+    and dropped, so memory stays at one tile plus the (small) overview.
+    """
+
+    def __init__(self, cache: TileCache, overview_width: int = None, max_overview_height: int = None):
+        self.cache = cache
+        self.overview_width = overview_width or config.FULL_PAGE_OVERVIEW_WIDTH
+        self.max_overview_height = max_overview_height or config.FULL_PAGE_MAX_OVERVIEW_HEIGHT
+        self.overview: Optional[Image.Image] = None
+        self.scale = 1.0
+        self.dpr = 1.0
+        self.page_height = 0
+        self.viewport_width = 0
+        self.viewport_height = 0
+        self.tile_keys: List[str] = []
+        self.tile_offsets: List[int] = []
+        self.missing: List[int] = []  # cached tiles that were evicted before we could use them
+
+    @property
+    def tile_count(self) -> int:
+        return len(self.tile_keys)
+
+    def add_tile(self, message: Dict):
+        """Consume one page_tile message from the extension"""
+        key = message["key"]
+        if message.get("data"):
+            jpeg = base64.b64decode(message["data"])
+            self.cache.put(key, jpeg)
+        else:
+            jpeg = self.cache.get(key)
+
+        index = message["index"]
+        while len(self.tile_keys) <= index:
+            self.tile_keys.append("")
+            self.tile_offsets.append(0)
+        self.tile_keys[index] = key
+        self.tile_offsets[index] = message["offset"]
+
+        if jpeg is None:
+            self.missing.append(index)
+            return
+
+        tile = Image.open(BytesIO(jpeg))
+        if self.overview is None:
+            self._start(tile.size, message)
+
+        width = self.overview.width
+        height = max(1, round(tile.height * self.scale))
+        top = self.overview_transform().viewport_to_model(0, message["offset"])[1]
+        self.overview.paste(tile.convert("RGB").resize((width, height), Image.BILINEAR), (0, top))
+
+    def _start(self, tile_size, message: Dict):
+        """Allocate the overview canvas from the first tile's geometry"""
+        self.dpr = message.get("dpr") or tile_size[0] / message["viewportWidth"]
+        self.page_height = message["pageHeight"]
+        self.viewport_width = message["viewportWidth"]
+        self.viewport_height = message["viewportHeight"]
+        page_pixels = self.page_height * self.dpr
+        self.scale = min(self.overview_width / tile_size[0], self.max_overview_height / page_pixels)
+        self.overview = Image.new(
+            "RGB",
+            (max(1, round(tile_size[0] * self.scale)), max(1, math.ceil(page_pixels * self.scale))),
+            (255, 255, 255)
+        )
+
+    def overview_transform(self) -> CoordinateTransform:
+        """Overview pixels to page CSS pixels (the page is the "viewport" here)"""
+        return CoordinateTransform(self.overview.size, (self.viewport_width, self.page_height), self.dpr)
+
+    def tile_transform(self, index: int) -> CoordinateTransform:
+        """Pixels of a full-resolution tile to page CSS pixels: a window of the page at the tile's offset"""
+        width = self.viewport_width
+        tile_size = (round(width * self.dpr), round(self.viewport_height * self.dpr))
+        return CoordinateTransform(
+            tile_size, (width, self.page_height), self.dpr,
+            (0, self.tile_offsets[index], width, self.viewport_height)
+        )
+
+    def overview_base64(self, quality: int = 70) -> Optional[str]:
+        """Overview JPEG with tile boundaries and indexes marked"""
+        if self.overview is None:
+            return None
+        image = self.overview.copy()
+        draw = ImageDraw.Draw(image)
+        transform = self.overview_transform()
+        for index, offset in enumerate(self.tile_offsets):
+            top = transform.viewport_to_model(0, offset)[1]
+            draw.line((0, top, image.width, top), fill=(0, 120, 255), width=1)
+            draw.text((4, top + 2), f"tile {index}", fill=(0, 120, 255))
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=quality)
+        return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    def tile_base64(self, index: int) -> Optional[str]:
+        """Full-resolution tile, if it is still cached"""
+        if not 0 <= index < self.tile_count:
+            return None
+        jpeg = self.cache.get(self.tile_keys[index])
+        return base64.b64encode(jpeg).decode("ascii") if jpeg is not None else None
+
+    def describe(self) -> str:
+        return (
+            f"Full page is {self.page_height}px tall, split into {self.tile_count} viewport tiles "
+            f"starting at page offsets {self.tile_offsets}."
+        )
+
+
+_tile_cache: Optional[TileCache] = None
+
+
+def get_tile_cache() -> TileCache:
+    """Process-wide tile cache"""
+    global _tile_cache
+    if _tile_cache is None:
+        _tile_cache = TileCache(config.FULL_PAGE_CACHE_BYTES)
+    return _tile_cache
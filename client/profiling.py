@@ -0,0 +1,250 @@
+"""
+Profiling - Low-overhead event-loop monitors and an on-demand sampling profiler
+The lag monitor and slow-callback log are cheap enough to stay on; the sampler is started and
+stopped at runtime (a "profile" WebSocket message) and writes one folded-stack file per task,
+which flamegraph.pl, speedscope and inferno read directly.
+"""
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import config
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a task that sleeps for a fixed interval"""
+
+    def __init__(self, interval: float, warn_ms: float, window: int = 240):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.samples: Deque[float] = deque(maxlen=window)  # lag in ms, most recent last
+        self.max_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = (time.perf_counter() - started - self.interval) * 1000
+            self.samples.append(lag_ms)
+            self.max_ms = max(self.max_ms, lag_ms)
+            if lag_ms >= self.warn_ms:
+                print(f"🐢 Event loop lagged {lag_ms:.0f} ms")
+
+    def stats(self) -> Dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"samples": 0}
+        return {
+            "samples": len(ordered),
+            "p50_ms": round(ordered[len(ordered) // 2], 1),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 1),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+def describe_callback(handle: asyncio.Handle) -> str:
+    """Coroutine (and where it is suspended now) for task steps, the function name otherwise"""
+    callback = handle._callback
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        frame = getattr(coro, "cr_frame", None)
+        name = getattr(coro, "__qualname__", repr(coro))
+        if frame is not None:
+            return f"{name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+        return name
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+class SlowCallbackLog:
+    """
+    Times every event-loop callback by wrapping asyncio.Handle._run (two clock reads per
+    callback, unlike loop debug mode) and keeps the ones that blocked the loop too long.
+    The wrapper is private API and applies to every loop in the process, so it is opt-in
+    """
+
+    def __init__(self, threshold_ms: float, size: int = 100):
+        self.threshold = threshold_ms / 1000
+        self.entries: Deque[Tuple[float, str, float]] = deque(maxlen=size)  # (time, callback, ms)
+        self._original_run = None
+
+    def install(self):
+        if self._original_run is not None:
+            return
+        original_run = self._original_run = asyncio.Handle._run
+        log = self
+
+        def timed_run(handle):
+            started = time.perf_counter()
+            original_run(handle)
+            elapsed = time.perf_counter() - started
+            if elapsed >= log.threshold:
+                log.record(handle, elapsed)
+
+        asyncio.Handle._run = timed_run
+
+    def uninstall(self):
+        if self._original_run is not None:
+            asyncio.Handle._run = self._original_run
+            self._original_run = None
+
+    def record(self, handle: asyncio.Handle, elapsed: float):
+        name = describe_callback(handle)
+        self.entries.append((time.time(), name, elapsed * 1000))
+        print(f"🐢 Slow callback: {name} blocked the event loop for {elapsed * 1000:.0f} ms")
+
+    def recent(self, count: int = 20) -> List[Dict]:
+        return [
+            {"time": round(at, 3), "callback": name, "ms": round(ms, 1)}
+            for at, name, ms in list(self.entries)[-count:]
+        ]
+
+
+def frame_label(code) -> str:
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)})"
+
+
+class SamplingProfiler:
+    """
+    Samples the event-loop thread's stack from a background thread and counts folded stacks
+    for every task profiled at the time (concurrent tasks all receive the shared samples)
+    """
+
+    def __init__(self, interval: float, output_dir: str):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.samples = 0
+        self._target_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = threading.Event()
+        self._lock = threading.Lock()
+        self._profiles: Dict[int, Counter] = {}  # open per-task profiles
+        self._next_profile = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running.is_set()
+
+    def start(self):
+        """Sample the calling thread (the event loop's) until stop()"""
+        if self.running:
+            return
+        self._target_thread = threading.get_ident()
+        self._running.set()
+        self._thread = threading.Thread(target=self._sample_loop, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample_loop(self):
+        code_labels: Dict[object, str] = {}  # code object -> label, so sampling formats each once
+        while self._running.is_set():
+            frame = sys._current_frames().get(self._target_thread)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = code_labels.get(code)
+                if label is None:
+                    label = code_labels[code] = frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            folded = ";".join(reversed(stack))
+            with self._lock:
+                self.samples += 1
+                for counts in self._profiles.values():
+                    counts[folded] += 1
+            time.sleep(self.interval)
+
+    def begin(self) -> Optional[int]:
+        """Open a profile for a task, None when the profiler is not running"""
+        if not self.running:
+            return None
+        with self._lock:
+            profile = self._next_profile
+            self._next_profile += 1
+            self._profiles[profile] = Counter()
+        return profile
+
+    def end(self, profile: Optional[int], name: str) -> Optional[str]:
+        """Close a task's profile and write it as folded stacks, returns the file path"""
+        if profile is None:
+            return None
+        with self._lock:
+            counts = self._profiles.pop(profile, None)
+        if not counts:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")[:40] or "task"
+        path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d_%H%M%S')}_{profile}_{slug}.folded")
+        with open(path, "w") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class Profiling:
+    """The process's monitors and profiler, controlled by the "profile" WebSocket message"""
+
+    def __init__(self):
+        self.lag = LoopLagMonitor(config.LOOP_LAG_INTERVAL, config.LOOP_LAG_WARN_MS)
+        self.slow_callbacks = SlowCallbackLog(config.SLOW_CALLBACK_MS)
+        self.profiler = SamplingProfiler(
+            config.PROFILE_SAMPLE_INTERVAL,
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+        )
+
+    def start_monitors(self):
+        """Lag monitor, and the slow-callback log if enabled; call from the running event loop"""
+        if config.LOOP_MONITOR:
+            self.lag.start()
+        if config.SLOW_CALLBACK_LOG:
+            self.slow_callbacks.install()
+
+    def handle_command(self, command: str) -> Dict:
+        """start / stop the sampling profiler, or just report (status)"""
+        if command == "start":
+            self.profiler.start()
+            print("🔬 Sampling profiler started")
+        elif command == "stop":
+            self.profiler.stop()
+            print("🔬 Sampling profiler stopped")
+        return self.status()
+
+    def status(self) -> Dict:
+        return {
+            "profiling": self.profiler.running,
+            "samples": self.profiler.samples,
+            "output_dir": self.profiler.output_dir,
+            "loop_lag": self.lag.stats(),
+            "slow_callbacks": self.slow_callbacks.recent(),
+        }
+
+
+_profiling: Optional[Profiling] = None
+
+
+def get_profiling() -> Profiling:
+    """Process-wide monitors and profiler"""
+    global _profiling
+    if _profiling is None:
+        _profiling = Profiling()
+    return _profiling
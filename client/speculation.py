@@ -0,0 +1,135 @@
+"""
+Speculation - Candidate clicks tried in background copies of the tab when the agent is unsure
+The model proposes several clicks in one call, each one runs in its own duplicated tab, the outcomes
+are scored without the model (click descriptor, frame change, words of the expected result), and only
+the winner is repeated in the real tab. Opt-in: clicking in a copy of a page must be harmless.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from action_history import REPEAT_GRID
+
+PROPOSE_TOOL = {
+    "name": "propose_clicks",
+    "description": "Candidate clicks for the next step, each tried in a background copy of the tab",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "goal": {"type": "string", "description": "What the next step should achieve"},
+            "candidates": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "coordinate": {"type": "array", "items": {"type": "integer"}, "minItems": 2, "maxItems": 2},
+                        "expected": {"type": "string", "description": "What the page shows if this click is right"}
+                    },
+                    "required": ["coordinate", "expected"]
+                }
+            }
+        },
+        "required": ["goal", "candidates"]
+    }
+}
+
+CHOOSE_TOOL = {
+    "name": "choose_result",
+    "description": "The result that best achieves the goal",
+    "input_schema": {
+        "type": "object",
+        "properties": {"index": {"type": "integer"}},
+        "required": ["index"]
+    }
+}
+
+CHANGE_SCALE = 8.0  # mean absolute pixel change that counts as a full visible reaction
+MIN_SCORE = 0.5  # below this the click did nothing useful (failed, or hit dead space and nothing moved)
+STOP_WORDS = {"the", "and", "for", "with", "page", "click", "should", "will", "shows", "show", "see", "into", "that"}
+
+
+def proposal_prompt(task: str, recent_actions: str, count: int) -> str:
+    prompt = (
+        f"You are controlling a browser to do this task: {task}\n"
+        "The last actions did not make clear progress. Look at the screenshot and propose up to "
+        f"{count} different clicks that could each be the right next step, most likely first. "
+        "They are tried in background copies of the tab and only the best one is kept. "
+        "State the goal of the next step and, for each click, what the page shows if it is right."
+    )
+    if recent_actions:
+        prompt += f"\n\nRecent actions:\n{recent_actions}"
+    return prompt
+
+
+def parse_proposal(response, count: int, model_size: Tuple[int, int]) -> Tuple[str, List[Dict]]:
+    """Goal and distinct on-screen candidates from a propose_clicks response"""
+    for block in response.content:
+        if getattr(block, "type", None) == "tool_use" and block.name == PROPOSE_TOOL["name"]:
+            proposal = block.input
+            break
+    else:
+        return "", []
+
+    candidates = []
+    seen = set()
+    for candidate in proposal.get("candidates") or []:
+        try:
+            x, y = (int(value) for value in candidate["coordinate"][:2])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not (0 <= x < model_size[0] and 0 <= y < model_size[1]):
+            continue
+        spot = (round(x / REPEAT_GRID), round(y / REPEAT_GRID))
+        if spot in seen:
+            continue
+        seen.add(spot)
+        candidates.append({"coordinate": (x, y), "expected": str(candidate.get("expected", ""))})
+    return str(proposal.get("goal", "")), candidates[:count]
+
+
+def parse_choice(response, count: int) -> Optional[int]:
+    for block in response.content:
+        if getattr(block, "type", None) == "tool_use" and block.name == CHOOSE_TOOL["name"]:
+            index = block.input.get("index")
+            if isinstance(index, int) and 0 <= index < count:
+                return index
+    return None
+
+
+def words(text: str) -> set:
+    return {word for word in re.findall(r"[a-z0-9]{3,}", text.lower()) if word not in STOP_WORDS}
+
+
+def frame_change(before: Optional[str], after: Optional[str]) -> float:
+    """Mean absolute difference of two screenshots (0-255), on every 8th pixel"""
+    if not before or not after:
+        return 0.0
+    from overlay import get_renderer
+    renderer = get_renderer()
+    first = renderer.decode(before)[::8, ::8].astype("int16")
+    second = renderer.decode(after)[::8, ::8].astype("int16")
+    if first.shape != second.shape:
+        return 255.0
+    return float(abs(first - second).mean())
+
+
+def score(trial: Dict, goal: str) -> float:
+    """
+    How promising a tried click looks: it hit something interactive, the page visibly
+    reacted, and what it hit or opened shares words with the goal and the expected result
+    """
+    result = trial["result"]
+    if not result.get("success"):
+        return 0.0
+    data = result.get("data") or {}
+    element = data.get("element") or {}
+    focus = data.get("focus") or {}
+    observed = " ".join(
+        part or "" for part in (element.get("text"), element.get("href"), data.get("navigatedTo"), focus.get("text"))
+    )
+    wanted = words(trial["candidate"]["expected"]) | words(goal)
+    overlap = len(words(observed) & wanted) / len(wanted) if wanted else 0.0
+
+    value = 1.0 if element.get("clickable") else 0.0
+    value += min(trial["change"] / CHANGE_SCALE, 1.0)
+    value += 2.0 * overlap
+    return value
@@ -0,0 +1,89 @@
+"""
+Tests for the action history ring buffer and stuck detection
+Run with: python -m pytest client
+"""
+from action_history import KEY_REPEAT_ALLOWANCE, STUCK_WINDOW, ActionHistory, ActionRecord
+
+
+def click(x, y):
+    return ActionRecord("left_click", (x, y), (x, y))
+
+
+def key(text):
+    return ActionRecord("key", text=text)
+
+
+def test_ring_buffer_evicts_oldest_records():
+    history = ActionHistory(capacity=3)
+    for x in range(5):
+        history.append(click(x * 100, 0))
+
+    assert len(history) == 3 and history.total == 5
+    assert history.render(5) == "3. Clicked at (200, 0)\n4. Clicked at (300, 0)\n5. Clicked at (400, 0)"
+    assert history.occurrences(click(0, 0)) == 0  # evicted
+    assert history.occurrences(click(403, 2)) == 1  # same spot on the repeat grid
+
+
+def test_repeating_a_click_without_progress_is_stuck():
+    history = ActionHistory()
+    levels = []
+    for _ in range(5):
+        history.append(click(500, 300))
+        levels.append(history.stuck_level())
+    assert levels == [0, 1, 2, 3, 4]
+
+
+def test_pagination_with_progress_is_not_stuck():
+    history = ActionHistory()
+    for _ in range(10):
+        history.append(click(900, 700))  # "Next"
+        history.append(ActionRecord("mouse_move", (200, 200), (200, 200)))
+        history.mark_progress()  # the next page rendered
+        assert history.stuck_level() == 0
+
+    # The same spot again after progress starts a new count
+    history.append(click(900, 700))
+    assert history.stuck_level() == 0
+
+
+def test_same_spot_only_counts_in_recent_window():
+    history = ActionHistory()
+    for _ in range(3):
+        history.append(click(900, 700))
+        for x in range(STUCK_WINDOW):
+            history.append(click(100 + x * 30, 100))
+    history.append(click(900, 700))
+    assert history.stuck_level() == 0
+
+    history.append(click(100, 400))
+    history.append(click(900, 700))
+    history.append(click(100, 500))
+    history.append(click(900, 700))
+    assert history.stuck_level() == 1  # three times in the last few records
+    assert history.occurrences(click(900, 700)) == 6
+
+
+def test_index_follows_evictions():
+    history = ActionHistory(capacity=4)
+    for x in (0, 0, 300, 0, 300, 0):
+        history.append(click(x, 0))
+    assert history.occurrences(click(0, 0)) == 2 and history.occurrences(click(300, 0)) == 2
+    assert history.stuck_level() == 0  # the same spot twice in the buffer
+    history.append(click(300, 0))
+    # The first click at 300 was evicted, so it does not count towards being stuck
+    assert history.stuck_level() == 0 and history.occurrences(click(0, 0)) == 2
+    history.append(click(300, 0))
+    assert history.stuck_level() == 1 and history.occurrences(click(0, 0)) == 1
+
+
+def test_key_presses_get_an_allowance():
+    history = ActionHistory()
+    for _ in range(5):
+        history.append(key("Tab"))
+    assert history.stuck_level() == 0
+
+    for _ in range(KEY_REPEAT_ALLOWANCE - 5 + 1):
+        history.append(key("Tab"))
+    assert history.stuck_level() == 0
+    history.append(key("Tab"))
+    assert history.stuck_level() == 1
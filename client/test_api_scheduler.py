@@ -0,0 +1,134 @@
+"""
+Tests for the API scheduler: priority order, header sync, refunds, wait estimates and 429 backoff
+Run with: python -m pytest client
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import config
+from api_scheduler import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_PARALLEL, APIScheduler, TokenBucket
+)
+
+
+def headers(input_limit=100_000, input_remaining=100_000, **extra):
+    return {
+        "anthropic-ratelimit-input-tokens-limit": str(input_limit),
+        "anthropic-ratelimit-input-tokens-remaining": str(input_remaining),
+        **extra,
+    }
+
+
+def test_bucket_refills_and_caps_big_requests():
+    bucket = TokenBucket(600)  # 10 per second
+    bucket.take(600, bucket.updated)
+    assert bucket.wait_for(5, bucket.updated) == pytest.approx(0.5)
+    assert bucket.wait_for(5, bucket.updated + 0.5) == 0
+    # More than the capacity only waits for a full bucket, so it still runs eventually
+    assert bucket.wait_for(10_000, bucket.updated) == pytest.approx(59.5)
+    assert TokenBucket(None).wait_for(10_000, 0) == 0
+
+
+def test_calls_are_released_by_priority():
+    async def run():
+        scheduler = APIScheduler(requests_per_minute=6000)  # one call per 10 ms once empty
+        scheduler.buckets["requests"].level = 0
+        granted = []
+
+        async def call(name, priority):
+            await scheduler.acquire(100, 100, priority)
+            granted.append(name)
+
+        await asyncio.gather(
+            call("background", PRIORITY_BACKGROUND),
+            call("parallel", PRIORITY_PARALLEL),
+            call("interactive", PRIORITY_INTERACTIVE),
+            call("interactive again", PRIORITY_INTERACTIVE),
+        )
+        return granted
+
+    assert asyncio.run(run()) == ["interactive", "interactive again", "parallel", "background"]
+
+
+def test_headers_sync_minus_other_calls_in_flight():
+    async def run():
+        scheduler = APIScheduler(input_tokens_per_minute=100_000)
+        first = await scheduler.acquire(10_000, 500)
+        second = await scheduler.acquire(4_000, 500)
+        assert scheduler.buckets["input_tokens"].level == pytest.approx(86_000, abs=100)
+
+        # The server counted the first call; the second one is still running
+        scheduler.complete(first, headers(100_000, 60_000))
+        assert scheduler.buckets["input_tokens"].level == 56_000
+        assert scheduler.stats()["in_flight"] == 1
+        scheduler.complete(second, {})  # no rate-limit headers: refunded
+        assert scheduler.buckets["input_tokens"].level == pytest.approx(60_000, abs=100)
+
+    asyncio.run(run())
+
+
+def test_failed_and_cancelled_calls_are_refunded():
+    async def run():
+        scheduler = APIScheduler(input_tokens_per_minute=60_000, output_tokens_per_minute=60_000)
+        bucket = scheduler.buckets["input_tokens"]
+
+        # Failed before any response: full refund
+        ticket = await scheduler.acquire(20_000, 1_000)
+        scheduler.complete(ticket)
+        assert bucket.level == pytest.approx(60_000, abs=50)
+
+        # Answered without headers: corrected to the actual usage
+        ticket = await scheduler.acquire(20_000, 1_000)
+        usage = SimpleNamespace(input_tokens=3_000, cache_read_input_tokens=2_000, output_tokens=100)
+        scheduler.complete(ticket, None, usage)
+        assert bucket.level == pytest.approx(55_000, abs=50)
+        assert scheduler.buckets["output_tokens"].level == pytest.approx(59_900, abs=50)
+
+        # Cancelled while queued: dropped without taking anything
+        bucket.level = 0
+        waiting = asyncio.create_task(scheduler.acquire(30_000, 0))
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"] == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"] == 0 and scheduler.stats()["in_flight"] == 0
+        assert bucket.level < 100
+
+    asyncio.run(run())
+
+
+def test_estimate_wait_counts_calls_queued_ahead():
+    async def run():
+        scheduler = APIScheduler(input_tokens_per_minute=60_000)  # 1000 per second
+        scheduler.buckets["input_tokens"].level = 0
+        assert scheduler.estimate_wait(2_000, 0) == pytest.approx(2.0, abs=0.05)
+
+        ahead = asyncio.create_task(scheduler.acquire(1_000, 0, PRIORITY_INTERACTIVE))
+        behind = asyncio.create_task(scheduler.acquire(5_000, 0, PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        assert scheduler.estimate_wait(2_000, 0, PRIORITY_PARALLEL) == pytest.approx(3.0, abs=0.05)
+        assert scheduler.estimate_wait(2_000, 0, PRIORITY_BACKGROUND) == pytest.approx(8.0, abs=0.05)
+        for task in (ahead, behind):
+            task.cancel()
+        await asyncio.gather(ahead, behind, return_exceptions=True)
+
+    asyncio.run(run())
+
+
+def test_backoff_pauses_every_caller():
+    async def run():
+        scheduler = APIScheduler()
+        assert scheduler.backoff({"retry-after": "2"}) == 2.0
+        assert scheduler.estimate_wait(100, 100) == pytest.approx(2.0, abs=0.05)
+
+        reset = (datetime.now(timezone.utc) + timedelta(seconds=30)).isoformat().replace("+00:00", "Z")
+        pause = APIScheduler().backoff(headers(100_000, 0, **{"anthropic-ratelimit-input-tokens-reset": reset}))
+        assert pause == pytest.approx(30, abs=1)
+        assert APIScheduler().backoff() == config.API_DEFAULT_BACKOFF
+
+    asyncio.run(run())
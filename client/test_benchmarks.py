@@ -0,0 +1,121 @@
+"""
+Micro-benchmarks for the screenshot hot path, with regression thresholds
+Run with: python -m pytest client
+"""
+import base64
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+import config
+from coordinates import CoordinateTransform
+from frame_buffer import FrameBuffer
+from overlay import OverlayRenderer
+from page_capture import FullPageCapture, TileCache
+
+# Best-of-N wall time in milliseconds, about three times what a laptop measures,
+# so the benchmarks catch regressions rather than slow machines
+GRID_BUDGET_MS = 60  # decode + grid + encode of one 1200x797 frame
+DEBUG_IMAGE_BUDGET_MS = 75  # decode + three labelled markers + quality-95 encode
+TILE_BUDGET_MS = 40  # one full-page capture tile stitched into the overview
+TRANSFORM_BUDGET_MS = 60  # 10,000 model-to-viewport mappings
+DELTA_FRAME_BUDGET_MS = 20  # patch one dirty region into a 1200x797 frame and re-encode it
+RUNS = 7
+
+
+def best_of(function, runs: int = RUNS) -> float:
+    """Fastest of `runs` calls, in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def page_screenshot(width: int = config.REAL_SCREENSHOT_WIDTH,
+                    height: int = config.REAL_SCREENSHOT_HEIGHT) -> str:
+    """Base64 JPEG with gradients, text-like rows and noise, so it compresses like a real page"""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    frame = np.stack([x * 255 // width, y * 255 // height, (x + y) % 255], axis=-1).astype(np.uint8)
+    frame[::40] = 30
+    frame += rng.integers(0, 20, frame.shape, dtype=np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(frame).save(buffer, "JPEG", quality=75)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+SCREENSHOT = page_screenshot()
+MODEL_SIZE = (config.TARGET_SCREENSHOT_WIDTH, config.TARGET_SCREENSHOT_HEIGHT)
+
+
+def test_grid_preprocessing_speed():
+    renderer = OverlayRenderer()
+    renderer.add_grid(SCREENSHOT, MODEL_SIZE, config.GRID_SPACING)  # builds the cached layer
+
+    elapsed = best_of(lambda: renderer.add_grid(SCREENSHOT, MODEL_SIZE, config.GRID_SPACING))
+    print(f"grid overlay: {elapsed:.1f} ms")
+    assert elapsed < GRID_BUDGET_MS
+
+
+def test_debug_image_speed():
+    renderer = OverlayRenderer()
+    points = [(100, 100), (600, 400), (900, 700)]
+    labels = [f"Claude: ({x}, {y})\nScaled: ({x}, {y})" for x, y in points]
+
+    def render():
+        frame = renderer.decode(SCREENSHOT)
+        renderer.draw_markers(frame, points, labels)
+        renderer.encode_jpeg(frame, quality=95)
+
+    elapsed = best_of(render)
+    print(f"debug image: {elapsed:.1f} ms")
+    assert elapsed < DEBUG_IMAGE_BUDGET_MS
+
+
+def test_full_page_tile_speed():
+    tiles = 5
+    height = config.REAL_SCREENSHOT_HEIGHT
+
+    def stitch():
+        capture = FullPageCapture(TileCache(64 * 1024 * 1024))
+        for index in range(tiles):
+            capture.add_tile({
+                "key": str(index), "data": SCREENSHOT, "index": index, "offset": index * height,
+                "pageHeight": tiles * height, "viewportWidth": config.REAL_SCREENSHOT_WIDTH,
+                "viewportHeight": height, "dpr": 1
+            })
+        capture.overview_base64()
+
+    elapsed = best_of(stitch, runs=3) / tiles
+    print(f"full-page tile: {elapsed:.1f} ms")
+    assert elapsed < TILE_BUDGET_MS
+
+
+def test_coordinate_transform_speed():
+    transform = CoordinateTransform(MODEL_SIZE, (config.REAL_SCREENSHOT_WIDTH, config.REAL_SCREENSHOT_HEIGHT))
+    points = [(i % MODEL_SIZE[0], i % MODEL_SIZE[1]) for i in range(10_000)]
+
+    elapsed = best_of(lambda: [transform.model_to_viewport(x, y) for x, y in points])
+    print(f"10k transforms: {elapsed:.1f} ms")
+    assert elapsed < TRANSFORM_BUDGET_MS
+
+
+def test_delta_frame_speed():
+    renderer = OverlayRenderer()
+    frame = renderer.decode(SCREENSHOT)
+    tile = renderer.encode_base64(np.ascontiguousarray(frame[64:128, 128:384]), quality=90)
+
+    def patch():
+        frames = FrameBuffer()
+        frames.set_keyframe(SCREENSHOT, "a")
+        frames.pixels = frame.copy()  # as if decoded by an earlier delta
+        frames.apply_delta({"frame": "b", "base": "a", "tiles": [{"x": 128, "y": 64, "data": tile}]})
+        frames.screenshot()
+
+    elapsed = best_of(patch)
+    print(f"delta frame: {elapsed:.1f} ms")
+    assert elapsed < DELTA_FRAME_BUDGET_MS
@@ -0,0 +1,133 @@
+"""
+Tests for per-task budgets: overrides, spending, limits and the seconds budget around awaits
+Run with: python -m pytest client
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import config
+from budget import BudgetExhausted, BudgetMetrics, BudgetTracker, TaskBudget, price_for
+from claude_orchestrator import ClaudeOrchestrator
+
+
+def usage(input_tokens=0, output_tokens=0, cache_write=0, cache_read=0):
+    return SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens,
+                           cache_creation_input_tokens=cache_write, cache_read_input_tokens=cache_read)
+
+
+def test_overrides_are_coerced_or_ignored():
+    budget = TaskBudget.from_config({
+        "max_cost": "0.2", "max_iterations": 5.0, "max_screenshots": None,
+        "max_seconds": "soon", "max_output_tokens": -1, "max_input_tokens": True, "unknown": 1,
+    })
+    assert budget.max_cost == 0.2
+    assert budget.max_iterations == 5 and isinstance(budget.max_iterations, int)
+    assert budget.max_screenshots is None
+    # Invalid values keep the defaults
+    assert budget.max_seconds == config.TASK_MAX_SECONDS
+    assert budget.max_output_tokens == config.TASK_MAX_OUTPUT_TOKENS
+    assert budget.max_input_tokens == config.TASK_MAX_INPUT_TOKENS
+    assert BudgetTracker(budget).exceeded() is None
+
+
+def test_cost_and_limits():
+    tracker = BudgetTracker(TaskBudget(max_cost=0.05, max_screenshots=2))
+    tracker.record_usage(usage(input_tokens=1000, output_tokens=100, cache_read=10000), "claude-sonnet-4-5")
+    assert price_for("claude-sonnet-4-5") == (3.00, 15.00)
+    assert tracker.cost == pytest.approx((1000 * 3 + 100 * 15 + 10000 * 3 * 0.1) / 1_000_000)
+    assert tracker.total_input_tokens == 11000
+    assert tracker.exceeded() is None
+
+    tracker.record_screenshot()
+    tracker.record_screenshot()
+    assert tracker.exceeded() == "screenshots"
+
+    # Cost counts as reached when the next call, at least as expensive as the last one, would go over it
+    tracker = BudgetTracker(TaskBudget(max_cost=0.05))
+    tracker.record_usage(usage(input_tokens=9000), "claude-sonnet-4-5")  # $0.027
+    assert tracker.exceeded() == "cost"
+
+
+def test_run_within_tells_budget_timeouts_from_inner_ones():
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def inner_timeout():
+        raise asyncio.TimeoutError()  # e.g. a CDP command that got no answer
+
+    async def run():
+        tracker = BudgetTracker(TaskBudget(max_seconds=0.05))
+        with pytest.raises(BudgetExhausted) as exhausted:
+            await tracker.run_within(slow())
+        assert exhausted.value.limit == "seconds"
+
+        tracker = BudgetTracker(TaskBudget(max_seconds=30))
+        with pytest.raises(asyncio.TimeoutError):
+            await tracker.run_within(inner_timeout())
+        assert await BudgetTracker(TaskBudget()).run_within(asyncio.sleep(0, "done")) == "done"
+
+    asyncio.run(run())
+
+
+def test_metrics_aggregate_per_task_type():
+    metrics = BudgetMetrics()
+    for outcome in ("completed", "budget: cost"):
+        tracker = BudgetTracker(TaskBudget())
+        tracker.iterations = 3
+        metrics.record("search", tracker, outcome)
+    search = metrics.snapshot()["search"]
+    assert search["tasks"] == 2 and search["outcomes"] == {"completed": 1, "budget: cost": 1}
+    assert search["totals"]["iterations"] == 6 and search["average"]["iterations"] == 3
+
+
+class UnresponsiveBrowser:
+    async def get_screenshot(self):
+        raise asyncio.TimeoutError()  # the browser did not answer, the budget is not spent
+
+
+def test_browser_timeout_is_not_reported_as_budget():
+    orchestrator = ClaudeOrchestrator(UnresponsiveBrowser(), client=object())
+    asyncio.run(orchestrator.execute_task("describe this page"))
+    assert orchestrator.last_report["outcome"] == "error"
+
+
+def test_parallel_sub_tasks_share_the_budget(monkeypatch):
+    class Tab:
+        tab_id = 1
+
+        async def close(self):
+            pass
+
+    class TabbedBrowser:
+        def for_tab(self, tab_id):
+            return Tab()
+
+        async def open_tab(self):
+            return Tab()
+
+    class Messages:
+        async def create(self, **kwargs):
+            response = SimpleNamespace(usage=usage(input_tokens=10_000, output_tokens=500), model="claude-sonnet-4-5",
+                                       content=[SimpleNamespace(type="text", text='["Paris", "Rome"]')])
+            return SimpleNamespace(headers={}, parse=lambda: response)
+
+    budgets = []
+
+    async def execute_task(self, task, budget=None, speculative=None):
+        budgets.append(budget)
+        return task
+
+    monkeypatch.setattr(ClaudeOrchestrator, "execute_task", execute_task)
+    client = SimpleNamespace(messages=SimpleNamespace(with_raw_response=Messages()))
+    orchestrator = ClaudeOrchestrator(TabbedBrowser(), client=client)
+    overrides = {"max_cost": 1.0, "max_screenshots": 21, "max_input_tokens": None, "max_iterations": 10}
+    assert asyncio.run(orchestrator.execute_parallel_task("weather in Paris and Rome", overrides)) == ["Paris", "Rome"]
+
+    split_cost = (10_000 * 3 + 500 * 15) / 1_000_000
+    assert len(budgets) == 2
+    for budget in budgets:
+        assert budget.max_cost == pytest.approx((1.0 - split_cost) / 2)
+        assert budget.max_screenshots == 10 and budget.max_input_tokens is None
+        assert budget.max_iterations == 10 and budget.max_seconds <= config.TASK_MAX_SECONDS
@@ -0,0 +1,108 @@
+"""
+Tests for the extension connection and tabs: heartbeat timeouts, error results, parallel sub-task tabs
+Run with: python -m pytest client
+"""
+import asyncio
+import json
+
+import pytest
+
+import config
+from chrome_adapter import ChromeAdapter
+from claude_orchestrator import ClaudeOrchestrator
+from main import BrowserAgentServer
+
+
+class SilentSocket:
+    """An extension socket that stopped reading: pings are never answered, closing takes a moment"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def ping(self):
+        return asyncio.get_running_loop().create_future()
+
+    async def close(self):
+        await asyncio.sleep(0.05)  # closing handshake, then the TCP connection is aborted
+        self.closed = True
+
+
+def test_heartbeat_timeout_closes_the_socket(monkeypatch):
+    monkeypatch.setattr(config, "HEARTBEAT_INTERVAL", 0)
+    monkeypatch.setattr(config, "HEARTBEAT_TIMEOUT", 0.01)
+    adapter = ChromeAdapter()
+    websocket = SilentSocket()
+
+    async def run():
+        await adapter.attach(websocket)
+        heartbeat = adapter._heartbeat_task
+        await asyncio.wait_for(heartbeat, 1)
+        return heartbeat
+
+    heartbeat = asyncio.run(run())
+    assert not heartbeat.cancelled()
+    assert websocket.closed
+    assert adapter.websocket is None and adapter._heartbeat_task is None
+
+
+class RecordingAdapter(ChromeAdapter):
+    """Answers open_tab with new tab ids and records every command"""
+
+    def __init__(self):
+        super().__init__()
+        self.commands = []
+
+    async def send_command(self, command, stream=None, timeout=None):
+        self.commands.append(command)
+        if command["action"] == "open_tab":
+            return {"success": True, "data": {"tabId": 100 + len(self.commands)}}
+        return {"success": True, "data": None}
+
+
+def test_parallel_task_closes_its_tabs(monkeypatch):
+    adapter = RecordingAdapter()
+    orchestrator = ClaudeOrchestrator(adapter, client=object())
+
+    async def split_task(self, task, tracker=None):
+        return ["find the weather in Paris", "find the weather in Rome"]
+
+    async def execute_task(self, task, budget=None, speculative=None):
+        self.chrome_adapter.frame_buffer()  # a tab that took screenshots has a frame buffer
+        if "Rome" in task:
+            raise RuntimeError("sub-task failed")
+        return "sunny"
+
+    monkeypatch.setattr(ClaudeOrchestrator, "split_task", split_task)
+    monkeypatch.setattr(ClaudeOrchestrator, "execute_task", execute_task)
+
+    results = asyncio.run(orchestrator.execute_parallel_task("weather in Paris and Rome"))
+
+    assert results == ["sunny", None]
+    opened = [command for command in adapter.commands if command["action"] == "open_tab"]
+    closed = [command["tabId"] for command in adapter.commands if command["action"] == "close_tab"]
+    assert len(opened) == 2 and sorted(closed) == [101, 102]
+    assert not set(adapter._frames) & set(closed)
+
+
+def test_extension_errors_reach_the_caller():
+    server = BrowserAgentServer()
+    websocket = SilentSocket()
+
+    async def run():
+        await server.chrome_adapter.attach(websocket)
+        opening = asyncio.create_task(server.chrome_adapter.open_tab())
+        await asyncio.sleep(0.01)
+        command = json.loads(websocket.sent[-1])
+        await server.handle_message(json.dumps({
+            "type": "action_result", "id": command["id"], "action": "open_tab",
+            "success": False, "data": None, "error": "Tabs cannot be edited right now"
+        }))
+        with pytest.raises(RuntimeError, match="Could not open tab: Tabs cannot be edited right now"):
+            await opening
+        server.chrome_adapter.detach(websocket)
+
+    asyncio.run(run())
@@ -0,0 +1,201 @@
+"""
+Property tests for the coordinate spaces and overlay placement
+Run with: python -m pytest client
+"""
+import numpy as np
+from hypothesis import assume, example, given, settings, strategies as st
+
+from claude_orchestrator import ClaudeOrchestrator
+from coordinates import CoordinateTransform
+from overlay import MARKER_COLOR, OverlayRenderer
+from page_capture import FullPageCapture, TileCache
+
+MODEL_SIZES = st.tuples(st.integers(320, 1568), st.integers(240, 1568))
+VIEWPORTS = st.tuples(st.integers(320, 3840), st.integers(240, 2160))
+DPRS = st.sampled_from([1, 1.25, 1.5, 2, 2.5, 3])
+
+
+def point_in(size, data):
+    return data.draw(st.integers(0, size[0] - 1)), data.draw(st.integers(0, size[1] - 1))
+
+
+def rounding_tolerance(scale: float, at_edge: bool = False) -> float:
+    """
+    Largest error of a round trip through a grid `scale` times finer (or coarser);
+    a point clamped onto the last viewport pixel can be off by one more viewport pixel
+    """
+    return (1.0 if at_edge else 0.5) / scale + 0.5
+
+
+@given(model=MODEL_SIZES, viewport=VIEWPORTS, data=st.data())
+def test_model_viewport_round_trip(model, viewport, data):
+    transform = CoordinateTransform(model, viewport)
+    x, y = point_in(model, data)
+
+    real_x, real_y = transform.model_to_viewport(x, y)
+    assert 0 <= real_x < viewport[0] and 0 <= real_y < viewport[1]
+
+    back_x, back_y = transform.viewport_to_model(real_x, real_y)
+    assert abs(back_x - x) <= rounding_tolerance(transform.scale_x, real_x == viewport[0] - 1)
+    assert abs(back_y - y) <= rounding_tolerance(transform.scale_y, real_y == viewport[1] - 1)
+    if transform.scale_x >= 1 and transform.scale_y >= 1:
+        # Viewport finer than the model: every model pixel has its own viewport pixel
+        assert (back_x, back_y) == (x, y)
+
+
+def frame_point(transform, x, y):
+    """model_to_frame, checked to land on the captured frame"""
+    frame_x, frame_y = transform.model_to_frame(x, y)
+    assert 0 <= frame_x < round(transform.viewport_width * transform.dpr)
+    assert 0 <= frame_y < round(transform.viewport_height * transform.dpr)
+    return frame_x, frame_y
+
+
+@given(model=MODEL_SIZES, viewport=VIEWPORTS, dpr=DPRS, point=st.tuples(st.integers(0, 1567), st.integers(0, 1567)))
+@example(model=(320, 1256), viewport=(320, 240), dpr=1.5, point=(0, 1255))  # last row rounded past the frame
+def test_frame_mapping_across_dprs(model, viewport, dpr, point):
+    transform = CoordinateTransform(model, viewport, dpr)
+    x, y = point[0] % model[0], point[1] % model[1]
+
+    # The frame point and the device pixel of the click differ by the click's rounding
+    # to a whole CSS pixel (half a CSS pixel, dpr / 2 device pixels) plus two roundings
+    real = transform.model_to_viewport(x, y)
+    frame_x, frame_y = frame_point(transform, x, y)
+    expected_x, expected_y = transform.viewport_to_frame(*real)
+    assert abs(frame_x - expected_x) <= dpr / 2 + 1
+    assert abs(frame_y - expected_y) <= dpr / 2 + 1
+
+    # Frames are at least as fine as the viewport, so viewport pixels survive the round trip
+    assert transform.frame_to_viewport(*transform.viewport_to_frame(*real)) == real
+
+    # The ratio measured from a captured frame gives the same mapping
+    measured = CoordinateTransform(model, viewport).with_frame_width(round(viewport[0] * dpr))
+    assert abs(measured.model_to_frame(x, y)[0] - frame_x) <= 1
+
+
+@given(model=MODEL_SIZES, viewport=VIEWPORTS, data=st.data())
+def test_orchestrator_scaling_matches_transform(model, viewport, data):
+    orchestrator = ClaudeOrchestrator(None)
+    orchestrator.target_width, orchestrator.target_height = model
+    orchestrator.real_width, orchestrator.real_height = viewport
+    x, y = point_in(model, data)
+
+    real = orchestrator.scale_coordinates(x, y)
+    assert real == CoordinateTransform(model, viewport).model_to_viewport(x, y)
+    # Monotonic: a point further right/down never lands further left/up
+    assert orchestrator.scale_coordinates(min(x + 1, model[0] - 1), y)[0] >= real[0]
+    assert orchestrator.scale_coordinates(x, min(y + 1, model[1] - 1))[1] >= real[1]
+
+
+@settings(max_examples=200)
+@given(model=MODEL_SIZES, viewport=VIEWPORTS, data=st.data())
+def test_crop_maps_into_its_region(model, viewport, data):
+    base = CoordinateTransform(model, viewport)
+    left = data.draw(st.integers(0, model[0] - 2))
+    top = data.draw(st.integers(0, model[1] - 2))
+    width = data.draw(st.integers(1, model[0] - left))
+    height = data.draw(st.integers(1, model[1] - top))
+    zoomed = base.crop((left, top, width, height))
+    x, y = point_in(model, data)
+
+    # A point of the zoomed view is the matching point of the region in the base view
+    base_x = left + x * width / model[0]
+    base_y = top + y * height / model[1]
+    expected = base.model_to_viewport(base_x, base_y)
+    real = zoomed.model_to_viewport(x, y)
+    assert abs(real[0] - expected[0]) <= 1 and abs(real[1] - expected[1]) <= 1
+
+    # The zoomed view's origin is the region's corner
+    assert zoomed.model_to_viewport(0, 0) == base.model_to_viewport(left, top)
+
+
+@given(model=MODEL_SIZES, viewport=VIEWPORTS, data=st.data())
+def test_nested_crops_compose(model, viewport, data):
+    base = CoordinateTransform(model, viewport)
+    outer = (model[0] / 4, model[1] / 4, model[0] / 2, model[1] / 2)
+    inner = (data.draw(st.integers(0, model[0] // 2)), data.draw(st.integers(0, model[1] // 2)),
+             model[0] / 2, model[1] / 2)
+    nested = base.crop(outer).crop(inner)
+
+    composed = base.crop((outer[0] + inner[0] / 2, outer[1] + inner[1] / 2, model[0] / 4, model[1] / 4))
+    x, y = point_in(model, data)
+    assert nested.model_to_viewport(x, y) == composed.model_to_viewport(x, y)
+
+
+def capture_with_offsets(offsets, viewport, page_height, dpr) -> FullPageCapture:
+    """FullPageCapture with geometry set up as if its first tile had arrived"""
+    capture = FullPageCapture(TileCache(1))
+    tile_size = (round(viewport[0] * dpr), round(viewport[1] * dpr))
+    capture._start(tile_size, {
+        "dpr": dpr, "pageHeight": page_height, "viewportWidth": viewport[0], "viewportHeight": viewport[1]
+    })
+    capture.tile_offsets = list(offsets)
+    capture.tile_keys = [str(offset) for offset in offsets]
+    return capture
+
+
+@given(viewport=st.tuples(st.integers(320, 1920), st.integers(240, 1080)), dpr=DPRS,
+       pages=st.integers(1, 10), data=st.data())
+def test_tile_offsets_map_to_page(viewport, dpr, pages, data):
+    page_height = viewport[1] * pages + data.draw(st.integers(0, viewport[1] - 1))
+    offsets = list(range(0, page_height - viewport[1] + 1, viewport[1]))
+    capture = capture_with_offsets(offsets, viewport, page_height, dpr)
+    index = data.draw(st.integers(0, len(offsets) - 1))
+
+    tile = capture.tile_transform(index)
+    x = data.draw(st.integers(0, round(viewport[0] * dpr) - 1))
+    y = data.draw(st.integers(0, round(viewport[1] * dpr) - 1))
+    page_x, page_y = tile.model_to_viewport(x, y)
+    assert abs(page_x - x / dpr) <= 1
+    assert abs(page_y - (offsets[index] + y / dpr)) <= 1
+
+    # Tile boundaries in the overview follow the page offsets at the overview's scale
+    overview = capture.overview_transform()
+    top = overview.viewport_to_model(0, offsets[index])[1]
+    assert abs(top - offsets[index] * capture.overview.height / page_height) <= 1
+
+
+@settings(max_examples=50, deadline=None)
+@given(viewport=st.tuples(st.integers(400, 1600), st.integers(300, 1000)), dpr=DPRS, data=st.data())
+def test_debug_marker_lands_on_click(viewport, dpr, data):
+    renderer = OverlayRenderer()
+    model = (1024, 768)
+    transform = CoordinateTransform(model, viewport).with_frame_width(round(viewport[0] * dpr))
+    frame = np.zeros((round(viewport[1] * dpr), round(viewport[0] * dpr), 3), np.uint8)
+
+    # Keep the whole stamp on the frame so its centroid is its center
+    margin = renderer.marker.shape[0]
+    x = data.draw(st.integers(0, model[0] - 1))
+    y = data.draw(st.integers(0, model[1] - 1))
+    frame_x, frame_y = transform.model_to_frame(x, y)
+    assume(margin <= frame_x < frame.shape[1] - margin and margin <= frame_y < frame.shape[0] - margin)
+
+    renderer.draw_markers(frame, [(frame_x, frame_y)], color=MARKER_COLOR)
+    red = frame[..., 0].astype(np.float64)
+    ys, xs = np.nonzero(red)
+    assert abs(np.average(xs, weights=red[ys, xs]) - frame_x) <= 1
+    assert abs(np.average(ys, weights=red[ys, xs]) - frame_y) <= 1
+
+
+@settings(max_examples=30, deadline=None)
+@given(frame_size=st.tuples(st.integers(200, 1600), st.integers(200, 1200)),
+       model=st.tuples(st.integers(300, 1400), st.integers(300, 1000)),
+       spacing=st.sampled_from([50, 100, 200]))
+def test_grid_lines_follow_model_coordinates(frame_size, model, spacing):
+    renderer = OverlayRenderer()
+    frame = np.zeros((frame_size[1], frame_size[0], 3), np.uint8)
+    renderer.draw_grid(frame, model, spacing)
+    transform = CoordinateTransform(model, frame_size)
+
+    columns = {transform.model_to_viewport(x, 0)[0] for x in range(spacing, model[0], spacing)}
+    rows = {transform.model_to_viewport(0, y)[1] for y in range(spacing, model[1], spacing)}
+    assert set(np.flatnonzero(frame[:, frame_size[0] - 1, 0])) >= rows
+
+    # A row clear of horizontal lines and of the x labels along the top: right of the
+    # y labels (left edge), it is painted exactly at the grid columns, in the grid color
+    label_width = 40
+    row = next(y for y in range(frame_size[1] - 1, 20, -1) if not rows & {y - 1, y, y + 1})
+    painted = set(np.flatnonzero(frame[row, label_width:, 0]) + label_width)
+    assert painted == {x for x in columns if x >= label_width}
+    assert not frame[row, :, 1].any()
+    assert all(frame[row, x, 0] == frame[row, x, 2] for x in painted)
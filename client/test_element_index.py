@@ -0,0 +1,91 @@
+"""
+Tests for click descriptors: the per-URL spatial index and the click tool results
+Run with: python -m pytest client
+"""
+import asyncio
+
+from claude_orchestrator import ClaudeOrchestrator
+from element_index import ElementIndex, describe_click
+
+URL = "https://example.com/login"
+
+
+def element(role, text, x, y, width, height, **extra):
+    return {"tag": "div", "role": role, "text": text, "href": None,
+            "rect": {"x": x, "y": y, "width": width, "height": height}, **extra}
+
+
+def test_lookup_returns_smallest_element_containing_point():
+    index = ElementIndex(cell_size=100, max_pages=2)
+    form = element("form", "", 0, 0, 600, 400)
+    button = element("button", "Sign in", 180, 190, 80, 30)
+    index.add(URL, form)
+    index.add(URL, button)
+
+    assert index.at(URL, 200, 200) is button  # spans the cells around (200, 200)
+    assert index.at(URL, 255, 215) is button
+    assert index.at(URL, 50, 50) is form
+    assert index.at(URL, 700, 50) is None
+    assert index.at("https://example.com/other", 200, 200) is None
+
+    # Same rect again (e.g. the button's label changed): replaced, not duplicated
+    index.add(URL, element("button", "Signing in...", 180, 190, 80, 30))
+    assert index.at(URL, 200, 200)["text"] == "Signing in..."
+
+
+def test_least_recently_used_pages_are_evicted():
+    index = ElementIndex(cell_size=100, max_pages=2)
+    for url in ("a", "b"):
+        index.add(url, element("link", url, 0, 0, 10, 10))
+    index.at("a", 5, 5)
+    index.add("c", element("link", "c", 0, 0, 10, 10))
+    assert index.at("b", 5, 5) is None and index.at("a", 5, 5) is not None and len(index) == 2
+
+
+def test_click_result_text():
+    link = element("link", "Pricing", 10, 10, 60, 20, href="https://example.com/pricing", clickable=True)
+    assert describe_click(40, 20, {"element": link, "url": URL, "navigatedTo": "https://example.com/pricing"}) == (
+        'Clicked at (40, 20) on link "Pricing" -> https://example.com/pricing. '
+        "Navigating to https://example.com/pricing."
+    )
+    field = element("textbox", "Email", 10, 50, 200, 30, clickable=True)
+    assert describe_click(40, 60, {"element": field, "focus": field, "url": URL}) == (
+        'Clicked at (40, 60) on textbox "Email". It has focus.'
+    )
+    assert describe_click(40, 60, None) == "Clicked at (40, 60)"
+
+
+class FakeAdapter:
+    """Answers clicks like clickAt() in the extension, for an email field at the top of the page"""
+
+    def __init__(self):
+        self.field = element("textbox", "Email", 100, 500, 300, 40, clickable=True)
+        self.moves = []
+
+    async def click(self, x, y, button="left"):
+        return {"success": True, "data": {"element": self.field, "focus": self.field, "url": URL,
+                                          "scroll": {"x": 0, "y": 400}}}
+
+    async def mouse_move(self, x, y):
+        self.moves.append((x, y))
+        return {"success": True}
+
+
+def test_orchestrator_reports_and_caches_click_targets():
+    orchestrator = ClaudeOrchestrator(FakeAdapter())
+    orchestrator.real_width, orchestrator.real_height = orchestrator.target_width, orchestrator.target_height
+
+    async def run():
+        clicked = await orchestrator.execute_computer_action(
+            "computer", {"action": "left_click", "coordinate": [150, 120]})
+        hovered = await orchestrator.execute_computer_action(
+            "computer", {"action": "mouse_move", "coordinate": [300, 110]})
+        elsewhere = await orchestrator.execute_computer_action(
+            "computer", {"action": "mouse_move", "coordinate": [600, 300]})
+        return clicked, hovered, elsewhere
+
+    clicked, hovered, elsewhere = asyncio.run(run())
+    assert clicked == 'Clicked at (150, 120) on textbox "Email". It has focus.'
+    # The page is scrolled by 400px, so viewport (300, 110) is page (300, 510): the field
+    assert hovered == 'Moved mouse to (300, 110), over textbox "Email"'
+    assert elsewhere == "Moved mouse to (600, 300)"
@@ -0,0 +1,114 @@
+"""
+Tests for delta screenshots: patching the frame buffer and the screenshot round trip
+Run with: python -m pytest client
+"""
+import asyncio
+import base64
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from chrome_adapter import BrowserCommands
+from frame_buffer import FrameBuffer
+
+TILE = 64  # DELTA_TILE in background.js
+
+
+def encode(frame: np.ndarray, quality: int = 90) -> str:
+    buffer = BytesIO()
+    Image.fromarray(frame).save(buffer, "JPEG", quality=quality)
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def decode(data: str) -> np.ndarray:
+    return np.array(Image.open(BytesIO(base64.b64decode(data))).convert("RGB"))
+
+
+def page(height: int = 480, width: int = 640) -> np.ndarray:
+    y, x = np.mgrid[0:height, 0:width]
+    return np.stack([x % 256, y % 256, (x // 4 + y // 4) % 256], axis=-1).astype(np.uint8)
+
+
+def delta_message(previous: np.ndarray, current: np.ndarray, base: str, frame: str) -> dict:
+    """What the extension sends: changed TILE blocks, merged into runs along each row"""
+    height, width = current.shape[:2]
+    tiles = []
+    for top in range(0, height, TILE):
+        column = 0
+        while column * TILE < width:
+            changed = lambda c: not np.array_equal(previous[top:top + TILE, c * TILE:(c + 1) * TILE],
+                                                   current[top:top + TILE, c * TILE:(c + 1) * TILE])
+            if not changed(column):
+                column += 1
+                continue
+            start = column
+            while column * TILE < width and changed(column):
+                column += 1
+            region = current[top:top + TILE, start * TILE:column * TILE]
+            tiles.append({"x": start * TILE, "y": top, "width": region.shape[1], "height": region.shape[0],
+                          "data": encode(region)})
+    return {"type": "frame", "frame": frame, "base": base, "tiles": tiles}
+
+
+def test_delta_patches_only_changed_regions():
+    first = page()
+    second = first.copy()
+    second[80:110, 144:230] = 255  # text typed into a field
+    keyframe = encode(first)
+
+    frames = FrameBuffer()
+    frames.receive({"type": "frame", "frame": "a", "data": keyframe})
+    assert frames.screenshot() == keyframe  # passed through without decoding
+
+    # The extension compares decoded captures: JPEG encodes each 16px MCU on its own,
+    # so the page decodes to identical pixels a chroma pixel away from the change
+    captured = decode(encode(second))
+    message = delta_message(decode(keyframe), captured, "a", "b")
+    assert [(tile["x"], tile["y"], tile["width"]) for tile in message["tiles"]] == [(128, 64, 2 * TILE)]
+    frames.receive(message)
+
+    assert frames.frame_id == "b"
+    patched = frames.pixels.astype(int)
+    assert np.abs(patched[64:128, 128:256] - captured[64:128, 128:256]).mean() < 2  # tiles are re-encoded
+    assert np.array_equal(frames.pixels[300:], decode(keyframe)[300:])  # untouched rows
+    assert sum(len(tile["data"]) for tile in message["tiles"]) < len(keyframe) / 10
+    assert np.abs(decode(frames.screenshot()).astype(int) - second).mean() < 3
+
+
+def test_delta_against_another_frame_is_dropped():
+    frames = FrameBuffer()
+    frames.receive({"type": "frame", "frame": "a", "data": encode(page())})
+    frames.receive({"type": "frame", "frame": "c", "base": "b", "tiles": []})
+    assert frames.frame_id is None and frames.screenshot() is None
+
+
+class FakeExtension(BrowserCommands):
+    """Answers screenshot commands like background.js, streaming frames to the handler"""
+
+    def __init__(self, messages):
+        self.frames = FrameBuffer()
+        self.messages = list(messages)
+        self.requested = []
+
+    def frame_buffer(self):
+        return self.frames
+
+    async def send_command(self, command, stream=None, timeout=None):
+        self.requested.append(command.get("delta"))
+        stream(self.messages.pop(0))
+        return {"success": True}
+
+
+def test_get_screenshot_asks_for_keyframe_when_delta_does_not_apply():
+    keyframe = encode(page())
+    adapter = FakeExtension([
+        {"type": "frame", "frame": "a", "data": keyframe},
+        {"type": "frame", "frame": "c", "base": "b", "tiles": []},  # the extension lost track of "a"
+        {"type": "frame", "frame": "d", "data": keyframe},
+    ])
+
+    assert asyncio.run(adapter.get_screenshot()) == keyframe
+    assert asyncio.run(adapter.get_screenshot()) == keyframe
+    assert adapter.requested == [None, "a", None]
+    assert adapter.frames.frame_id == "d"
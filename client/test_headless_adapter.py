@@ -0,0 +1,182 @@
+"""
+Tests for the headless Chromium backend: key parsing and result shapes against a fake DevTools
+connection, and a run against a real Chromium (skipped when none is installed)
+Run with: python -m pytest client
+"""
+import asyncio
+import base64
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from headless_adapter import HeadlessBrowser, HeadlessChromeAdapter, find_chromium
+
+
+class FakeConnection:
+    """Records CDP commands; `answers` maps a method (or Runtime.evaluate expression) to its result"""
+
+    def __init__(self, answers=None):
+        self.sent = []
+        self.answers = answers or {}
+
+    async def send(self, method, params=None, session_id=None):
+        self.sent.append((method, params or {}, session_id))
+        if method == "Runtime.evaluate":
+            expression = params["expression"]
+            for key, value in self.answers.items():
+                if key in expression:
+                    return {"result": {"value": value}}
+            return {"result": {}}
+        return self.answers.get(method, {})
+
+
+def adapter_with(answers=None) -> HeadlessChromeAdapter:
+    adapter = HeadlessChromeAdapter(FakeConnection(answers), "context-1")
+    adapter.tabs = [{"target_id": "target-1", "session_id": "session-1"}]
+    return adapter
+
+
+def key_events(key: str):
+    adapter = adapter_with()
+    result = asyncio.run(adapter.key_press(key))
+    assert result == {"success": True, "data": None}
+    return [params for method, params, _ in adapter.connection.sent if method == "Input.dispatchKeyEvent"]
+
+
+def test_key_press_parsing():
+    down, up = key_events("Return")
+    assert down["type"] == "keyDown" and down["key"] == "Enter" and down["text"] == "\r"
+    assert down["windowsVirtualKeyCode"] == 13 and up["type"] == "keyUp"
+
+    # A shortcut sends no text, so it does not type the letter
+    down, _ = key_events("ctrl+a")
+    assert down["type"] == "rawKeyDown" and down["key"] == "a" and down["code"] == "KeyA"
+    assert down["modifiers"] == 2 and "text" not in down
+
+    down, _ = key_events("shift+Tab")
+    assert down["key"] == "Tab" and down["modifiers"] == 8 and down["code"] == "Tab"
+
+    down, _ = key_events("space")
+    assert down["key"] == " " and down["code"] == "Space" and down["text"] == " "
+
+    down, _ = key_events("7")
+    assert down["code"] == "Digit7" and down["text"] == "7" and down["modifiers"] == 0
+
+    down, _ = key_events("+")
+    assert down["key"] == "+" and down["text"] == "+"
+
+    down, _ = key_events("ctrl+shift+Page_Down")
+    assert down["key"] == "PageDown" and down["modifiers"] == 10
+
+
+def test_result_shapes():
+    element = {"tag": "a", "role": "link", "text": "Next", "href": "https://example.com/2",
+               "rect": {"x": 10, "y": 10, "width": 40, "height": 20}, "clickable": True}
+    adapter = adapter_with({
+        "elementFromPoint": {"element": element, "url": "https://example.com/1", "scroll": {"x": 0, "y": 0}},
+        "document.activeElement": {"focus": None, "url": "https://example.com/2"},
+        "Page.captureScreenshot": {"data": "anBlZw=="},
+    })
+
+    clicked = asyncio.run(adapter.click(20, 20))
+    assert clicked["success"] and clicked["data"]["element"] == element
+    assert clicked["data"]["navigatedTo"] == "https://example.com/2" and clicked["data"]["focus"] is None
+    pressed = [params["type"] for method, params, _ in adapter.connection.sent if method == "Input.dispatchMouseEvent"]
+    assert pressed == ["mouseMoved", "mousePressed", "mouseReleased"]
+    assert all(session == "session-1" for _, _, session in adapter.connection.sent)
+
+    assert asyncio.run(adapter.get_screenshot()) == "anBlZw==" and adapter.last_screenshot == "anBlZw=="
+    assert asyncio.run(adapter.mouse_move(5, 6)) == {"success": True, "data": {"x": 5, "y": 6}}
+    assert asyncio.run(adapter.switch_tab(3)) == {"success": False, "data": None, "error": "Invalid tab index"}
+
+    missed = asyncio.run(adapter_with().click(20, 20))
+    assert missed == {"success": False, "data": None, "error": "No element found at coordinates"}
+
+    batch = adapter_with({"steps.map": [{"selector": "#a", "success": True}, {"selector": "#b", "success": False}]})
+    result = asyncio.run(batch.batch([{"op": "fill", "selector": "#a", "value": "x"}]))
+    assert not result["success"] and len(result["data"]["results"]) == 2
+
+
+PAGE = b"""<!doctype html>
+<html><body style="margin:0">
+  <button id="go" style="position:absolute; left:100px; top:100px; width:200px; height:50px"
+          onclick="document.title = 'clicked'">Go</button>
+  <input id="email" name="email" placeholder="Email"
+         style="position:absolute; left:100px; top:200px; width:200px; height:30px">
+  <a id="next" href="/next" style="position:absolute; left:100px; top:300px">Next page</a>
+</body></html>"""
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAGE if self.path == "/" else b"<!doctype html><title>next</title><p>Page two</p>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def page_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+async def evaluate(adapter, expression):
+    try:
+        evaluated = await adapter._send("Runtime.evaluate", {"expression": expression, "returnByValue": True})
+    except RuntimeError:
+        return None  # the page is navigating
+    return evaluated.get("result", {}).get("value")
+
+
+@pytest.mark.skipif(find_chromium() is None, reason="no Chromium installed (set CHROMIUM_PATH)")
+def test_headless_chromium_end_to_end(page_server):
+    async def run():
+        browser = HeadlessBrowser()
+        await browser.launch()
+        try:
+            adapter = await browser.new_adapter()
+            assert (await adapter.navigate(page_server + "/"))["success"]
+
+            screenshot = base64.b64decode(await adapter.get_screenshot())
+            assert screenshot[:2] == b"\xff\xd8"  # JPEG
+
+            clicked = await adapter.click(150, 120)
+            assert clicked["success"] and clicked["data"]["element"]["role"] == "button"
+            assert clicked["data"]["element"]["text"] == "Go"
+            assert await evaluate(adapter, "document.title") == "clicked"
+
+            clicked = await adapter.click(150, 215)
+            assert clicked["data"]["focus"]["tag"] == "input"
+            await adapter.type_text("a@b.com")
+            snapshot = await adapter.dom_snapshot()
+            fields = snapshot["data"]["fields"]
+            assert [(field["name"], field["filled"]) for field in fields] == [("email", True)]
+
+            filled = await adapter.batch([{"op": "fill", "selector": "#email", "value": "c@d.com"}])
+            assert filled["success"]
+
+            clicked = await adapter.click(110, 308)
+            assert clicked["data"]["element"]["role"] == "link"
+            # navigatedTo is only set when the navigation commits within the click settle time
+            for _ in range(50):
+                if await evaluate(adapter, "location.href") == page_server + "/next":
+                    break
+                await asyncio.sleep(0.1)
+            else:
+                pytest.fail("the link click did not navigate")
+            await adapter.close()
+        finally:
+            await browser.close()
+
+    asyncio.run(run())
@@ -0,0 +1,181 @@
+"""
+Tests for the deterministic fast paths: navigation targets, form values and where they are filled
+Run with: python -m pytest client
+"""
+import asyncio
+from types import SimpleNamespace
+
+import intent
+from claude_orchestrator import ClaudeOrchestrator
+
+
+def test_task_navigation_targets():
+    assert intent.task_navigation_target("Go to example.com and sign up") == "https://example.com"
+    assert intent.task_navigation_target("search bing for python asyncio") == (
+        "https://www.bing.com/search?q=python+asyncio")
+    assert intent.task_navigation_target("Summarize report.pdf") is None
+
+
+def test_address_bar_target():
+    actions = [{"action": "key", "text": "ctrl+l"}, {"action": "type", "text": "example.org\n"}]
+    assert intent.address_bar_target("I'll navigate to example.org", actions) == "https://example.org"
+    assert intent.address_bar_target("Typing the name", [{"action": "type", "text": "hello"}]) is None
+
+
+def test_field_values():
+    assert intent.parse_field_values(
+        "Log in on example.com with username alice and password 'correct horse'"
+    ) == {"username": "alice", "password": "correct horse"}
+    assert intent.parse_field_values("first name: Ada, last name: Lovelace, email a@b.com") == {
+        "first_name": "Ada", "last_name": "Lovelace", "email": "a@b.com"
+    }
+    assert intent.parse_field_values("search Google for the login form") == {}
+
+
+def test_common_words_are_not_values():
+    # "login" is a username alias only with a separator
+    assert intent.parse_field_values("Find the login page on example.org and login as bob") == {"username": "bob"}
+    assert intent.parse_field_values("Open the login form") == {}
+    # Two-word aliases, and an alias that is rejected does not swallow the next one
+    assert intent.parse_field_values("company name: Acme Corp, email address: a@b.com") == {
+        "company": "Acme Corp", "email": "a@b.com"
+    }
+    assert intent.parse_field_values("type the username password: hunter2") == {"password": "hunter2"}
+
+
+def test_fill_steps_only_on_the_named_host():
+    assert intent.same_host("https://www.example.org/login", "https://example.org")
+    assert not intent.same_host("https://example.org.evil.com/login", "https://example.org")
+    assert not intent.same_host("https://example.org", None)
+
+    fields = [{"selector": "#user", "name": "username"}, {"selector": "#pass", "type": "password"}]
+    steps = intent.match_form_fields(fields, {"password": "x", "username": "bob"}, "https://example.org/login")
+    assert [(step["selector"], step["host"]) for step in steps] == [("#pass", "example.org"), ("#user", "example.org")]
+
+
+class LoginPage:
+    def __init__(self, url):
+        self.url = url
+        self.batches = []
+        self.snapshots = 0
+
+    async def dom_snapshot(self):
+        self.snapshots += 1
+        return {"success": True, "data": {"url": self.url, "fields": [{"selector": "#pass", "type": "password"}]}}
+
+    async def batch(self, steps):
+        self.batches.append(steps)
+        return {"success": True, "data": {"results": [{"success": True} for _ in steps]}}
+
+
+def test_orchestrator_fills_only_on_the_task_host():
+    task = "Log in to example.org with password hunter2"
+    for url, filled in (("https://example.org/login", True), ("https://phishing.example.net/login", False)):
+        page = LoginPage(url)
+        orchestrator = ClaudeOrchestrator(page)
+        orchestrator.fill_url = intent.find_url(task)
+        orchestrator.pending_fields = intent.parse_field_values(task)
+        asyncio.run(orchestrator.fill_known_fields())
+        assert bool(page.batches) == filled
+        assert ("password" in orchestrator.pending_fields) != filled
+
+
+def test_unmatched_fields_stop_taking_snapshots():
+    page = LoginPage("https://example.org/login")
+    orchestrator = ClaudeOrchestrator(page)
+    orchestrator.fill_url = "https://example.org"
+    orchestrator.pending_fields = {"username": "bob"}  # the page only has a password field
+    for _ in range(intent.FILL_MAX_MISSES + 2):
+        if orchestrator.pending_fields:
+            asyncio.run(orchestrator.fill_known_fields())
+    assert page.snapshots == intent.FILL_MAX_MISSES and not page.batches
+    assert orchestrator.pending_fields == {}
+
+
+def test_search_fast_path_needs_an_engine():
+    assert intent.search_url("google best pizza") == "https://www.google.com/search?q=best+pizza"
+    assert intent.search_url("search for cats on bing") == "https://www.bing.com/search?q=cats"
+    # A site or app, not a web search: the task text must not go to a search engine
+    assert intent.task_navigation_target("Search my Gmail inbox for invoices") is None
+    assert intent.task_navigation_target("Search Hugging Face for papers about UI Agents") is None
+    assert intent.task_navigation_target("look up the weather") is None
+
+    assert intent.is_blank_page("about:blank") and intent.is_blank_page("chrome://newtab/")
+    assert not intent.is_blank_page("https://mail.google.com/mail/u/0/#inbox")
+    assert not intent.is_blank_page(None)
+
+
+class Tab:
+    """Adapter for the start of a task: a current URL, navigation that may fail, recorded actions"""
+
+    def __init__(self, url, navigation_works=True):
+        self.url = url
+        self.navigation_works = navigation_works
+        self.actions = []
+
+    async def current_url(self):
+        return self.url
+
+    async def navigate(self, url):
+        self.actions.append(("navigate", url))
+        if not self.navigation_works:
+            return {"success": False, "error": "Cannot access a chrome:// URL"}
+        self.url = url
+        return {"success": True}
+
+    async def get_screenshot(self):
+        return "c2NyZWVu"
+
+    async def key_press(self, key):
+        self.actions.append(("key", key))
+        return {"success": True}
+
+    async def type_text(self, text):
+        self.actions.append(("type", text))
+        return {"success": True}
+
+
+def scripted_client(*turns):
+    """API client answering each call with the next list of computer tool inputs, then ending the turn"""
+    usage = SimpleNamespace(input_tokens=10, output_tokens=10, cache_creation_input_tokens=0, cache_read_input_tokens=0)
+    responses = [
+        SimpleNamespace(stop_reason="tool_use", usage=usage, content=[
+            SimpleNamespace(type="text", text=text),
+            *(SimpleNamespace(type="tool_use", name="computer", id=f"tool{i}", input=tool_input)
+              for i, tool_input in enumerate(inputs))
+        ])
+        for text, inputs in turns
+    ] + [SimpleNamespace(stop_reason="end_turn", usage=usage, content=[SimpleNamespace(type="text", text="Done")])]
+
+    class Raw:
+        async def create(self, **kwargs):
+            response = responses.pop(0)
+            return SimpleNamespace(headers={}, parse=lambda: response)
+
+    return SimpleNamespace(beta=SimpleNamespace(messages=SimpleNamespace(with_raw_response=Raw())))
+
+
+def run_task(tab, task, client):
+    orchestrator = ClaudeOrchestrator(tab, client=client)
+    orchestrator.save_debug_image = lambda *args, **kwargs: None
+    asyncio.run(orchestrator.execute_task(task))
+    return orchestrator
+
+
+def test_search_does_not_replace_an_open_page():
+    tab = Tab("https://mail.example.com/inbox")
+    run_task(tab, "search google for invoices", scripted_client())
+    assert tab.actions == []
+
+    tab = Tab("chrome://newtab/")
+    run_task(tab, "search google for invoices", scripted_client())
+    assert tab.actions == [("navigate", "https://www.google.com/search?q=invoices")]
+
+
+def test_failed_direct_navigation_runs_the_models_actions():
+    tab = Tab("about:blank", navigation_works=False)
+    client = scripted_client(("I'll navigate to example.org through the address bar",
+                              [{"action": "key", "text": "ctrl+l"}, {"action": "type", "text": "example.org\n"}]))
+    orchestrator = run_task(tab, "open the docs", client)
+    assert tab.actions == [("navigate", "https://example.org"), ("key", "ctrl+l"), ("type", "example.org\n")]
+    assert "Not executed" not in str(orchestrator.messages)
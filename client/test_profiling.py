@@ -0,0 +1,82 @@
+"""
+Tests for the event-loop monitors and the sampling profiler
+Run with: python -m pytest client
+"""
+import asyncio
+import time
+
+import config
+from profiling import LoopLagMonitor, Profiling, SamplingProfiler, SlowCallbackLog
+
+
+async def blocking_step():
+    await asyncio.sleep(0)
+    time.sleep(0.06)  # e.g. synchronous PIL work on the event loop
+
+
+def test_slow_callback_names_the_coroutine():
+    log = SlowCallbackLog(threshold_ms=40)
+    log.install()
+    try:
+        asyncio.run(blocking_step())
+    finally:
+        log.uninstall()
+
+    assert [entry["callback"].split(" ")[0] for entry in log.recent()] == ["blocking_step"]
+    assert log.recent()[0]["ms"] >= 40
+
+
+def test_slow_callback_log_is_opt_in(monkeypatch):
+    original_run = asyncio.Handle._run
+
+    async def run(profiling):
+        profiling.start_monitors()
+        patched = asyncio.Handle._run is not original_run
+        profiling.lag.stop()
+        profiling.slow_callbacks.uninstall()
+        return patched
+
+    assert not asyncio.run(run(Profiling()))
+    monkeypatch.setattr(config, "SLOW_CALLBACK_LOG", True)
+    assert asyncio.run(run(Profiling()))
+    assert asyncio.Handle._run is original_run
+
+
+def test_lag_monitor_measures_blocked_loop():
+    async def run():
+        monitor = LoopLagMonitor(interval=0.01, warn_ms=1000)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.1)
+        await asyncio.sleep(0.03)
+        monitor.stop()
+        return monitor.stats()
+
+    stats = asyncio.run(run())
+    assert stats["samples"] >= 3
+    assert stats["max_ms"] >= 80
+    assert stats["p50_ms"] < 50
+
+
+def busy_work(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+def test_profiler_writes_folded_stacks(tmp_path):
+    profiler = SamplingProfiler(interval=0.002, output_dir=str(tmp_path))
+    assert profiler.begin() is None  # nothing to attribute while stopped
+
+    profiler.start()
+    profile = profiler.begin()
+    busy_work(0.2)
+    path = profiler.end(profile, "Search for flights: Paris -> Rome")
+    profiler.stop()
+
+    assert path.startswith(str(tmp_path)) and path.endswith("search-for-flights-paris-rome.folded")
+    lines = open(path).read().splitlines()
+    stacks = {line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1]) for line in lines}
+    assert sum(stacks.values()) >= 20
+    busy = sum(count for stack, count in stacks.items() if "busy_work (test_profiling.py)" in stack)
+    assert busy >= 0.8 * sum(stacks.values())
@@ -0,0 +1,127 @@
+"""
+Tests for speculative candidate clicks: proposal parsing, scoring and the commit in the real tab
+Run with: python -m pytest client
+"""
+import asyncio
+import base64
+from io import BytesIO
+from types import SimpleNamespace
+
+from PIL import Image
+
+import config
+import speculation
+from claude_orchestrator import ClaudeOrchestrator
+
+MODEL_SIZE = (config.TARGET_SCREENSHOT_WIDTH, config.TARGET_SCREENSHOT_HEIGHT)
+
+
+def jpeg(color) -> str:
+    buffer = BytesIO()
+    Image.new("RGB", (120, 80), color).save(buffer, "JPEG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def tool_response(name, tool_input):
+    usage = SimpleNamespace(input_tokens=1000, output_tokens=50,
+                            cache_creation_input_tokens=0, cache_read_input_tokens=0)
+    return SimpleNamespace(content=[SimpleNamespace(type="tool_use", name=name, id=name, input=tool_input)],
+                           stop_reason="tool_use", usage=usage)
+
+
+def proposal(*candidates, goal="Open the pricing page"):
+    return tool_response("propose_clicks", {"goal": goal, "candidates": [
+        {"coordinate": list(coordinate), "expected": expected} for coordinate, expected in candidates
+    ]})
+
+
+def test_proposal_drops_duplicates_and_off_screen_clicks():
+    response = proposal(((100, 50), "Pricing page"), ((103, 52), "same spot"), ((5000, 10), "off screen"),
+                        ((400, 300), "Login form"), ((600, 300), "one too many"))
+    goal, candidates = speculation.parse_proposal(response, 2, MODEL_SIZE)
+    assert goal == "Open the pricing page"
+    assert [candidate["coordinate"] for candidate in candidates] == [(100, 50), (400, 300)]
+
+
+def test_score_prefers_visible_reactions_matching_the_goal():
+    def trial(element, change, **data):
+        return {"candidate": {"coordinate": (0, 0), "expected": "Pricing plans"}, "change": change,
+                "result": {"success": True, "data": {"element": element, **data}}}
+
+    dead_space = trial({"text": "", "clickable": False}, 0.0)
+    login = trial({"text": "Log in", "clickable": True}, 20.0)
+    pricing = trial({"text": "Pricing", "clickable": True}, 20.0, navigatedTo="https://example.com/pricing")
+
+    scores = [speculation.score(t, "Open the pricing page") for t in (dead_space, login, pricing)]
+    assert scores[0] < speculation.MIN_SCORE <= scores[1] < scores[2]
+    assert speculation.score({**login, "result": {"success": False}}, "") == 0.0
+
+
+class FakeMessages:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    @property
+    def with_raw_response(self):
+        messages = self
+
+        class Raw:
+            async def create(self, **kwargs):
+                messages.requests.append(kwargs)
+                response = messages.responses.pop(0)
+                return SimpleNamespace(headers={}, parse=lambda: response)
+        return Raw()
+
+
+class Page:
+    """A page with a dead area on the left and a pricing link on the right, as clickAt() reports them"""
+
+    def __init__(self):
+        self.clicks = []
+        self.clones_closed = 0
+
+    def outcome(self, x):
+        if x < 600:
+            return {"element": {"tag": "div", "text": "", "clickable": False}, "url": "https://example.com"}, (240, 240, 240)
+        return {"element": {"tag": "a", "role": "link", "text": "Pricing", "clickable": True},
+                "url": "https://example.com", "navigatedTo": "https://example.com/pricing"}, (20, 90, 200)
+
+    async def click(self, x, y, button="left"):
+        self.clicks.append((x, y))
+        return {"success": True, "data": self.outcome(x)[0]}
+
+    async def duplicate_tab(self):
+        page = self
+
+        class Clone:
+            frame = jpeg((240, 240, 240))
+
+            async def get_screenshot(self):
+                return self.frame
+
+            async def click(self, x, y, button="left"):
+                data, color = page.outcome(x)
+                self.frame = jpeg(color)
+                return {"success": True, "data": data}
+
+            async def close(self):
+                page.clones_closed += 1
+        return Clone()
+
+
+def test_speculation_commits_only_the_best_candidate(monkeypatch):
+    monkeypatch.setattr(config, "SPECULATIVE_SETTLE", 0)
+    page = Page()
+    messages = FakeMessages([proposal(((100, 100), "Pricing page"), ((900, 100), "Pricing page"))])
+    orchestrator = ClaudeOrchestrator(page, client=SimpleNamespace(messages=messages))
+    orchestrator.real_width, orchestrator.real_height = MODEL_SIZE
+    orchestrator.tracker = SimpleNamespace(record_usage=lambda *args: None, record_screenshot=lambda: None)
+
+    committed = asyncio.run(orchestrator.speculate("check the pricing", jpeg((240, 240, 240))))
+
+    assert committed
+    assert page.clicks == [(900, 100)] and page.clones_closed == 2
+    assert len(messages.requests) == 1  # one candidate did something, no verification call
+    assert orchestrator.history.render(1) == "1. Clicked at (900, 100)"
+    assert 'kept the best one: Clicked at (900, 100) on link "Pricing"' in orchestrator.speculation_note
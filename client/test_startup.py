@@ -0,0 +1,49 @@
+"""
+Startup benchmark for the backend entry point
+Run with: python -m pytest client
+"""
+import os
+import subprocess
+import sys
+import time
+
+CLIENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cold start of `import main` + server construction, interpreter startup included
+# (the subprocess is timed from outside).
+# Importing anthropic eagerly alone costs ~1s, well above this budget.
+STARTUP_BUDGET_SECONDS = 0.5
+HEAVY_MODULES = ("anthropic", "PIL", "numpy", "headless_adapter", "overlay")
+
+
+def run_in_fresh_interpreter(code: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=CLIENT_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_entry_point_does_not_import_heavy_modules():
+    loaded = run_in_fresh_interpreter(
+        "import sys, main\n"
+        "server = main.BrowserAgentServer()\n"
+        f"print('loaded:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert loaded == "loaded:"
+
+
+def test_startup_time():
+    # Best of three, so a noisy machine doesn't fail the benchmark
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        run_in_fresh_interpreter("import main\nmain.BrowserAgentServer()\nprint('started')")
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    print(f"startup: best {best * 1000:.0f} ms of {[round(t * 1000) for t in timings]}")
+    assert best < STARTUP_BUDGET_SECONDS
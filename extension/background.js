@@ -4,6 +4,15 @@ console.log('Claude Browser Agent background script loaded');
 // WebSocket connection to Python backend
 let ws = null;
 let isConnecting = false;
+let reconnectDelay = 250;
+let keepaliveTimer = null;
+
+const MAX_RECONNECT_DELAY = 2000;
+const KEEPALIVE_INTERVAL = 20000; // keeps the MV3 service worker alive while connected
+const COMPLETED_CACHE_SIZE = 20;
+
+// Commands currently executing in this service worker instance
+const inFlightCommands = new Set();
 
 // Connect to Python WebSocket server
 function connectToPython() {
@@ -22,9 +31,17 @@ function connectToPython() {
   
   ws = new WebSocket('ws://localhost:8765');
   
-  ws.onopen = () => {
+  ws.onopen = async () => {
     console.log('✅ Connected to Python backend');
     isConnecting = false;
+    reconnectDelay = 250;
+    
+    // Present our session token so the backend can reattach us to a running task
+    const { sessionToken } = await chrome.storage.session.get('sessionToken');
+    sendToPython({ type: 'hello', session: sessionToken || null });
+    
+    clearInterval(keepaliveTimer);
+    keepaliveTimer = setInterval(() => sendToPython({ type: 'keepalive' }), KEEPALIVE_INTERVAL);
   };
   
   ws.onmessage = async (event) => {
@@ -32,7 +49,11 @@ function connectToPython() {
     
     try {
       const command = JSON.parse(event.data);
-      await executeCommand(command);
+      if (command.type === 'session') {
+        await handleSession(command);
+      } else {
+        await executeCommand(command);
+      }
     } catch (e) {
       console.error('Error parsing command:', e);
     }
@@ -47,12 +68,47 @@ function connectToPython() {
     console.log('❌ Disconnected from Python');
     ws = null;
     isConnecting = false;
+    clearInterval(keepaliveTimer);
     
-    // Try to reconnect after 2 seconds
-    setTimeout(connectToPython, 2000);
+    // Reconnect quickly, backing off while the backend stays down
+    setTimeout(connectToPython, reconnectDelay);
+    reconnectDelay = Math.min(reconnectDelay * 2, MAX_RECONNECT_DELAY);
   };
 }
 
+// Store the session assigned by the backend
+async function handleSession(message) {
+  if (message.resumed) {
+    console.log('🔁 Session resumed');
+    return;
+  }
+  
+  // New session: command ids start over, so forget results from the old one
+  console.log('🆕 New session started');
+  await chrome.storage.session.set({
+    sessionToken: message.session,
+    completedCommands: {}
+  });
+}
+
+// Results of executed commands, kept so replayed commands are not executed twice.
+// chrome.storage.session survives service worker restarts.
+async function getCompletedResult(commandId) {
+  const { completedCommands = {} } = await chrome.storage.session.get('completedCommands');
+  return completedCommands[commandId] || null;
+}
+
+async function rememberCompletedResult(commandId, message) {
+  const { completedCommands = {} } = await chrome.storage.session.get('completedCommands');
+  completedCommands[commandId] = message;
+  
+  const ids = Object.keys(completedCommands).map(Number).sort((a, b) => a - b);
+  for (const id of ids.slice(0, Math.max(0, ids.length - COMPLETED_CACHE_SIZE))) {
+    delete completedCommands[id];
+  }
+  await chrome.storage.session.set({ completedCommands });
+}
+
 // Send message to Python
 function sendToPython(data) {
   if (!ws || ws.readyState !== WebSocket.OPEN) {
@@ -90,18 +146,25 @@ chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
 
 // Handle task execution
 async function handleExecuteTask(message, sendResponse) {
-  const { task, timestamp } = message;
+  const { task, parallel, speculative, timestamp } = message;
   
   console.log('\n🚀 TASK EXECUTION STARTED');
   console.log('Task:', task);
   
   try {
-    // Send task to Python
-    const sent = sendToPython({
+    const payload = {
       type: 'task',
       task: task,
+      parallel: !!parallel,
       timestamp: timestamp
-    });
+    };
+    // Without the field, the backend uses its SPECULATIVE_ACTIONS default
+    if (typeof speculative === 'boolean') {
+      payload.speculative = speculative;
+    }
+    
+    // Send task to Python
+    const sent = sendToPython(payload);
     
     if (sent) {
       sendResponse({
@@ -127,44 +190,92 @@ async function handleExecuteTask(message, sendResponse) {
 // Execute commands from Python
 async function executeCommand(command) {
   const action = command.action;
-  console.log(`\n🔧 Executing: ${action}`);
+  const commandId = command.id;
+  console.log(`\n🔧 Executing: ${action} (#${commandId})`);
+  
+  // Replayed after a reconnect: never run a command twice
+  if (commandId !== undefined) {
+    if (inFlightCommands.has(commandId)) {
+      console.log(`🔁 Command #${commandId} is still running, ignoring replay`);
+      return;
+    }
+    const cached = await getCompletedResult(commandId);
+    if (cached) {
+      console.log(`🔁 Command #${commandId} already executed, resending result`);
+      sendToPython(cached);
+      return;
+    }
+    inFlightCommands.add(commandId);
+  }
   
   try {
     let result;
     
     switch (action) {
       case 'screenshot':
-        result = await takeScreenshot();
+        result = await takeScreenshot(commandId, command.tabId, command.delta);
         break;
         
       case 'click':
-        result = await clickAt(command.x, command.y, command.button);
+        result = await clickAt(command.x, command.y, command.button, command.tabId);
         break;
         
       case 'type':
-        result = await typeText(command.text);
+        result = await typeText(command.text, command.tabId);
         break;
         
       case 'key':
-        result = await pressKey(command.key);
+        result = await pressKey(command.key, command.tabId);
         break;
         
       case 'scroll':
-        result = await scroll(command.direction, command.amount);
+        result = await scroll(command.direction, command.amount, command.tabId);
         break;
         
       case 'navigate':
-        result = await navigateToUrl(command.url);
+        result = await navigateToUrl(command.url, command.tabId);
         break;
         
       case 'mouse_move':
-        result = await moveMouse(command.x, command.y);
+        result = await moveMouse(command.x, command.y, command.tabId);
+        break;
+        
+      case 'dom_snapshot':
+        result = await domSnapshot(command.tabId);
+        break;
+        
+      case 'batch':
+        result = await runBatch(command.steps, command.tabId);
+        break;
+        
+      case 'get_url':
+        result = await getTabUrl(command.tabId);
         break;
         
       case 'switch_tab':
         result = await switchTab(command.index);
         break;
         
+      case 'capture_full_page':
+        result = await captureFullPage(commandId, command.cached, command.maxTiles, command.tabId);
+        break;
+        
+      case 'open_tab':
+        result = await openTab(command.url);
+        break;
+        
+      case 'duplicate_tab':
+        result = await duplicateTab(command.tabId);
+        break;
+        
+      case 'close_tab':
+        result = await closeTab(command.tabId);
+        break;
+        
+      case 'list_tabs':
+        result = await listTabs();
+        break;
+        
       case 'download':
         result = await downloadFile(command.url);
         break;
@@ -174,43 +285,55 @@ async function executeCommand(command) {
     }
     
     // Send result back to Python
-    sendToPython({
+    const message = {
       type: 'action_result',
+      id: commandId,
       action: action,
       success: result.success,
       data: result.data || null
-    });
+    };
+    if (result.error) {
+      message.error = result.error;
+    }
+    
+    // Screenshots are idempotent and large, re-capture them instead of caching
+    if (commandId !== undefined && action !== 'screenshot') {
+      await rememberCompletedResult(commandId, message);
+    }
+    sendToPython(message);
     
   } catch (error) {
     console.error(`❌ Error executing ${action}:`, error);
     sendToPython({
       type: 'error',
+      id: commandId,
       action: action,
       message: error.message
     });
+  } finally {
+    inFlightCommands.delete(commandId);
   }
 }
 
 // Chrome action implementations
 
-async function takeScreenshot() {
+// `delta` (when present) is the frame id the backend holds for this tab, see sendFrame
+async function takeScreenshot(commandId, tabId, delta) {
   console.log('📸 Taking screenshot...');
   
   try {
-    const dimensions = await debugDimensions();
-    const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
-    
-    // Capture visible tab with JPEG format for smaller size
-    const screenshot = await chrome.tabs.captureVisibleTab(null, {
-        format: 'jpeg',
-        quality: 75
-    });
+    const dimensions = await debugDimensions(tabId);
+    const tab = await getTargetTab(tabId);
     
-    // Remove data URL prefix to get just base64
-    const base64Data = screenshot.replace(/^data:image\/jpeg;base64,/, '');
+    // JPEG for smaller size; background tabs go through the debugger
+    const base64Data = await captureTab(tab);
     
     console.log(`✅ Screenshot captured (${base64Data.length} bytes)`);
     
+    if (delta !== undefined) {
+      return await sendFrame(commandId, tab, base64Data, delta);
+    }
+    
     // Split large screenshots into chunks if necessary (WebSockets have message size limits)
     const maxChunkSize = 5 * 1024 * 1024; // 5MB is a safe limit for most WebSockets
     
@@ -218,6 +341,7 @@ async function takeScreenshot() {
       // Send screenshot in one piece
       sendToPython({
         type: 'screenshot',
+        id: commandId,
         data: base64Data,
         width: tab.width || 1280,
         height: tab.height || 800
@@ -228,6 +352,7 @@ async function takeScreenshot() {
       // Send but log a warning - backend will handle resizing
       sendToPython({
         type: 'screenshot',
+        id: commandId,
         data: base64Data,
         width: tab.width || 1280,
         height: tab.height || 800
@@ -241,11 +366,302 @@ async function takeScreenshot() {
   }
 }
 
-async function clickAt(x, y, button = 'left') {
+// Delta screenshots: every capture is split into DELTA_TILE blocks and hashed. When the backend
+// still holds our previous frame of the tab, only the changed blocks are sent, merged into runs
+// along each row of blocks. Blocks are a multiple of the 16px JPEG MCU, so unchanged page areas
+// decode to identical pixels and hash the same (chroma upsampling can dirty a neighbouring block
+// when a change touches a block edge).
+const DELTA_TILE = 64;
+const DELTA_MAX_DIRTY = 0.5; // send a keyframe when more of the frame than this changed
+const DELTA_QUALITY = 0.9; // dirty regions are re-encoded, keep them close to the capture
+const frameStates = new Map(); // tabId -> { frame, width, height, hashes }
+let frameCounter = 0;
+
+// FNV-1a over the pixels of each block, row-major block order
+function hashBlocks(pixels, width, height) {
+  const columns = Math.ceil(width / DELTA_TILE);
+  const rows = Math.ceil(height / DELTA_TILE);
+  const hashes = new Uint32Array(columns * rows);
+  for (let row = 0; row < rows; row++) {
+    const top = row * DELTA_TILE;
+    const bottom = Math.min(top + DELTA_TILE, height);
+    for (let column = 0; column < columns; column++) {
+      const left = column * DELTA_TILE;
+      const right = Math.min(left + DELTA_TILE, width);
+      let hash = 0x811c9dc5;
+      for (let y = top; y < bottom; y++) {
+        for (let i = y * width + left, end = y * width + right; i < end; i++) {
+          hash = Math.imul(hash ^ pixels[i], 0x01000193);
+        }
+      }
+      hashes[row * columns + column] = hash;
+    }
+  }
+  return hashes;
+}
+
+// Changed blocks as rectangles, one per run of adjacent changed blocks in a row
+function dirtyRuns(previous, hashes, width, height) {
+  const columns = Math.ceil(width / DELTA_TILE);
+  const rows = Math.ceil(height / DELTA_TILE);
+  const runs = [];
+  for (let row = 0; row < rows; row++) {
+    let start = -1;
+    for (let column = 0; column <= columns; column++) {
+      const index = row * columns + column;
+      const dirty = column < columns && previous[index] !== hashes[index];
+      if (dirty && start < 0) {
+        start = column;
+      } else if (!dirty && start >= 0) {
+        const x = start * DELTA_TILE;
+        const y = row * DELTA_TILE;
+        runs.push({
+          x: x,
+          y: y,
+          width: Math.min(column * DELTA_TILE, width) - x,
+          height: Math.min(y + DELTA_TILE, height) - y
+        });
+        start = -1;
+      }
+    }
+  }
+  return runs;
+}
+
+async function blobToBase64(blob) {
+  const bytes = new Uint8Array(await blob.arrayBuffer());
+  let binary = '';
+  for (let i = 0; i < bytes.length; i += 0x8000) {
+    binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+  }
+  return btoa(binary);
+}
+
+// Send a capture as a 'frame' message: the dirty regions against frame `base` when the
+// backend holds it, the full JPEG (a keyframe) otherwise
+async function sendFrame(commandId, tab, base64Data, base) {
+  const blob = await (await fetch(`data:image/jpeg;base64,${base64Data}`)).blob();
+  const bitmap = await createImageBitmap(blob);
+  const width = bitmap.width;
+  const height = bitmap.height;
+  const canvas = new OffscreenCanvas(width, height);
+  const context = canvas.getContext('2d', { willReadFrequently: true });
+  context.drawImage(bitmap, 0, 0);
+  const pixels = new Uint32Array(context.getImageData(0, 0, width, height).data.buffer);
+  const hashes = hashBlocks(pixels, width, height);
+  
+  const previous = frameStates.get(tab.id);
+  const frame = `${Date.now().toString(36)}-${++frameCounter}`;
+  frameStates.set(tab.id, { frame, width, height, hashes });
+  
+  const message = {
+    type: 'frame',
+    id: commandId,
+    frame: frame,
+    width: tab.width || 1280,
+    height: tab.height || 800
+  };
+  
+  let runs = null;
+  if (previous && base !== null && previous.frame === base &&
+      previous.width === width && previous.height === height) {
+    runs = dirtyRuns(previous.hashes, hashes, width, height);
+    const dirtyArea = runs.reduce((area, run) => area + run.width * run.height, 0);
+    if (dirtyArea > DELTA_MAX_DIRTY * width * height) {
+      runs = null;
+    }
+  }
+  
+  if (runs === null) {
+    message.data = base64Data;
+  } else {
+    message.base = base;
+    message.tiles = await Promise.all(runs.map(async (run) => {
+      const tile = new OffscreenCanvas(run.width, run.height);
+      tile.getContext('2d').drawImage(bitmap, run.x, run.y, run.width, run.height, 0, 0, run.width, run.height);
+      const data = await blobToBase64(await tile.convertToBlob({ type: 'image/jpeg', quality: DELTA_QUALITY }));
+      return { ...run, data: data };
+    }));
+  }
+  bitmap.close();
+  sendToPython(message);
+  
+  const sent = runs === null ? base64Data.length : message.tiles.reduce((total, tile) => total + tile.data.length, 0);
+  console.log(`✅ Frame sent: ${runs === null ? 'keyframe' : `${runs.length} dirty region(s)`}, ${sent} bytes`);
+  return { success: true, data: { frame: frame, delta: runs !== null, regions: runs === null ? 0 : runs.length } };
+}
+
+// Tab a command targets: explicit tabId, or the focused tab
+async function getTargetTab(tabId) {
+  if (tabId !== undefined && tabId !== null) {
+    return await chrome.tabs.get(tabId);
+  }
+  const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
+  return tab;
+}
+
+// Tabs we have attached the debugger to, kept attached between captures
+const debuggerTabs = new Set();
+
+async function captureBackgroundTab(tabId) {
+  const target = { tabId: tabId };
+  if (!debuggerTabs.has(tabId)) {
+    await chrome.debugger.attach(target, '1.3');
+    debuggerTabs.add(tabId);
+  }
+  const result = await chrome.debugger.sendCommand(target, 'Page.captureScreenshot', {
+    format: 'jpeg',
+    quality: 75
+  });
+  return result.data;
+}
+
+chrome.debugger.onDetach.addListener((source) => {
+  debuggerTabs.delete(source.tabId);
+});
+
+chrome.tabs.onRemoved.addListener((tabId) => {
+  debuggerTabs.delete(tabId);
+  frameStates.delete(tabId);
+});
+
+// captureVisibleTab only sees the focused tab and is limited to 2 calls per second
+const CAPTURE_INTERVAL = 550;
+let lastVisibleCapture = 0;
+
+async function captureTab(tab) {
+  if (!tab.active) {
+    return await captureBackgroundTab(tab.id);
+  }
+  const wait = lastVisibleCapture + CAPTURE_INTERVAL - Date.now();
+  if (wait > 0) {
+    await new Promise(resolve => setTimeout(resolve, wait));
+  }
+  lastVisibleCapture = Date.now();
+  const screenshot = await chrome.tabs.captureVisibleTab(tab.windowId, { format: 'jpeg', quality: 75 });
+  return screenshot.replace(/^data:image\/jpeg;base64,/, '');
+}
+
+// Scroll through the page and stream viewport tiles to Python.
+// Tiles whose key (URL + document load time + scroll offset + DOM mutation count) Python already has
+// are not captured again.
+async function captureFullPage(commandId, cachedKeys = [], maxTiles = 20, tabId) {
+  console.log('📜 Capturing full page...');
+  
+  try {
+    const tab = await getTargetTab(tabId);
+    const cached = new Set(cachedKeys || []);
+    
+    const readPage = async () => {
+      const [{ result }] = await chrome.scripting.executeScript({
+        target: { tabId: tab.id },
+        func: () => {
+          // Count content mutations, so cached tiles are invalidated when the page changes
+          if (window.__agentMutations === undefined) {
+            window.__agentMutations = 0;
+            new MutationObserver((records) => {
+              window.__agentMutations += records.length;
+            }).observe(document.documentElement, { childList: true, characterData: true, subtree: true });
+          }
+          return {
+            url: location.href,
+            scrollX: window.scrollX,
+            scrollY: window.scrollY,
+            viewportWidth: window.innerWidth,
+            viewportHeight: window.innerHeight,
+            pageHeight: Math.max(document.documentElement.scrollHeight, document.body ? document.body.scrollHeight : 0),
+            dpr: window.devicePixelRatio,
+            // The mutation count restarts with every load of the URL, this tells the loads apart
+            loadedAt: performance.timeOrigin,
+            mutations: window.__agentMutations
+          };
+        }
+      });
+      return result;
+    };
+    
+    const scrollTo = async (top) => {
+      const [{ result }] = await chrome.scripting.executeScript({
+        target: { tabId: tab.id },
+        func: (top) => {
+          // No smooth animation, then wait for two frames so the tile is painted.
+          // Hidden (background) tabs get no animation frames, the debugger capture paints them anyway
+          window.scrollTo({ top: top, left: 0, behavior: 'instant' });
+          return new Promise(resolve => {
+            const done = () => resolve(window.scrollY);
+            if (document.hidden) {
+              setTimeout(done, 50);
+            } else {
+              requestAnimationFrame(() => requestAnimationFrame(done));
+            }
+          });
+        },
+        args: [top]
+      });
+      return result;
+    };
+    
+    const start = await readPage();
+    const offsets = [];
+    for (let top = 0; offsets.length < maxTiles; top += start.viewportHeight) {
+      offsets.push(Math.min(top, Math.max(start.pageHeight - start.viewportHeight, 0)));
+      if (top + start.viewportHeight >= start.pageHeight) break;
+    }
+    
+    let captured = 0;
+    for (let index = 0; index < offsets.length; index++) {
+      const offset = await scrollTo(offsets[index]);
+      const page = await readPage();
+      const key = `${page.url}|${page.loadedAt}|${offset}|${page.mutations}`;
+      const tile = {
+        type: 'page_tile',
+        id: commandId,
+        index: index,
+        offset: offset,
+        key: key,
+        pageHeight: page.pageHeight,
+        viewportWidth: page.viewportWidth,
+        viewportHeight: page.viewportHeight,
+        dpr: page.dpr
+      };
+      
+      if (cached.has(key)) {
+        tile.cached = true;
+      } else {
+        tile.data = await captureTab(tab);
+        captured++;
+      }
+      sendToPython(tile);
+    }
+    
+    // Put the page back where the user (or the model) left it
+    await chrome.scripting.executeScript({
+      target: { tabId: tab.id },
+      func: (x, y) => window.scrollTo({ top: y, left: x, behavior: 'instant' }),
+      args: [start.scrollX, start.scrollY]
+    });
+    
+    console.log(`✅ Full page: ${offsets.length} tiles, ${captured} captured`);
+    return {
+      success: true,
+      data: {
+        url: start.url,
+        pageHeight: start.pageHeight,
+        tiles: offsets.length,
+        captured: captured
+      }
+    };
+  } catch (error) {
+    console.error('Full page capture error:', error);
+    return { success: false, error: error.message };
+  }
+}
+
+async function clickAt(x, y, button = 'left', tabId) {
   console.log(`🖱️ Clicking at (${x}, ${y}) with ${button} button`);
   
   try {
-    const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
+    const tab = await getTargetTab(tabId);
     
     // First check if we're on a special URL that can't be accessed
     if (tab.url.startsWith("chrome://") || 
@@ -279,6 +695,43 @@ async function clickAt(x, y, button = 'left') {
           document.body.appendChild(marker);
           setTimeout(() => marker.remove(), 2000);
           
+          // Compact descriptor for the model, rect in page coordinates
+          const implicitRoles = { A: 'link', BUTTON: 'button', SELECT: 'combobox', TEXTAREA: 'textbox', IMG: 'img' };
+          const inputRoles = { checkbox: 'checkbox', radio: 'radio', submit: 'button', button: 'button', range: 'slider' };
+          const describe = (el) => {
+            const rect = el.getBoundingClientRect();
+            const role = el.getAttribute('role') ||
+              (el.tagName === 'INPUT' ? inputRoles[el.type] || 'textbox' : implicitRoles[el.tagName]) ||
+              (/^H[1-6]$/.test(el.tagName) ? 'heading' : null);
+            const label = el.labels && el.labels.length ? el.labels[0].innerText : '';
+            const text = el.getAttribute('aria-label') || label || el.innerText ||
+              el.getAttribute('placeholder') || (el.type === 'password' ? '' : el.value) ||
+              el.title || el.alt || '';
+            return {
+              tag: el.tagName.toLowerCase(),
+              role: role,
+              text: text.replace(/\s+/g, ' ').trim().substring(0, 80),
+              href: el.tagName === 'A' && el.href ? el.href : null,
+              rect: {
+                x: Math.round(rect.left + window.scrollX),
+                y: Math.round(rect.top + window.scrollY),
+                width: Math.round(rect.width),
+                height: Math.round(rect.height)
+              }
+            };
+          };
+          // What the model needs to confirm the click without a new screenshot
+          const outcome = (result, el) => {
+            const focused = document.activeElement;
+            result.data = {
+              element: { ...describe(el), clickable: result.elementInfo.clicked.isClickable },
+              focus: focused && focused !== document.body ? describe(focused) : null,
+              url: location.href,
+              scroll: { x: Math.round(window.scrollX), y: Math.round(window.scrollY) }
+            };
+            return result;
+          };
+          
           // Find element at coordinates
           let element = document.elementFromPoint(x, y);
           
@@ -338,15 +791,15 @@ async function clickAt(x, y, button = 'left') {
             
             // For links
             if (element.tagName === 'A' && element.href) {
-              return { 
+              return outcome({ 
                 success: true, 
                 elementInfo, 
                 isLink: true, 
                 href: element.href 
-              };
+              }, element);
             }
             
-            return { success: true, elementInfo, priority: true };
+            return outcome({ success: true, elementInfo, priority: true }, element);
           }
           
           // Fallback: Check if element has click handlers
@@ -371,7 +824,7 @@ async function clickAt(x, y, button = 'left') {
             
             // Perform click on the element
             element.click();
-            return { success: true, elementInfo };
+            return outcome({ success: true, elementInfo }, element);
           }
           
           // Last resort: Walk up the DOM tree (but limit depth)
@@ -439,15 +892,15 @@ async function clickAt(x, y, button = 'left') {
             
             // For links
             if (clickableElement.tagName === 'A' && clickableElement.href) {
-              return { 
+              return outcome({ 
                 success: true, 
                 elementInfo, 
                 isLink: true, 
                 href: clickableElement.href 
-              };
+              }, clickableElement);
             }
             
-            return { success: true, elementInfo };
+            return outcome({ success: true, elementInfo }, clickableElement);
           } catch (clickError) {
             console.error("Error during click operation:", clickError);
             return { 
@@ -477,6 +930,9 @@ async function clickAt(x, y, button = 'left') {
       }
       
       console.log('✅ Click result:', scriptResult?.success);
+      if (scriptResult?.data) {
+        await clickSettled(tab, scriptResult.data);
+      }
       return scriptResult || { success: false, error: 'No result from script' };
       
     } catch (scriptError) {
@@ -495,11 +951,27 @@ async function clickAt(x, y, button = 'left') {
     };
   }
 }
-async function typeText(text) {
+// Give click handlers a moment, then report a navigation the click started
+const CLICK_SETTLE = 150;
+
+async function clickSettled(tab, data) {
+  await new Promise(resolve => setTimeout(resolve, CLICK_SETTLE));
+  try {
+    const after = await chrome.tabs.get(tab.id);
+    const url = after.pendingUrl || after.url;
+    if (url && url !== data.url) {
+      data.navigatedTo = url;
+    }
+  } catch (error) {
+    console.warn('Could not read the tab after the click:', error.message);
+  }
+}
+
+async function typeText(text, tabId) {
   console.log(`⌨️ Typing: "${text}"`);
   
   try {
-    const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
+    const tab = await getTargetTab(tabId);
     
     const result = await chrome.scripting.executeScript({
       target: { tabId: tab.id },
@@ -544,11 +1016,11 @@ async function typeText(text) {
   }
 }
 
-async function pressKey(key) {
+async function pressKey(key, tabId) {
   console.log(`⌨️ Pressing key: ${key}`);
   
   try {
-    const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
+    const tab = await getTargetTab(tabId);
     
     const result = await chrome.scripting.executeScript({
       target: { tabId: tab.id },
@@ -595,11 +1067,11 @@ async function pressKey(key) {
   }
 }
 
-async function scroll(direction, amount = 100) {
+async function scroll(direction, amount = 100, tabId) {
   console.log(`📜 Scrolling ${direction} by ${amount}px`);
   
   try {
-    const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
+    const tab = await getTargetTab(tabId);
     
     await chrome.scripting.executeScript({
       target: { tabId: tab.id },
@@ -621,26 +1093,146 @@ async function scroll(direction, amount = 100) {
   }
 }
 
-async function navigateToUrl(url) {
+async function navigateToUrl(url, tabId) {
   console.log(`🌐 Navigating to: ${url}`);
   
   try {
-    const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
+    const tab = await getTargetTab(tabId);
+    const loaded = waitForTabLoad(tab.id, 8000);
     await chrome.tabs.update(tab.id, { url: url });
+    const complete = await loaded;
     
-    console.log('✅ Navigation started');
-    return { success: true };
+    console.log(complete ? '✅ Page loaded' : '⚠️ Navigation started, page still loading');
+    return { success: true, data: { loaded: complete } };
   } catch (error) {
     console.error('Navigate error:', error);
     return { success: false, error: error.message };
   }
 }
 
-async function moveMouse(x, y) {
+// Resolves true once the tab finishes loading, false after the timeout
+function waitForTabLoad(tabId, timeout) {
+  return new Promise((resolve) => {
+    const listener = (updatedTabId, changeInfo) => {
+      if (updatedTabId === tabId && changeInfo.status === 'complete') {
+        finish(true);
+      }
+    };
+    const timer = setTimeout(() => finish(false), timeout);
+    function finish(complete) {
+      clearTimeout(timer);
+      chrome.tabs.onUpdated.removeListener(listener);
+      resolve(complete);
+    }
+    chrome.tabs.onUpdated.addListener(listener);
+  });
+}
+
+// Visible form fields with a unique selector each, so the backend can fill them without clicking
+async function domSnapshot(tabId) {
+  console.log('🧾 Taking DOM snapshot');
+  
+  try {
+    const tab = await getTargetTab(tabId);
+    
+    const result = await chrome.scripting.executeScript({
+      target: { tabId: tab.id },
+      func: () => {
+        const skippedTypes = ['hidden', 'submit', 'button', 'image', 'file', 'reset', 'checkbox', 'radio'];
+        
+        const selectorFor = (el) => {
+          if (el.id && document.querySelectorAll(`#${CSS.escape(el.id)}`).length === 1) {
+            return `#${CSS.escape(el.id)}`;
+          }
+          const name = el.getAttribute('name');
+          if (name) {
+            const byName = `${el.tagName.toLowerCase()}[name="${CSS.escape(name)}"]`;
+            if (document.querySelectorAll(byName).length === 1) return byName;
+          }
+          const path = [];
+          for (let node = el; node && node !== document.body; node = node.parentElement) {
+            const siblings = Array.from(node.parentElement.children).filter(s => s.tagName === node.tagName);
+            path.unshift(`${node.tagName.toLowerCase()}:nth-of-type(${siblings.indexOf(node) + 1})`);
+          }
+          return `body > ${path.join(' > ')}`;
+        };
+        
+        const fields = Array.from(document.querySelectorAll('input, textarea, select'))
+          .filter(el => !skippedTypes.includes((el.type || '').toLowerCase()))
+          .filter(el => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden')
+          .slice(0, 50)
+          .map(el => ({
+            selector: selectorFor(el),
+            tag: el.tagName.toLowerCase(),
+            type: (el.type || '').toLowerCase(),
+            name: el.getAttribute('name') || '',
+            id: el.id || '',
+            label: el.labels && el.labels.length ? el.labels[0].innerText.trim().substring(0, 60) : '',
+            placeholder: el.getAttribute('placeholder') || '',
+            ariaLabel: el.getAttribute('aria-label') || '',
+            autocomplete: (el.getAttribute('autocomplete') || '').toLowerCase(),
+            disabled: el.disabled || el.readOnly || false,
+            filled: Boolean(el.value)
+          }));
+        
+        return { url: location.href, title: document.title, fields: fields };
+      }
+    });
+    
+    return { success: true, data: result[0]?.result };
+  } catch (error) {
+    console.error('DOM snapshot error:', error);
+    return { success: false, error: error.message };
+  }
+}
+
+// Several DOM steps in one round trip: [{op: 'fill', selector, value}]
+async function runBatch(steps = [], tabId) {
+  console.log(`📦 Running batch of ${steps.length} steps`);
+  
+  try {
+    const tab = await getTargetTab(tabId);
+    
+    const result = await chrome.scripting.executeScript({
+      target: { tabId: tab.id },
+      func: (steps) => {
+        return steps.map((step) => {
+          if (step.host && location.hostname !== step.host) {
+            return { selector: step.selector, success: false, error: `Page is on ${location.hostname}, not ${step.host}` };
+          }
+          const el = document.querySelector(step.selector);
+          if (!el) return { selector: step.selector, success: false, error: 'Element not found' };
+          
+          if (step.op === 'fill') {
+            el.focus();
+            // Native setter, so frameworks that track the value property see the change
+            const prototype = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype :
+              el.tagName === 'SELECT' ? HTMLSelectElement.prototype : HTMLInputElement.prototype;
+            Object.getOwnPropertyDescriptor(prototype, 'value').set.call(el, step.value);
+            el.dispatchEvent(new Event('input', { bubbles: true }));
+            el.dispatchEvent(new Event('change', { bubbles: true }));
+            return { selector: step.selector, success: el.value === step.value };
+          }
+          return { selector: step.selector, success: false, error: `Unknown op: ${step.op}` };
+        });
+      },
+      args: [steps]
+    });
+    
+    const results = result[0]?.result || [];
+    console.log('✅ Batch results:', results);
+    return { success: results.length > 0 && results.every(r => r.success), data: { results: results } };
+  } catch (error) {
+    console.error('Batch error:', error);
+    return { success: false, error: error.message };
+  }
+}
+
+async function moveMouse(x, y, tabId) {
   console.log(`🖱️ Moving mouse to (${x}, ${y})`);
   
   try {
-    const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
+    const tab = await getTargetTab(tabId);
     
     // Show visual indicator for mouse position
     await chrome.scripting.executeScript({
@@ -709,6 +1301,93 @@ async function switchTab(index) {
   }
 }
 
+async function openTab(url) {
+  console.log(`➕ Opening background tab: ${url || 'about:blank'}`);
+  
+  try {
+    const tab = await chrome.tabs.create({ url: url || 'about:blank', active: false });
+    return { success: true, data: { tabId: tab.id, index: tab.index } };
+  } catch (error) {
+    console.error('Open tab error:', error);
+    return { success: false, error: error.message };
+  }
+}
+
+// Background copy of a tab (same URL, history and scroll position), to try actions out in
+async function duplicateTab(tabId) {
+  console.log('📑 Duplicating tab');
+  
+  try {
+    const tab = await getTargetTab(tabId);
+    const [{ result: scroll }] = await chrome.scripting.executeScript({
+      target: { tabId: tab.id },
+      func: () => ({ x: window.scrollX, y: window.scrollY })
+    });
+    const clone = await chrome.tabs.duplicate(tab.id);
+    // duplicate() focuses the copy, keep the original in front
+    if (tab.active) {
+      await chrome.tabs.update(tab.id, { active: true });
+    }
+    if ((await chrome.tabs.get(clone.id)).status !== 'complete') {
+      await waitForTabLoad(clone.id, 8000);
+    }
+    await chrome.scripting.executeScript({
+      target: { tabId: clone.id },
+      func: (x, y) => window.scrollTo({ top: y, left: x, behavior: 'instant' }),
+      args: [scroll.x, scroll.y]
+    });
+    return { success: true, data: { tabId: clone.id, index: clone.index } };
+  } catch (error) {
+    console.error('Duplicate tab error:', error);
+    return { success: false, error: error.message };
+  }
+}
+
+async function closeTab(tabId) {
+  console.log(`✖️ Closing tab ${tabId}`);
+  
+  try {
+    if (debuggerTabs.has(tabId)) {
+      await chrome.debugger.detach({ tabId: tabId });
+    }
+    await chrome.tabs.remove(tabId);
+    return { success: true };
+  } catch (error) {
+    console.error('Close tab error:', error);
+    return { success: false, error: error.message };
+  }
+}
+
+// Works on pages scripts cannot run on (the New Tab page, chrome:// pages)
+async function getTabUrl(tabId) {
+  try {
+    const tab = await getTargetTab(tabId);
+    return { success: true, data: { url: tab.url || tab.pendingUrl || '' } };
+  } catch (error) {
+    console.error('Get URL error:', error);
+    return { success: false, error: error.message };
+  }
+}
+
+async function listTabs() {
+  try {
+    const tabs = await chrome.tabs.query({ currentWindow: true });
+    return {
+      success: true,
+      data: tabs.map(tab => ({
+        tabId: tab.id,
+        index: tab.index,
+        url: tab.url,
+        title: tab.title,
+        active: tab.active
+      }))
+    };
+  } catch (error) {
+    console.error('List tabs error:', error);
+    return { success: false, error: error.message };
+  }
+}
+
 async function downloadFile(url) {
   console.log(`💾 Downloading: ${url}`);
   
@@ -722,9 +1401,9 @@ async function downloadFile(url) {
   }
 }
 // Simple function to print browser dimensions to console
-async function debugDimensions() {
+async function debugDimensions(tabId) {
   try {
-    const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
+    const tab = await getTargetTab(tabId);
     
     if (!tab) {
       console.error('❌ No active tab found');
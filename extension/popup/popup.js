@@ -1,6 +1,8 @@
 // Get DOM elements
 const taskInput = document.getElementById('task');
 const executeButton = document.getElementById('execute');
+const parallelCheckbox = document.getElementById('parallel');
+const speculativeCheckbox = document.getElementById('speculative');
 const statusDiv = document.getElementById('status');
 
 // Function to show status messages
@@ -35,13 +37,20 @@ executeButton.addEventListener('click', () => {
   executeButton.disabled = true;
   showStatus('Sending task to background script...', 'info');
   
+  const message = {
+    type: 'EXECUTE_TASK',
+    task: task,
+    parallel: parallelCheckbox.checked,
+    timestamp: Date.now()
+  };
+  // Ticking opts in; unticked leaves the choice to the backend's default
+  if (speculativeCheckbox.checked) {
+    message.speculative = true;
+  }
+  
   // Send message to background script
   chrome.runtime.sendMessage(
-    {
-      type: 'EXECUTE_TASK',
-      task: task,
-      timestamp: Date.now()
-    },
+    message,
     (response) => {
       // Re-enable button
       executeButton.disabled = false;